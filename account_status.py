@@ -30,6 +30,9 @@ ACCOUNT_STATUS_BADGES: Dict[AccountStatus, str] = {
     ACCOUNT_STATUS_UNDER_REVIEW: "warning",
 }
 
+# Kanal LISTEN/NOTIFY Postgres; payload berformat "<channel>:<user_id>".
+ACCOUNT_STATUS_NOTIFY_CHANNEL = "aska_account_status"
+
 BLOCKING_STATUSES: set[AccountStatus] = {
     ACCOUNT_STATUS_SUSPENDED,
     ACCOUNT_STATUS_UNDER_REVIEW,
@@ -112,6 +115,7 @@ __all__ = [
     "ACCOUNT_STATUS_SUSPENDED",
     "ACCOUNT_STATUS_UNDER_REVIEW",
     "BLOCKING_STATUSES",
+    "ACCOUNT_STATUS_NOTIFY_CHANNEL",
     "StatusNotice",
     "build_status_notice",
 ]
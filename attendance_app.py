@@ -9,11 +9,7 @@ from flask import Flask
 from dashboard.auth import auth_bp, current_user, init_oauth
 from dashboard.attendance import attendance_bp
 from dashboard.db_access import shutdown_pool
-from dashboard.queries import (
-    fetch_pending_bullying_count,
-    fetch_pending_corruption_count,
-    fetch_pending_psych_count,
-)
+from dashboard.queries import fetch_inbox_counters
 from dashboard.schema import ensure_dashboard_schema
 from utils import to_jakarta
 
@@ -45,25 +41,17 @@ def create_app() -> Flask:
     @app.context_processor
     def inject_globals() -> dict:
         user = current_user()
-        pending_bullying = pending_psych = pending_corruption = 0
+        pending = {}
         if user:
             try:
-                pending_bullying = fetch_pending_bullying_count()
-            except Exception:
-                pass
-            try:
-                pending_psych = fetch_pending_psych_count()
-            except Exception:
-                pass
-            try:
-                pending_corruption = fetch_pending_corruption_count()
+                pending = fetch_inbox_counters()["pending"]
             except Exception:
                 pass
         return {
             "current_user": user,
-            "pending_bullying_count": pending_bullying,
-            "pending_psych_count": pending_psych,
-            "pending_corruption_count": pending_corruption,
+            "pending_bullying_count": pending.get("bullying", 0),
+            "pending_psych_count": pending.get("psych", 0),
+            "pending_corruption_count": pending.get("corruption", 0),
         }
 
     @app.template_filter("jakarta")
@@ -0,0 +1,132 @@
+"""Benchmark burst mention Twitter: loop serial vs pipeline async (API & LLM disimulasikan).
+
+Contoh:
+    python bench_twitter_mentions.py --mentions 20 --llm-latency 1.5 --post-latency 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import twitter_bot
+from twitter_bot import TwitterAskaBot, _TokenBucket
+
+
+class _SimulatedClient:
+    def __init__(self, mentions: int, post_latency: float) -> None:
+        self.mentions = mentions
+        self.post_latency = post_latency
+        self.posted = 0
+
+    def get_users_mentions(self, user_id, **params):
+        tweets = [
+            SimpleNamespace(id=1000 + i, author_id=2000 + i, text=f"@aska jadwal kelas {i}?", created_at=None)
+            for i in range(self.mentions)
+        ]
+        users = [SimpleNamespace(id=2000 + i, username=f"siswa{i}") for i in range(self.mentions)]
+        return SimpleNamespace(
+            data=list(reversed(tweets)),
+            includes={"users": users},
+            meta={"newest_id": str(1000 + self.mentions - 1)},
+        )
+
+    def create_tweet(self, **kwargs):
+        time.sleep(self.post_latency)
+        self.posted += 1
+
+
+class _SimulatedChain:
+    input_schema = None
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def invoke(self, payload):
+        time.sleep(self.latency)
+        return "Jadwal kelas ada di papan pengumuman sekolah."
+
+
+def _build_bot(args) -> TwitterAskaBot:
+    bot = TwitterAskaBot.__new__(TwitterAskaBot)
+    bot._client = _SimulatedClient(args.mentions, args.post_latency)
+    bot.qa_chain = _SimulatedChain(args.llm_latency)
+    bot.bot_user_id = 1
+    bot.bot_username = "aska"
+    bot.last_seen_id = None
+    bot.mentions_latest_only = False
+    bot.mentions_max_results = max(5, args.mentions)
+    bot.mentions_cooldown = 60
+    bot._mentions_backoff_last = 60
+    bot.spam_keywords = set()
+    bot.autopost_state = {}
+    bot.state_path = twitter_bot.Path(args.state_path)
+    bot._state_lock = twitter_bot.threading.Lock()
+    bot.generate_concurrency = args.generate_concurrency
+    bot.post_concurrency = args.post_concurrency
+    bot.pipeline_queue_size = 20
+    bot._mentions_bucket = _TokenBucket(capacity=1, refill_per_second=1.0)
+    bot._llm_bucket = _TokenBucket(capacity=1000, refill_per_second=1000)
+    bot._post_bucket = _TokenBucket(capacity=1000, refill_per_second=1000)
+    return bot
+
+
+async def _run_pipeline_once(bot: TwitterAskaBot) -> None:
+    generate_queue: asyncio.Queue = asyncio.Queue(maxsize=bot.pipeline_queue_size)
+    post_queue: asyncio.Queue = asyncio.Queue(maxsize=bot.pipeline_queue_size)
+    workers = [
+        asyncio.create_task(bot._generate_worker(generate_queue, post_queue))
+        for _ in range(bot.generate_concurrency)
+    ]
+    workers.extend(
+        asyncio.create_task(bot._post_worker(post_queue)) for _ in range(bot.post_concurrency)
+    )
+    tweets, user_map, newest_id = await asyncio.to_thread(bot._fetch_mentions)
+    for tweet in tweets:
+        await generate_queue.put((tweet, user_map))
+    await generate_queue.join()
+    await post_queue.join()
+    bot._advance_last_seen(newest_id)
+    for worker in workers:
+        worker.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mentions", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--post-latency", type=float, default=0.3)
+    parser.add_argument("--generate-concurrency", type=int, default=4)
+    parser.add_argument("--post-concurrency", type=int, default=2)
+    parser.add_argument("--state-path", default="/tmp/aska_twitter_bench_state.json")
+    args = parser.parse_args()
+
+    # Jangan tulis data benchmark ke chat_logs / twitter_logs
+    twitter_bot.save_chat = lambda *a, **k: None
+    twitter_bot.get_recent_chat_history = lambda *a, **k: []
+    twitter_bot.LOGGER.handlers.clear()
+
+    serial_bot = _build_bot(args)
+    started = time.perf_counter()
+    serial_bot.process_mentions()
+    serial_elapsed = time.perf_counter() - started
+
+    pipeline_bot = _build_bot(args)
+    started = time.perf_counter()
+    asyncio.run(_run_pipeline_once(pipeline_bot))
+    pipeline_elapsed = time.perf_counter() - started
+
+    print(f"Burst {args.mentions} mention (LLM {args.llm_latency}s, post {args.post_latency}s)")
+    print(f"  serial   : {serial_elapsed:7.2f}s  posted={serial_bot._client.posted}")
+    print(
+        f"  pipeline : {pipeline_elapsed:7.2f}s  posted={pipeline_bot._client.posted} "
+        f"(generate={args.generate_concurrency}, post={args.post_concurrency})"
+    )
+    if pipeline_elapsed > 0:
+        print(f"  speedup  : {serial_elapsed / pipeline_elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
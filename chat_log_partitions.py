@@ -0,0 +1,578 @@
+"""Partisi bulanan tabel chat_logs: skema, migrasi online, dan arsip partisi lama.
+
+``chat_logs`` dipartisi per bulan (``PARTITION BY RANGE (created_at)``) dengan
+partisi ``chat_logs_yYYYYmMM`` plus ``chat_logs_default`` sebagai penampung.
+Indeks dibuat di tabel induk sehingga otomatis ada di setiap partisi.
+
+Partisi yang lebih tua dari ``CHAT_LOG_RETENTION_MONTHS`` bisa diarsipkan ke
+``CHAT_LOG_ARCHIVE_DIR/chat_logs_YYYY_MM.csv.gz`` (+ manifest JSON) lalu dihapus
+dari database. Dashboard tetap bisa membaca arsip tersebut, dan arsip bisa
+dipasang kembali sebagai partisi dengan perintah ``restore``.
+
+Contoh:
+    python chat_log_partitions.py plans            # query plan jalur baca utama
+    python chat_log_partitions.py migrate          # heap lama -> tabel berpartisi (online)
+    python chat_log_partitions.py ensure           # buat partisi bulan-bulan berikutnya
+    python chat_log_partitions.py archive          # arsipkan partisi di luar masa retensi
+    python chat_log_partitions.py restore 2024-01  # pasang kembali arsip sebagai partisi
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CHAT_LOG_PARTITION_MONTHS_AHEAD = max(1, int(os.getenv("CHAT_LOG_PARTITION_MONTHS_AHEAD", "2") or 2))
+CHAT_LOG_RETENTION_MONTHS = max(0, int(os.getenv("CHAT_LOG_RETENTION_MONTHS", "12") or 0))
+CHAT_LOG_ARCHIVE_DIR = Path(os.getenv("CHAT_LOG_ARCHIVE_DIR", "archive/chat_logs"))
+if not CHAT_LOG_ARCHIVE_DIR.is_absolute():
+    # Bot dan dashboard bisa dijalankan dari direktori kerja berbeda
+    CHAT_LOG_ARCHIVE_DIR = Path(__file__).resolve().parent / CHAT_LOG_ARCHIVE_DIR
+CHAT_LOG_PARTITION_TIMEZONE = os.getenv("ASKA_TIMEZONE", "Asia/Jakarta")
+CHAT_LOG_MIGRATION_BATCH = 5000
+# Kunci advisory bersama untuk pembuatan partisi: bot, web, dan tiap worker gunicorn menjalankan
+# ensure saat import db, sehingga setelah pergantian bulan mereka bisa berebut partisi yang sama.
+CHAT_LOG_PARTITION_LOCK_KEY = 0x41534B41_0001
+
+CHAT_LOG_COLUMNS = (
+    "id",
+    "user_id",
+    "username",
+    "text",
+    "role",
+    "created_at",
+    "response_time_ms",
+    "topic",
+    "channel",
+)
+_COLUMN_LIST = ", ".join(CHAT_LOG_COLUMNS)
+_PARTITION_NAME = re.compile(r"^chat_logs_y(\d{4})m(\d{2})$")
+DEFAULT_PARTITION = "chat_logs_default"
+MIGRATION_TABLE = "chat_logs_partitioned"
+LEGACY_TABLE = "chat_logs_legacy"
+
+# Indeks per partisi untuk jalur baca utama:
+# - riwayat chat per user (get_chat_history, thread dashboard, UPDATE by id+user)
+# - agregat dashboard per role/rentang waktu (index-only untuk COUNT DISTINCT user)
+# - daftar chat terbaru & filter tanggal
+# - statistik/log Twitter (topic + role, terbaru dulu)
+CHAT_LOG_INDEXES = (
+    ("idx_chat_logs_user_created", "(user_id, created_at DESC)"),
+    ("idx_chat_logs_user_topic_created", "(user_id, topic, created_at DESC)"),
+    ("idx_chat_logs_role_created", "(role, created_at) INCLUDE (user_id, response_time_ms)"),
+    ("idx_chat_logs_created", "(created_at DESC)"),
+    ("idx_chat_logs_topic_role_created", "(topic, role, created_at DESC)"),
+)
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"chat_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name or "")
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _bound(month: date) -> str:
+    """Batas partisi sebagai literal timestamptz di zona waktu sekolah."""
+    return f"{month:%Y-%m-%d} 00:00:00 {CHAT_LOG_PARTITION_TIMEZONE}"
+
+
+def _table_kind(cursor, table: str) -> Optional[str]:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _lock_partition_maintenance(cursor) -> None:
+    """Serialkan cek-buat-pindah-ATTACH partisi antarproses sampai transaksi selesai."""
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (CHAT_LOG_PARTITION_LOCK_KEY,))
+
+
+def chat_logs_is_partitioned(cursor) -> bool:
+    return _table_kind(cursor, "chat_logs") == "p"
+
+
+def _create_partitioned_parent(cursor, table: str) -> None:
+    cursor.execute("CREATE SEQUENCE IF NOT EXISTS chat_logs_id_seq AS integer")
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER NOT NULL DEFAULT nextval('chat_logs_id_seq'),
+            user_id BIGINT,
+            username TEXT,
+            text TEXT,
+            role TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            response_time_ms INTEGER,
+            topic TEXT,
+            channel TEXT DEFAULT 'telegram',
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {table} DEFAULT"
+    )
+
+
+def ensure_chat_log_indexes(cursor, table: str = "chat_logs") -> None:
+    for index_name, definition in CHAT_LOG_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} {definition}")
+
+
+def create_partitioned_chat_logs(cursor, *, months_ahead: int = CHAT_LOG_PARTITION_MONTHS_AHEAD) -> None:
+    """Instalasi baru: buat chat_logs langsung sebagai tabel berpartisi."""
+    _lock_partition_maintenance(cursor)
+    _create_partitioned_parent(cursor, "chat_logs")
+    cursor.execute("ALTER SEQUENCE chat_logs_id_seq OWNED BY chat_logs.id")
+    ensure_chat_log_indexes(cursor)
+    ensure_chat_log_partitions(cursor, months_ahead=months_ahead)
+
+
+def list_chat_log_partitions(cursor, table: str = "chat_logs") -> List[Tuple[str, Optional[date]]]:
+    """(nama, bulan) setiap partisi; bulan None untuk partisi default."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+        """,
+        (table,),
+    )
+    return [(row[0], parse_partition_month(row[0])) for row in cursor.fetchall()]
+
+
+def _attach_month_partition(cursor, table: str, month: date) -> bool:
+    """Buat partisi satu bulan; baris bulan itu yang sudah jatuh ke partisi default dipindahkan."""
+    name = partition_name(month)
+    if _table_kind(cursor, name) is not None:
+        return False
+    lower, upper = _bound(month), _bound(_add_months(month, 1))
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE created_at >= %s::timestamptz AND created_at < %s::timestamptz
+            RETURNING {_COLUMN_LIST}
+        )
+        INSERT INTO {name} ({_COLUMN_LIST}) SELECT {_COLUMN_LIST} FROM moved
+        """,
+        (lower, upper),
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        (lower, upper),
+    )
+    return True
+
+
+def ensure_chat_log_partitions(
+    cursor,
+    *,
+    table: str = "chat_logs",
+    months_ahead: int = CHAT_LOG_PARTITION_MONTHS_AHEAD,
+    since: Optional[date] = None,
+) -> List[str]:
+    """
+    Pastikan partisi bulan ini s.d. ``months_ahead`` bulan ke depan (atau sejak ``since``) tersedia.
+    Kunci advisory ditahan sampai transaksi pemanggil commit/rollback.
+    """
+    _lock_partition_maintenance(cursor)
+    current = _month_start(date.today())
+    month = _month_start(since) if since else current
+    last = _add_months(current, months_ahead)
+    created = []
+    while month <= last:
+        if _attach_month_partition(cursor, table, month):
+            created.append(partition_name(month))
+        month = _add_months(month, 1)
+    return created
+
+
+# ==================== Migrasi online ====================
+
+_MIRROR_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION chat_logs_mirror_to_partitioned() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {MIGRATION_TABLE} WHERE id = OLD.id AND created_at = OLD.created_at;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {MIGRATION_TABLE} ({_COLUMN_LIST})
+        VALUES ({", ".join(f"NEW.{column}" for column in CHAT_LOG_COLUMNS)})
+        ON CONFLICT (id, created_at) DO UPDATE SET
+            {", ".join(f"{column} = EXCLUDED.{column}" for column in CHAT_LOG_COLUMNS[1:] if column != "created_at")};
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def migrate_chat_logs(conn, *, batch_size: int = CHAT_LOG_MIGRATION_BATCH, log=print) -> bool:
+    """Pindahkan heap chat_logs lama ke tabel berpartisi tanpa menghentikan bot.
+
+    1. Buat ``chat_logs_partitioned`` + partisi bulanan yang dibutuhkan.
+    2. Trigger di tabel lama mencerminkan INSERT/UPDATE/DELETE baru.
+    3. Salin baris lama per batch id (commit per batch, tulis tetap jalan).
+    4. Bangun indeks, lalu dalam satu transaksi singkat: kunci, cocokkan jumlah baris,
+       lepas FK yang menunjuk chat_logs(id), tukar nama tabel, pindahkan sequence.
+
+    Tabel lama disimpan sebagai ``chat_logs_legacy`` untuk verifikasi.
+    Mengembalikan False bila chat_logs sudah berpartisi.
+    """
+    with conn.cursor() as cur:
+        if chat_logs_is_partitioned(cur):
+            log("chat_logs sudah berpartisi, tidak ada yang dimigrasi.")
+            return False
+        if _table_kind(cur, LEGACY_TABLE) is not None:
+            raise RuntimeError(f"{LEGACY_TABLE} masih ada; hapus dulu sisa migrasi sebelumnya.")
+        cur.execute("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS topic TEXT")
+        cur.execute("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS channel TEXT")
+        cur.execute("SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM chat_logs")
+        oldest, max_id = cur.fetchone()
+        _create_partitioned_parent(cur, MIGRATION_TABLE)
+        created = ensure_chat_log_partitions(
+            cur,
+            table=MIGRATION_TABLE,
+            since=oldest.date() if oldest else None,
+        )
+        cur.execute(_MIRROR_FUNCTION_SQL)
+        cur.execute("DROP TRIGGER IF EXISTS chat_logs_mirror ON chat_logs")
+        cur.execute(
+            """
+            CREATE TRIGGER chat_logs_mirror
+            AFTER INSERT OR UPDATE OR DELETE ON chat_logs
+            FOR EACH ROW EXECUTE FUNCTION chat_logs_mirror_to_partitioned()
+            """
+        )
+    conn.commit()
+    log(f"Tabel {MIGRATION_TABLE} dibuat dengan {len(created)} partisi; menyalin hingga id {max_id}.")
+
+    copied = 0
+    last_id = 0
+    while last_id < max_id:
+        upper = last_id + batch_size
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO {MIGRATION_TABLE} ({_COLUMN_LIST})
+                SELECT {_COLUMN_LIST} FROM chat_logs
+                WHERE id > %s AND id <= %s
+                ON CONFLICT (id, created_at) DO NOTHING
+                """,
+                (last_id, upper),
+            )
+            copied += max(cur.rowcount, 0)
+        conn.commit()
+        last_id = upper
+        log(f"  disalin {copied} baris (id <= {min(upper, max_id)})")
+
+    with conn.cursor() as cur:
+        ensure_chat_log_indexes(cur, MIGRATION_TABLE)
+    conn.commit()
+    log("Indeks partisi selesai dibangun; menukar tabel...")
+
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE chat_logs IN EXCLUSIVE MODE")
+        cur.execute("SELECT COUNT(*) FROM chat_logs")
+        old_total = cur.fetchone()[0]
+        cur.execute(f"SELECT COUNT(*) FROM {MIGRATION_TABLE}")
+        new_total = cur.fetchone()[0]
+        if old_total != new_total:
+            conn.rollback()
+            raise RuntimeError(
+                f"Jumlah baris berbeda (lama {old_total}, baru {new_total}); trigger tetap aktif, jalankan ulang."
+            )
+        cur.execute(
+            """
+            SELECT conrelid::regclass::text, conname
+            FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = 'chat_logs'::regclass
+            """
+        )
+        foreign_keys = cur.fetchall()
+        for relation, constraint in foreign_keys:
+            # Kunci primer tabel berpartisi wajib memuat created_at, jadi FK ke chat_logs(id)
+            # tidak bisa dipertahankan. Laporan juga harus tetap ada saat partisi diarsipkan.
+            cur.execute(f'ALTER TABLE {relation} DROP CONSTRAINT "{constraint}"')
+        cur.execute("DROP TRIGGER chat_logs_mirror ON chat_logs")
+        cur.execute("DROP FUNCTION chat_logs_mirror_to_partitioned()")
+        cur.execute(f"ALTER TABLE chat_logs RENAME TO {LEGACY_TABLE}")
+        cur.execute(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT chat_logs_pkey TO {LEGACY_TABLE}_pkey")
+        cur.execute(f"ALTER TABLE {LEGACY_TABLE} ALTER COLUMN id DROP DEFAULT")
+        cur.execute(f"ALTER TABLE {MIGRATION_TABLE} RENAME TO chat_logs")
+        cur.execute(f"ALTER TABLE chat_logs RENAME CONSTRAINT {MIGRATION_TABLE}_pkey TO chat_logs_pkey")
+        cur.execute("ALTER SEQUENCE chat_logs_id_seq OWNED BY chat_logs.id")
+        cur.execute("SELECT setval('chat_logs_id_seq', GREATEST(COALESCE((SELECT MAX(id) FROM chat_logs), 0), 1))")
+    conn.commit()
+    for relation, constraint in foreign_keys:
+        log(f"  FK {relation}.{constraint} dilepas")
+    log(f"Selesai: {new_total} baris. Setelah diverifikasi: DROP TABLE {LEGACY_TABLE};")
+    return True
+
+
+# ==================== Arsip ====================
+
+def _archive_paths(month: date, archive_dir: Path) -> Tuple[Path, Path]:
+    stem = f"chat_logs_{month:%Y_%m}"
+    return archive_dir / f"{stem}.csv.gz", archive_dir / f"{stem}.json"
+
+
+def archive_chat_log_partitions(
+    conn,
+    *,
+    retention_months: int = CHAT_LOG_RETENTION_MONTHS,
+    archive_dir: Path = CHAT_LOG_ARCHIVE_DIR,
+    log=print,
+) -> List[Path]:
+    """Ekspor partisi yang lebih tua dari masa retensi ke CSV gzip, lalu lepas & hapus partisinya."""
+    if retention_months <= 0:
+        log("CHAT_LOG_RETENTION_MONTHS=0: arsip dinonaktifkan.")
+        return []
+    cutoff = _add_months(_month_start(date.today()), -retention_months)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    with conn.cursor() as cur:
+        partitions = [
+            (name, month) for name, month in list_chat_log_partitions(cur)
+            if month is not None and month < cutoff
+        ]
+    conn.commit()
+
+    archived: List[Path] = []
+    for name, month in partitions:
+        data_path, manifest_path = _archive_paths(month, archive_dir)
+        tmp_path = data_path.with_name(data_path.name + ".tmp")
+        digest = hashlib.sha256()
+        try:
+            with conn.cursor() as cur:
+                # Kunci partisi (bukan induk) agar tidak ada tulis baru selama ekspor
+                cur.execute(f"LOCK TABLE {name} IN SHARE MODE")
+                cur.execute(f"SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM {name}")
+                rows, first_at, last_at = cur.fetchone()
+                cur.execute("SET LOCAL TimeZone TO 'UTC'")
+                with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as handle:
+                    cur.copy_expert(
+                        f"COPY (SELECT {_COLUMN_LIST} FROM {name} ORDER BY created_at, id) "
+                        "TO STDOUT WITH (FORMAT csv, HEADER true)",
+                        handle,
+                    )
+                with tmp_path.open("rb") as handle:
+                    for chunk in iter(lambda: handle.read(1 << 20), b""):
+                        digest.update(chunk)
+                os.replace(tmp_path, data_path)
+                manifest_path.write_text(
+                    json.dumps(
+                        {
+                            "month": f"{month:%Y-%m}",
+                            "partition": name,
+                            "rows": rows,
+                            "first_created_at": first_at.isoformat() if first_at else None,
+                            "last_created_at": last_at.isoformat() if last_at else None,
+                            "columns": list(CHAT_LOG_COLUMNS),
+                            "sha256": digest.hexdigest(),
+                            "archived_at": datetime.now().astimezone().isoformat(),
+                        },
+                        indent=2,
+                    ),
+                    encoding="utf-8",
+                )
+                cur.execute(f"ALTER TABLE chat_logs DETACH PARTITION {name}")
+                cur.execute(f"DROP TABLE {name}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        archived.append(data_path)
+        log(f"  {name}: {rows} baris -> {data_path}")
+    return archived
+
+
+def list_chat_log_archives(archive_dir: Path = CHAT_LOG_ARCHIVE_DIR) -> List[Dict[str, Any]]:
+    """Manifest setiap arsip, terbaru dulu."""
+    if not archive_dir.is_dir():
+        return []
+    manifests = []
+    for path in archive_dir.glob("chat_logs_*.json"):
+        try:
+            manifests.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return sorted(manifests, key=lambda item: item.get("month") or "", reverse=True)
+
+
+def iter_chat_log_archive(month: date, archive_dir: Path = CHAT_LOG_ARCHIVE_DIR) -> Iterator[Dict[str, Any]]:
+    """Baca baris arsip satu bulan secara streaming (tanpa memuat seluruh file)."""
+    data_path, _ = _archive_paths(_month_start(month), archive_dir)
+    with gzip.open(data_path, "rt", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            record: Dict[str, Any] = {key: (value if value != "" else None) for key, value in row.items()}
+            for key in ("id", "user_id", "response_time_ms"):
+                if record.get(key) is not None:
+                    record[key] = int(record[key])
+            if record.get("created_at"):
+                record["created_at"] = datetime.fromisoformat(record["created_at"])
+            yield record
+
+
+def restore_chat_log_archive(conn, month: date, archive_dir: Path = CHAT_LOG_ARCHIVE_DIR, log=print) -> int:
+    """Pasang kembali arsip satu bulan sebagai partisi chat_logs."""
+    month = _month_start(month)
+    name = partition_name(month)
+    data_path, _ = _archive_paths(month, archive_dir)
+    with conn.cursor() as cur:
+        _lock_partition_maintenance(cur)
+        if _table_kind(cur, name) is not None:
+            raise RuntimeError(f"Partisi {name} sudah ada.")
+        cur.execute(f"CREATE TABLE {name} (LIKE chat_logs INCLUDING DEFAULTS)")
+        with gzip.open(data_path, "rt", encoding="utf-8", newline="") as handle:
+            cur.copy_expert(
+                f"COPY {name} ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv, HEADER true)",
+                handle,
+            )
+        cur.execute(f"SELECT COUNT(*) FROM {name}")
+        rows = cur.fetchone()[0]
+        cur.execute(
+            f"ALTER TABLE chat_logs ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            (_bound(month), _bound(_add_months(month, 1))),
+        )
+    conn.commit()
+    log(f"{name}: {rows} baris dipulihkan dari {data_path}")
+    return rows
+
+
+# ==================== Query plan ====================
+
+READ_PATH_QUERIES = (
+    (
+        "riwayat chat user (get_chat_history)",
+        "SELECT id, role, text, created_at FROM chat_logs WHERE user_id = %(user_id)s "
+        "ORDER BY created_at DESC LIMIT 10",
+    ),
+    (
+        "riwayat chat web + feedback (get_chat_history with_feedback)",
+        "SELECT cl.id, cl.role, cl.text, cl.created_at, cf.feedback_type FROM chat_logs cl "
+        "LEFT JOIN chat_feedback cf ON cf.chat_log_id = cl.id AND cf.user_id = cl.user_id "
+        "WHERE cl.user_id = %(user_id)s ORDER BY cl.created_at DESC LIMIT 10",
+    ),
+    (
+        "riwayat chat user per topik",
+        "SELECT id, role, text, created_at FROM chat_logs WHERE user_id = %(user_id)s AND topic = 'web' "
+        "ORDER BY created_at DESC LIMIT 10",
+    ),
+    (
+        "user aktif 7 hari (dashboard)",
+        "SELECT COUNT(DISTINCT user_id) FROM chat_logs WHERE role = 'user' "
+        "AND created_at >= NOW() - INTERVAL '7 days'",
+    ),
+    (
+        "pesan per hari 30 hari (dashboard)",
+        "SELECT DATE(created_at) AS day, COUNT(*) FROM chat_logs "
+        "WHERE created_at >= NOW() - INTERVAL '30 days' AND role = 'user' GROUP BY day ORDER BY day",
+    ),
+    (
+        "halaman pertama chat logs (dashboard)",
+        "SELECT id, user_id, username, text, role, created_at, response_time_ms FROM chat_logs "
+        "ORDER BY created_at DESC LIMIT 50",
+    ),
+    (
+        "balasan Twitter terakhir",
+        "SELECT id, user_id, text, created_at FROM chat_logs WHERE topic = 'twitter' AND role = 'aska' "
+        "ORDER BY created_at DESC LIMIT 1",
+    ),
+)
+
+
+def explain_read_paths(conn, *, user_id: Optional[int] = None, log=print) -> None:
+    """EXPLAIN (ANALYZE, BUFFERS) untuk jalur baca utama; jalankan sebelum & sesudah migrasi."""
+    with conn.cursor() as cur:
+        if user_id is None:
+            cur.execute(
+                "SELECT user_id FROM chat_logs WHERE user_id IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT 1"
+            )
+            row = cur.fetchone()
+            user_id = row[0] if row else 0
+        kind = "berpartisi" if chat_logs_is_partitioned(cur) else "heap"
+        log(f"chat_logs: {kind}, user_id contoh {user_id}\n")
+        for label, query in READ_PATH_QUERIES:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", {"user_id": user_id})
+            log(f"-- {label}")
+            for (line,) in cur.fetchall():
+                log(line)
+            log("")
+    conn.rollback()
+
+
+def _parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="buat partisi bulan ini s.d. beberapa bulan ke depan (cron harian)")
+    ensure.add_argument("--months-ahead", type=int, default=CHAT_LOG_PARTITION_MONTHS_AHEAD)
+    migrate = commands.add_parser("migrate", help="migrasi online dari heap chat_logs lama")
+    migrate.add_argument("--batch-size", type=int, default=CHAT_LOG_MIGRATION_BATCH)
+    archive = commands.add_parser("archive", help="arsipkan partisi di luar masa retensi")
+    archive.add_argument("--retention-months", type=int, default=CHAT_LOG_RETENTION_MONTHS)
+    restore = commands.add_parser("restore", help="pasang kembali arsip sebagai partisi")
+    restore.add_argument("month", type=_parse_month, help="YYYY-MM")
+    plans = commands.add_parser("plans", help="EXPLAIN ANALYZE jalur baca utama")
+    plans.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    import db  # noqa: WPS433 - koneksi & skema dasar dibuat saat import
+
+    if args.command == "ensure":
+        with db.conn.cursor() as cur:
+            if not chat_logs_is_partitioned(cur):
+                raise SystemExit("chat_logs belum berpartisi; jalankan `migrate` terlebih dahulu.")
+            created = ensure_chat_log_partitions(cur, months_ahead=max(1, args.months_ahead))
+        db.conn.commit()
+        print(f"Partisi baru: {', '.join(created) or '-'}")
+    elif args.command == "migrate":
+        migrate_chat_logs(db.conn, batch_size=args.batch_size)
+    elif args.command == "archive":
+        with db.conn.cursor() as cur:
+            if not chat_logs_is_partitioned(cur):
+                raise SystemExit("chat_logs belum berpartisi; jalankan `migrate` terlebih dahulu.")
+            ensure_chat_log_partitions(cur)
+        db.conn.commit()
+        archived = archive_chat_log_partitions(db.conn, retention_months=args.retention_months)
+        print(f"{len(archived)} partisi diarsipkan ke {CHAT_LOG_ARCHIVE_DIR}")
+    elif args.command == "restore":
+        restore_chat_log_archive(db.conn, args.month)
+    elif args.command == "plans":
+        explain_read_paths(db.conn, user_id=args.user_id)
+
+
+if __name__ == "__main__":
+    main()
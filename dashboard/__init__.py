@@ -13,7 +13,7 @@ from .attendance import attendance_bp
 from .library import library_bp
 from .TKA import tka_bp
 from .db_access import shutdown_pool
-from .queries import fetch_pending_bullying_count, fetch_pending_psych_count, fetch_pending_corruption_count
+from .queries import fetch_inbox_counters
 from .schema import ensure_dashboard_schema
 from utils import to_jakarta
 
@@ -49,29 +49,19 @@ def create_app() -> Flask:
     @app.context_processor
     def inject_globals() -> dict:
         user = current_user()
-        pending_count = 0
-        pending_psych = 0
-        pending_corruption = 0
+        pending = {}
 
         if user:
             try:
-                pending_count = fetch_pending_bullying_count()
+                pending = fetch_inbox_counters()["pending"]
             except Exception:
-                pending_count = 0
-            try:
-                pending_psych = fetch_pending_psych_count()
-            except Exception:
-                pending_psych = 0
-            try:
-                pending_corruption = fetch_pending_corruption_count()
-            except Exception:
-                pending_corruption = 0
+                pending = {}
 
         return {
             "current_user": user,
-            "pending_bullying_count": pending_count,
-            "pending_psych_count": pending_psych,
-            "pending_corruption_count": pending_corruption,
+            "pending_bullying_count": pending.get("bullying", 0),
+            "pending_psych_count": pending.get("psych", 0),
+            "pending_corruption_count": pending.get("corruption", 0),
         }
 
     @app.template_filter("jakarta")
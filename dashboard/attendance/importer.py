@@ -4,14 +4,14 @@ import re
 import zipfile
 from dataclasses import dataclass
 from datetime import datetime, date
-from typing import Dict, Iterable, List, Optional, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from xml.etree import ElementTree as ET
 
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from .queries import create_school_class as _create_school_class
-    from .queries import create_student as _create_student
+    from .queries import StudentImportDiff
 
 NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
 NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
@@ -43,11 +43,12 @@ class StudentRow:
 def _load_shared_strings(zf: zipfile.ZipFile) -> List[str]:
     if "xl/sharedStrings.xml" not in zf.namelist():
         return []
-    root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
     strings: List[str] = []
-    for si in root.findall(f"{{{NS_MAIN}}}si"):
-        text = "".join(node.text or "" for node in si.findall(f".//{{{NS_MAIN}}}t"))
-        strings.append(text)
+    with zf.open("xl/sharedStrings.xml") as handle:
+        for _event, elem in ET.iterparse(handle, events=("end",)):
+            if elem.tag == f"{{{NS_MAIN}}}si":
+                strings.append("".join(node.text or "" for node in elem.iter(f"{{{NS_MAIN}}}t")))
+                elem.clear()
     return strings
 
 
@@ -67,29 +68,59 @@ def _resolve_sheets(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
     return sheets
 
 
-def _extract_rows(zf: zipfile.ZipFile, target: str, shared: List[str]) -> List[List[str]]:
+_COLUMN_INDEX_CACHE: Dict[str, int] = {}
+
+
+def _column_index(ref: Optional[str]) -> Optional[int]:
+    letters = (ref or "").rstrip("0123456789")
+    if not letters:
+        return None
+    index = _COLUMN_INDEX_CACHE.get(letters)
+    if index is None:
+        index = 0
+        for char in letters:
+            index = index * 26 + ord(char) - 64
+        index -= 1
+        _COLUMN_INDEX_CACHE[letters] = index
+    return index
+
+
+def _cell_text(cell: ET.Element, shared: List[str]) -> str:
+    if not len(cell):
+        return ""
+    cell_type = cell.attrib.get("t")
+    if cell_type == "inlineStr":
+        return "".join(node.text or "" for node in cell.iter(f"{{{NS_MAIN}}}t"))
+    v = cell.find(f"{{{NS_MAIN}}}v")
+    if v is None or v.text is None:
+        return ""
+    if cell_type == "s":
+        idx = int(v.text)
+        return shared[idx] if idx < len(shared) else ""
+    return v.text
+
+
+def _iter_sheet_rows(zf: zipfile.ZipFile, target: str, shared: List[str]) -> Iterator[List[str]]:
+    """Baca baris sheet secara streaming (iterparse) tanpa membangun DOM satu sheet penuh.
+
+    Posisi sel mengikuti atribut ``r`` (mis. ``F9``) sehingga sel kosong yang tidak
+    ditulis Excel tidak menggeser kolom berikutnya.
+    """
     sheet_path = "xl/" + target
-    root = ET.fromstring(zf.read(sheet_path))
-    data = root.find(f"{{{NS_MAIN}}}sheetData")
-    if data is None:
-        return []
-    rows: List[List[str]] = []
-    for row in data.findall(f"{{{NS_MAIN}}}row"):
-        values: List[str] = []
-        for cell in row.findall(f"{{{NS_MAIN}}}c"):
-            cell_type = cell.attrib.get("t")
-            v = cell.find(f"{{{NS_MAIN}}}v")
-            if v is None or v.text is None:
-                values.append("")
+    row_tag = f"{{{NS_MAIN}}}row"
+    cell_tag = f"{{{NS_MAIN}}}c"
+    with zf.open(sheet_path) as handle:
+        for _event, elem in ET.iterparse(handle, events=("end",)):
+            if elem.tag != row_tag:
                 continue
-            text = v.text
-            if cell_type == "s":
-                idx = int(text)
-                values.append(shared[idx] if idx < len(shared) else "")
-            else:
-                values.append(text)
-        rows.append(values)
-    return rows
+            values: List[str] = []
+            for cell in elem.iter(cell_tag):
+                column = _column_index(cell.attrib.get("r"))
+                if column is not None and column > len(values):
+                    values.extend([""] * (column - len(values)))
+                values.append(_cell_text(cell, shared))
+            elem.clear()
+            yield values
 
 
 COL_MAP = {
@@ -135,7 +166,7 @@ def _parse_birth_date(value: Optional[str]) -> Optional[date]:
     return None
 
 
-def _parse_class_sheet(sheet_name: str, rows: List[List[str]]) -> Iterable[StudentRow]:
+def _parse_class_sheet(sheet_name: str, rows: Iterable[List[str]]) -> Iterable[StudentRow]:
     header_found = False
     for row in rows:
         if not header_found:
@@ -174,9 +205,9 @@ def _parse_class_sheet(sheet_name: str, rows: List[List[str]]) -> Iterable[Stude
         )
 
 
-def _guess_academic_year(rows: List[List[str]]) -> Optional[str]:
+def _guess_academic_year(rows: Iterable[List[str]]) -> Optional[str]:
     pattern = re.compile(r"(20\\d{2}/20\\d{2})")
-    for row in rows[:10]:
+    for row in islice(rows, 10):
         for cell in row:
             match = pattern.search(cell)
             if match:
@@ -191,49 +222,78 @@ def load_students_from_workbook(path: str) -> Tuple[Optional[str], Dict[str, Lis
         academic_year: Optional[str] = None
         classes: Dict[str, List[StudentRow]] = {}
         for sheet_name, target in sheets:
+            rows = _iter_sheet_rows(zf, target, shared)
             if not sheet_name or sheet_name.upper() in {"REKAP", "SISWA"}:
-                rows = _extract_rows(zf, target, shared)
                 year = _guess_academic_year(rows)
+                rows.close()
                 if year and not academic_year:
                     academic_year = year
                 continue
-            rows = _extract_rows(zf, target, shared)
-            if not rows:
-                continue
             class_rows = list(_parse_class_sheet(sheet_name, rows))
             if class_rows:
                 classes[sheet_name] = class_rows
         return academic_year, classes
 
 
-def import_attendance_from_excel(path: str, *, academic_year: Optional[str] = None) -> None:
-    from .queries import create_school_class, create_student  # Lazy import to avoid DB init during parsing
+def _roster_rows(classes: Dict[str, List[StudentRow]]) -> Iterator[Tuple[object, ...]]:
+    from .queries import STUDENT_IMPORT_COLUMNS
 
-    detected_year, classes = load_students_from_workbook(path)
-    active_year = academic_year or detected_year
-    total_students = 0
     for class_name, students in classes.items():
-        class_id = create_school_class(name=class_name, academic_year=active_year)
         for student in students:
-            create_student(
-                class_id,
+            yield (
+                class_name,
                 student.full_name,
-                sequence=student.sequence,
-                student_number=student.student_number,
-                nisn=student.nisn,
-                gender=student.gender,
-                birth_place=student.birth_place,
-                birth_date=student.birth_date,
-                religion=student.religion,
-                address_line=student.address_line,
-                rt=student.rt,
-                rw=student.rw,
-                kelurahan=student.kelurahan,
-                kecamatan=student.kecamatan,
-                father_name=student.father_name,
-                mother_name=student.mother_name,
-                nik=student.nik,
-                kk_number=student.kk_number,
+                *(getattr(student, column) for column in STUDENT_IMPORT_COLUMNS),
             )
-            total_students += 1
-    print(f"Imported {total_students} students across {len(classes)} classes.")
+
+
+def _print_import_diff(diff: "StudentImportDiff", *, limit: int = 20) -> None:
+    sections = (
+        ("Siswa baru", diff.inserted, lambda row: f"{row['class_name']}: {row['full_name']}"),
+        (
+            "Diperbarui",
+            diff.updated,
+            lambda row: f"{row['class_name']}: {row['full_name']} ({', '.join(row['changes'])})",
+        ),
+        ("Dinonaktifkan", diff.deactivated, lambda row: f"{row['class_name']}: {row['full_name']}"),
+    )
+    if diff.new_classes:
+        print(f"Kelas baru ({len(diff.new_classes)}): {', '.join(diff.new_classes)}")
+    for label, rows, describe in sections:
+        print(f"{label}: {len(rows)}")
+        for row in rows[:limit]:
+            print(f"  - {describe(row)}")
+        if len(rows) > limit:
+            print(f"  ... {len(rows) - limit} lainnya")
+    print(f"Tidak berubah: {diff.unchanged}")
+
+
+def import_attendance_from_excel(
+    path: str,
+    *,
+    academic_year: Optional[str] = None,
+    dry_run: bool = False,
+    deactivate_missing: bool = True,
+) -> "StudentImportDiff":
+    """Import roster siswa dari workbook dalam satu transaksi.
+
+    ``dry_run`` hanya menampilkan siswa yang akan ditambah, diperbarui, dan
+    dinonaktifkan tanpa mengubah database.
+    """
+    from .queries import import_student_roster  # Lazy import to avoid DB init during parsing
+
+    detected_year, classes = load_students_from_workbook(path)
+    active_year = academic_year or detected_year
+    diff = import_student_roster(
+        _roster_rows(classes),
+        academic_year=active_year,
+        deactivate_missing=deactivate_missing,
+        dry_run=dry_run,
+    )
+    _print_import_diff(diff)
+    total_students = sum(len(students) for students in classes.values())
+    if diff.applied:
+        print(f"Imported {total_students} students across {len(classes)} classes.")
+    else:
+        print(f"Dry run: {total_students} students across {len(classes)} classes, database tidak diubah.")
+    return diff
@@ -1,16 +1,82 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from psycopg2 import errors
 
-from psycopg2.extras import DictRow, Json
+from psycopg2.extras import DictRow, Json, execute_values
 
 from ..db_access import get_cursor
 
 ATTENDANCE_STATUSES: Tuple[str, ...] = ("masuk", "alpa", "izin", "sakit")
 DEFAULT_ATTENDANCE_STATUS = "masuk"
+# Jumlah baris per statement INSERT ... VALUES pada upsert massal
+BULK_UPSERT_PAGE_SIZE = 1000
+
+
+def _normalize_attendance_entry(
+    entry: Dict[str, Any],
+    id_key: str,
+    label: str,
+) -> Tuple[int, str, Any]:
+    raw_id = entry.get(id_key)
+    if raw_id is None:
+        raise ValueError(f"{id_key} wajib diisi untuk setiap entri {label}.")
+    try:
+        id_int = int(raw_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{id_key} harus berupa integer.") from exc
+
+    raw_status = (entry.get("status") or DEFAULT_ATTENDANCE_STATUS).strip().lower()
+    if raw_status not in ATTENDANCE_STATUSES:
+        raise ValueError(f"Status absensi tidak dikenal: {raw_status}")
+
+    return id_int, raw_status, entry.get("note")
+
+
+def _bulk_upsert_attendance(
+    cur,
+    *,
+    table: str,
+    columns: Tuple[str, ...],
+    conflict_columns: Tuple[str, ...],
+    rows: List[Tuple[Any, ...]],
+) -> int:
+    """Upsert banyak baris absensi dalam satu statement per halaman (execute_values).
+
+    Baris dengan kunci konflik yang sama cukup diambil yang terakhir, sama seperti
+    hasil loop INSERT ... ON CONFLICT per baris sebelumnya (Postgres menolak satu
+    statement yang memperbarui baris yang sama dua kali).
+    """
+    if not rows:
+        return 0
+    key_positions = [columns.index(column) for column in conflict_columns]
+    deduped: Dict[Tuple[Any, ...], Tuple[Any, ...]] = {}
+    for row in rows:
+        deduped[tuple(row[pos] for pos in key_positions)] = row
+
+    update_columns = [column for column in columns if column not in conflict_columns]
+    assignments = ",\n            ".join(
+        f"{column} = EXCLUDED.{column}" for column in update_columns
+    )
+    column_list = ", ".join(columns)
+    conflict_list = ", ".join(conflict_columns)
+    execute_values(
+        cur,
+        f"""
+        INSERT INTO {table} ({column_list})
+        VALUES %s
+        ON CONFLICT ({conflict_list})
+        DO UPDATE SET
+            {assignments},
+            updated_at = NOW()
+        """,
+        list(deduped.values()),
+        page_size=BULK_UPSERT_PAGE_SIZE,
+    )
+    return len(deduped)
 
 
 def list_school_classes() -> List[Dict[str, Any]]:
@@ -427,48 +493,30 @@ def upsert_teacher_attendance_entries(
     attendance_date: date,
     recorded_by: int,
     entries: Iterable[Dict[str, Any]],
-) -> None:
-    with get_cursor(commit=True) as cur:
-        for entry in entries:
-            teacher_id = entry.get("teacher_id")
-            if teacher_id is None:
-                raise ValueError("teacher_id wajib diisi untuk setiap entri absensi staff.")
-            try:
-                teacher_id_int = int(teacher_id)
-            except (TypeError, ValueError) as exc:
-                raise ValueError("teacher_id harus berupa integer.") from exc
-
-            raw_status = (entry.get("status") or DEFAULT_ATTENDANCE_STATUS).strip().lower()
-            if raw_status not in ATTENDANCE_STATUSES:
-                raise ValueError(f"Status absensi tidak dikenal: {raw_status}")
-
-            note = entry.get("note")
-
-            cur.execute(
-                """
-                INSERT INTO teacher_attendance_records (
-                    attendance_date,
-                    teacher_id,
-                    status,
-                    note,
-                    recorded_by
-                )
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (attendance_date, teacher_id)
-                DO UPDATE SET
-                    status = EXCLUDED.status,
-                    note = EXCLUDED.note,
-                    recorded_by = EXCLUDED.recorded_by,
-                    updated_at = NOW()
-                """,
-                (
-                    attendance_date,
-                    teacher_id_int,
-                    raw_status,
-                    note,
-                    recorded_by,
-                ),
+) -> int:
+    rows = []
+    for entry in entries:
+        teacher_id_int, raw_status, note = _normalize_attendance_entry(
+            entry, "teacher_id", "absensi staff"
+        )
+        rows.append(
+            (
+                entry.get("attendance_date") or attendance_date,
+                teacher_id_int,
+                raw_status,
+                note,
+                recorded_by,
             )
+        )
+
+    with get_cursor(commit=True) as cur:
+        return _bulk_upsert_attendance(
+            cur,
+            table="teacher_attendance_records",
+            columns=("attendance_date", "teacher_id", "status", "note", "recorded_by"),
+            conflict_columns=("attendance_date", "teacher_id"),
+            rows=rows,
+        )
 
 
 def create_school_class(name: str, academic_year: Optional[str] = None) -> int:
@@ -584,6 +632,208 @@ def create_student(
     return int(new_id)
 
 
+STUDENT_IMPORT_COLUMNS: Tuple[str, ...] = (
+    "student_number",
+    "sequence",
+    "nisn",
+    "gender",
+    "birth_place",
+    "birth_date",
+    "religion",
+    "address_line",
+    "rt",
+    "rw",
+    "kelurahan",
+    "kecamatan",
+    "father_name",
+    "mother_name",
+    "nik",
+    "kk_number",
+)
+_STUDENT_IMPORT_TYPES = {"sequence": "INTEGER", "birth_date": "DATE"}
+
+
+@dataclass
+class StudentImportDiff:
+    """Perbedaan roster di file terhadap tabel students (kunci: nama kelas + nama siswa)."""
+
+    new_classes: List[str]
+    inserted: List[Dict[str, Any]]
+    updated: List[Dict[str, Any]]
+    deactivated: List[Dict[str, Any]]
+    unchanged: int
+    applied: bool = False
+
+
+def import_student_roster(
+    rows: Iterable[Tuple[Any, ...]],
+    *,
+    academic_year: Optional[str] = None,
+    deactivate_missing: bool = True,
+    dry_run: bool = False,
+) -> StudentImportDiff:
+    """Muat roster siswa dalam satu transaksi lewat tabel staging.
+
+    ``rows`` berisi tuple ``(class_name, full_name, *STUDENT_IMPORT_COLUMNS)``. Baris
+    dimasukkan ke tabel sementara, diff dihitung dengan join ke ``students``, lalu (bila
+    bukan ``dry_run``) kelas dibuat dan siswa di-upsert dalam satu statement. Siswa
+    aktif di kelas yang ada di file tetapi tidak muncul lagi dinonaktifkan bila
+    ``deactivate_missing``.
+    """
+    deduped: Dict[Tuple[str, str], Tuple[Any, ...]] = {}
+    for row in rows:
+        class_name = (row[0] or "").strip()
+        full_name = (row[1] or "").strip()
+        if not class_name or not full_name:
+            continue
+        # Baris ganda dalam satu kelas: yang terakhir menang, sama seperti upsert per baris
+        deduped[(class_name, full_name)] = (class_name, full_name, *row[2:])
+    clean_year = (academic_year or "").strip() or None
+
+    staging_columns = ", ".join(
+        f"{column} {_STUDENT_IMPORT_TYPES.get(column, 'TEXT')}" for column in STUDENT_IMPORT_COLUMNS
+    )
+    column_list = ", ".join(STUDENT_IMPORT_COLUMNS)
+    changed_columns = ",\n                    ".join(
+        f"CASE WHEN st.{column} IS DISTINCT FROM s.{column} THEN '{column}' END"
+        for column in STUDENT_IMPORT_COLUMNS
+    )
+
+    with get_cursor(commit=not dry_run) as cur:
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE student_import_staging (
+                class_name TEXT NOT NULL,
+                full_name TEXT NOT NULL,
+                {staging_columns}
+            ) ON COMMIT DROP
+            """
+        )
+        execute_values(
+            cur,
+            f"INSERT INTO student_import_staging (class_name, full_name, {column_list}) VALUES %s",
+            list(deduped.values()),
+            page_size=BULK_UPSERT_PAGE_SIZE,
+        )
+
+        cur.execute(
+            """
+            SELECT DISTINCT s.class_name
+            FROM student_import_staging s
+            LEFT JOIN school_classes c ON c.name = s.class_name
+            WHERE c.id IS NULL
+            ORDER BY s.class_name
+            """
+        )
+        new_classes = [row[0] for row in cur.fetchall()]
+
+        cur.execute(
+            f"""
+            SELECT
+                s.class_name,
+                s.full_name,
+                st.id AS student_id,
+                st.active,
+                array_remove(ARRAY[
+                {changed_columns}
+            ], NULL) AS changes
+            FROM student_import_staging s
+            LEFT JOIN school_classes c ON c.name = s.class_name
+            LEFT JOIN students st ON st.class_id = c.id AND st.full_name = s.full_name
+            ORDER BY s.class_name, s.sequence NULLS LAST, s.full_name
+            """
+        )
+        inserted: List[Dict[str, Any]] = []
+        updated: List[Dict[str, Any]] = []
+        unchanged = 0
+        for row in cur.fetchall():
+            entry = {"class_name": row["class_name"], "full_name": row["full_name"]}
+            if row["student_id"] is None:
+                inserted.append(entry)
+                continue
+            changes = list(row["changes"] or [])
+            if not row["active"]:
+                changes.append("active")
+            if changes:
+                updated.append({**entry, "student_id": row["student_id"], "changes": changes})
+            else:
+                unchanged += 1
+
+        deactivated: List[Dict[str, Any]] = []
+        if deactivate_missing:
+            cur.execute(
+                """
+                SELECT st.id AS student_id, c.name AS class_name, st.full_name
+                FROM students st
+                JOIN school_classes c ON c.id = st.class_id
+                WHERE st.active IS TRUE
+                  AND c.name IN (SELECT class_name FROM student_import_staging)
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM student_import_staging s
+                      WHERE s.class_name = c.name AND s.full_name = st.full_name
+                  )
+                ORDER BY c.name, st.sequence NULLS LAST, st.full_name
+                """
+            )
+            deactivated = [dict(row) for row in cur.fetchall()]
+
+        diff = StudentImportDiff(
+            new_classes=new_classes,
+            inserted=inserted,
+            updated=updated,
+            deactivated=deactivated,
+            unchanged=unchanged,
+        )
+        if dry_run:
+            # Tabel staging ikut dibuang saat rollback
+            cur.connection.rollback()
+            return diff
+
+        cur.execute(
+            """
+            INSERT INTO school_classes (name, academic_year)
+            SELECT DISTINCT class_name, %s FROM student_import_staging
+            ORDER BY class_name
+            ON CONFLICT (name) DO UPDATE
+                SET academic_year = EXCLUDED.academic_year,
+                    updated_at = NOW()
+            """,
+            (clean_year,),
+        )
+        assignments = ",\n                    ".join(
+            f"{column} = EXCLUDED.{column}" for column in STUDENT_IMPORT_COLUMNS
+        )
+        distinct_check = " OR ".join(
+            f"students.{column} IS DISTINCT FROM EXCLUDED.{column}" for column in STUDENT_IMPORT_COLUMNS
+        )
+        cur.execute(
+            f"""
+            INSERT INTO students (class_id, full_name, {column_list})
+            SELECT c.id, s.full_name, {", ".join(f"s.{column}" for column in STUDENT_IMPORT_COLUMNS)}
+            FROM student_import_staging s
+            JOIN school_classes c ON c.name = s.class_name
+            ON CONFLICT (class_id, full_name) DO UPDATE
+            SET {assignments},
+                active = TRUE,
+                updated_at = NOW()
+            WHERE students.active IS NOT TRUE OR {distinct_check}
+            """
+        )
+        if deactivated:
+            cur.execute(
+                """
+                UPDATE students
+                SET active = FALSE,
+                    updated_at = NOW()
+                WHERE id = ANY(%s)
+                """,
+                ([row["student_id"] for row in deactivated],),
+            )
+    diff.applied = True
+    return diff
+
+
 def fetch_student_by_id(student_id: int) -> Optional[Dict[str, Any]]:
     with get_cursor() as cur:
         cur.execute(
@@ -1022,6 +1272,111 @@ def fetch_class_month_attendance_entries(class_id: int, year: int, month: int) -
     return [dict(row) for row in rows]
 
 
+@dataclass
+class AttendanceMatrix:
+    """Absensi rentang tanggal: per kelas, per siswa satu bytearray kode status per hari.
+
+    Indeks = selisih hari dari ``start_date``; nilai 0 = belum diisi, selain itu
+    posisi status pada ``ATTENDANCE_STATUSES`` (1-based).
+    """
+
+    start_date: date
+    end_date: date
+    rows: Dict[int, Dict[int, bytearray]]
+
+    def status(self, class_id: int, student_id: int, day: date) -> Optional[str]:
+        codes = self.rows.get(class_id, {}).get(student_id)
+        offset = (day - self.start_date).days
+        if codes is None or offset < 0 or offset >= len(codes) or not codes[offset]:
+            return None
+        return ATTENDANCE_STATUSES[codes[offset] - 1]
+
+    def month_entries(self, class_id: int, year: int, month: int) -> Dict[Tuple[int, int], str]:
+        """Bentuk lama ``{(student_id, tanggal): status}`` untuk satu bulan."""
+        first = max(date(year, month, 1), self.start_date)
+        if month == 12:
+            month_end = date(year, 12, 31)
+        else:
+            month_end = date(year, month + 1, 1) - timedelta(days=1)
+        last = min(month_end, self.end_date)
+        if first > last:
+            return {}
+        lo = (first - self.start_date).days
+        hi = (last - self.start_date).days
+        entries: Dict[Tuple[int, int], str] = {}
+        for student_id, codes in self.rows.get(class_id, {}).items():
+            for offset in range(lo, hi + 1):
+                code = codes[offset]
+                if code:
+                    entries[(student_id, first.day + offset - lo)] = ATTENDANCE_STATUSES[code - 1]
+        return entries
+
+
+def fetch_attendance_matrix(
+    start_date: date,
+    end_date: date,
+    *,
+    class_ids: Optional[List[int]] = None,
+) -> AttendanceMatrix:
+    """Ambil absensi seluruh rentang tanggal (satu semester, semua/sebagian kelas)
+    dalam satu query; tiap siswa dikembalikan sebagai array offset hari + kode status."""
+    params: Dict[str, Any] = {
+        "start": start_date,
+        "end": end_date,
+        "statuses": list(ATTENDANCE_STATUSES),
+    }
+    class_filter = ""
+    if class_ids is not None:
+        class_filter = "AND class_id = ANY(%(class_ids)s)"
+        params["class_ids"] = [int(class_id) for class_id in class_ids]
+    with get_cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT
+                class_id,
+                student_id,
+                array_agg(attendance_date - %(start)s::date ORDER BY attendance_date) AS day_offsets,
+                array_agg(array_position(%(statuses)s::text[], status) ORDER BY attendance_date) AS codes
+            FROM attendance_records
+            WHERE attendance_date BETWEEN %(start)s AND %(end)s
+              {class_filter}
+            GROUP BY class_id, student_id
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+
+    total_days = (end_date - start_date).days + 1
+    matrix: Dict[int, Dict[int, bytearray]] = {}
+    for row in rows:
+        codes = bytearray(total_days)
+        for offset, code in zip(row["day_offsets"], row["codes"]):
+            codes[offset] = code or 0
+        matrix.setdefault(int(row["class_id"]), {})[int(row["student_id"])] = codes
+    return AttendanceMatrix(start_date=start_date, end_date=end_date, rows=matrix)
+
+
+def fetch_class_teacher_profiles() -> Dict[int, Dict[str, Any]]:
+    """Wali kelas (staff dengan assigned_class_id) per kelas, untuk ekspor semua kelas."""
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT DISTINCT ON (assigned_class_id)
+                assigned_class_id,
+                id,
+                full_name,
+                nip,
+                degree_prefix,
+                degree_suffix
+            FROM dashboard_users
+            WHERE role = 'staff' AND assigned_class_id IS NOT NULL
+            ORDER BY assigned_class_id, id
+            """
+        )
+        rows = cur.fetchall()
+    return {int(row["assigned_class_id"]): dict(row) for row in rows}
+
+
 def fetch_school_identity() -> Dict[str, Optional[str]]:
     """
     Ambil identitas sekolah dan kepala sekolah bila tersedia.
@@ -1200,52 +1555,33 @@ def upsert_attendance_entries(
     teacher_id: int,
     attendance_date: date,
     entries: Iterable[Dict[str, Any]],
-) -> None:
-    normalized_date = attendance_date
-    with get_cursor(commit=True) as cur:
-        for entry in entries:
-            student_id = entry.get("student_id")
-            if student_id is None:
-                raise ValueError("student_id wajib diisi untuk setiap entri absensi.")
-            try:
-                student_id_int = int(student_id)
-            except (TypeError, ValueError) as exc:
-                raise ValueError("student_id harus berupa integer.") from exc
-
-            raw_status = (entry.get("status") or DEFAULT_ATTENDANCE_STATUS).strip().lower()
-            if raw_status not in ATTENDANCE_STATUSES:
-                raise ValueError(f"Status absensi tidak dikenal: {raw_status}")
-
-            note = entry.get("note")
-
-            cur.execute(
-                """
-                INSERT INTO attendance_records (
-                    attendance_date,
-                    student_id,
-                    class_id,
-                    teacher_id,
-                    status,
-                    note
-                )
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (attendance_date, student_id)
-                DO UPDATE SET
-                    status = EXCLUDED.status,
-                    note = EXCLUDED.note,
-                    class_id = EXCLUDED.class_id,
-                    teacher_id = EXCLUDED.teacher_id,
-                    updated_at = NOW()
-                """,
-                (
-                    normalized_date,
-                    student_id_int,
-                    class_id,
-                    teacher_id,
-                    raw_status,
-                    note,
-                ),
+) -> int:
+    """Simpan absensi siswa sekaligus; entri boleh membawa ``attendance_date``
+    sendiri (koreksi massal beberapa hari dalam satu panggilan)."""
+    rows = []
+    for entry in entries:
+        student_id_int, raw_status, note = _normalize_attendance_entry(
+            entry, "student_id", "absensi"
+        )
+        rows.append(
+            (
+                entry.get("attendance_date") or attendance_date,
+                student_id_int,
+                class_id,
+                teacher_id,
+                raw_status,
+                note,
             )
+        )
+
+    with get_cursor(commit=True) as cur:
+        return _bulk_upsert_attendance(
+            cur,
+            table="attendance_records",
+            columns=("attendance_date", "student_id", "class_id", "teacher_id", "status", "note"),
+            conflict_columns=("attendance_date", "student_id"),
+            rows=rows,
+        )
 
 
 def list_extracurriculars(
@@ -1937,72 +2273,52 @@ def upsert_extracurricular_attendance_entries(
     accuracy_meters: Optional[float] = None,
     address: Optional[str] = None,
     material: Optional[str] = None,
-) -> None:
-    normalized_date = attendance_date
-    with get_cursor(commit=True) as cur:
-        for entry in entries:
-            student_id = entry.get("student_id")
-            if student_id is None:
-                raise ValueError("student_id wajib diisi untuk setiap entri absensi ekskul.")
-            try:
-                student_id_int = int(student_id)
-            except (TypeError, ValueError) as exc:
-                raise ValueError("student_id harus berupa integer.") from exc
-
-            raw_status = (entry.get("status") or DEFAULT_ATTENDANCE_STATUS).strip().lower()
-            if raw_status not in ATTENDANCE_STATUSES:
-                raise ValueError(f"Status absensi tidak dikenal: {raw_status}")
-
-            note = entry.get("note")
-
-            cur.execute(
-                """
-                INSERT INTO extracurricular_attendance_records (
-                    attendance_date,
-                    extracurricular_id,
-                    student_id,
-                    status,
-                    note,
-                    recorded_by,
-                    photo_path,
-                    captured_at,
-                    latitude,
-                    longitude,
-                    accuracy_meters,
-                    address,
-                    material
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (attendance_date, extracurricular_id, student_id)
-                DO UPDATE SET
-                    status = EXCLUDED.status,
-                    note = EXCLUDED.note,
-                    recorded_by = EXCLUDED.recorded_by,
-                    photo_path = EXCLUDED.photo_path,
-                    captured_at = EXCLUDED.captured_at,
-                    latitude = EXCLUDED.latitude,
-                    longitude = EXCLUDED.longitude,
-                    accuracy_meters = EXCLUDED.accuracy_meters,
-                    address = EXCLUDED.address,
-                    material = EXCLUDED.material,
-                    updated_at = NOW()
-                """,
-                (
-                    normalized_date,
-                    activity_id,
-                    student_id_int,
-                    raw_status,
-                    note,
-                    recorded_by,
-                    photo_path,
-                    captured_at,
-                    latitude,
-                    longitude,
-                    accuracy_meters,
-                    address,
-                    material,
-                ),
+) -> int:
+    rows = []
+    for entry in entries:
+        student_id_int, raw_status, note = _normalize_attendance_entry(
+            entry, "student_id", "absensi ekskul"
+        )
+        rows.append(
+            (
+                entry.get("attendance_date") or attendance_date,
+                activity_id,
+                student_id_int,
+                raw_status,
+                note,
+                recorded_by,
+                photo_path,
+                captured_at,
+                latitude,
+                longitude,
+                accuracy_meters,
+                address,
+                material,
             )
+        )
+
+    with get_cursor(commit=True) as cur:
+        return _bulk_upsert_attendance(
+            cur,
+            table="extracurricular_attendance_records",
+            columns=(
+                "attendance_date",
+                "extracurricular_id",
+                "student_id",
+                "status",
+                "note",
+                "recorded_by",
+                "photo_path",
+                "captured_at",
+                "latitude",
+                "longitude",
+                "accuracy_meters",
+                "address",
+                "material",
+            ),
+            conflict_columns=("attendance_date", "extracurricular_id", "student_id"),
+            rows=rows,
+        )
 
 
 def fetch_extracurricular_daily_totals(
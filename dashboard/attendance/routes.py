@@ -42,6 +42,7 @@ from .duk_degrees import resolve_degree_from_duk
 from .queries import (
     ATTENDANCE_STATUSES,
     DEFAULT_ATTENDANCE_STATUS,
+    AttendanceMatrix,
     create_school_class,
     create_student,
     deactivate_student,
@@ -49,8 +50,10 @@ from .queries import (
     fetch_active_teachers,
     fetch_all_students,
     fetch_attendance_for_date,
+    fetch_attendance_matrix,
     fetch_attendance_totals_for_date,
     fetch_class_attendance_breakdown,
+    fetch_class_teacher_profiles,
     fetch_class_submission_status_for_date,
     fetch_daily_attendance,
     fetch_master_data_overview,
@@ -104,8 +107,11 @@ from .queries import (
 )
 from ..queries import fetch_landingpage_content
 from .semester_exporter import (
-    SEMESTER_2_2025_2026_MONTHS,
+    current_semester,
     generate_semester_excel,
+    generate_semester_zip,
+    semester_date_range,
+    semester_months,
 )
 
 STATUS_LABELS: Dict[str, str] = {
@@ -866,63 +872,48 @@ def absen() -> str:
     )
 
 
-@attendance_bp.route("/absen/kelas/generate-semester-2", methods=["GET"], endpoint="generate_semester_2")
-@login_required
-@role_required("staff", "admin")
-def generate_semester_2() -> Any:
-    user = current_user()
-    if not user:
-        return redirect(url_for("auth.login"))
-
-    role = user.get("role")
-    selected_class_id: Optional[int] = None
-    teacher_class: Dict[str, Any] = {}
-    if role == "admin":
-        raw_class_id = request.args.get("class_id")
-        if raw_class_id:
-            try:
-                selected_class_id = int(raw_class_id)
-            except (TypeError, ValueError):
-                selected_class_id = None
-
-    if selected_class_id is None:
-        teacher_class = fetch_teacher_assigned_class(user["id"]) or {}
-        selected_class_id = int(teacher_class.get("assigned_class_id") or 0) or None
-    if not selected_class_id:
-        flash("Silakan pilih kelas terlebih dahulu.", "warning")
-        return redirect(url_for("attendance.kelas"))
-
-    class_detail = get_school_class(selected_class_id) or {}
-    if not class_detail:
-        flash("Kelas tidak ditemukan.", "warning")
-        return redirect(url_for("attendance.kelas"))
-    students = fetch_students_for_class(selected_class_id)
-    if not students:
-        flash("Belum ada data siswa untuk kelas ini.", "warning")
-        return redirect(url_for("attendance.kelas"))
-
-    school_identity = fetch_school_identity()
-    academic_year = (
-        class_detail.get("academic_year")
-        or school_identity.get("academic_year")
-        or "2025/2026"
-    )
-    class_label = class_detail.get("name") or teacher_class.get("class_name")
-    school_name = school_identity.get("school_name")
-
-    teacher_profile = fetch_teacher_profile(user["id"]) or {}
-    teacher_name = _compose_teacher_display_name(teacher_profile, user.get("full_name"))
-    teacher_nip = teacher_profile.get("nip")
-    headmaster_name = school_identity.get("headmaster_display_name") or _compose_teacher_display_name(
-        {
-            "degree_prefix": school_identity.get("headmaster_degree_prefix"),
-            "full_name": school_identity.get("headmaster_name"),
-            "degree_suffix": school_identity.get("headmaster_degree_suffix"),
-        },
-        None,
-    )
-    headmaster_nip = school_identity.get("headmaster_nip")
-
+def _parse_month_or_date(value: str, *, end: bool) -> date:
+    value = value.strip()
+    if len(value) == 7:  # YYYY-MM
+        year, month = (int(part) for part in value.split("-"))
+        if end:
+            return date(year, month, calendar.monthrange(year, month)[1])
+        return date(year, month, 1)
+    return date.fromisoformat(value)
+
+
+def _resolve_semester_range(
+    semester: Optional[int],
+    academic_year: Optional[str],
+) -> Tuple[date, date, str]:
+    """Rentang ekspor dari query string.
+
+    ``start``/``end`` (YYYY-MM atau YYYY-MM-DD) untuk rentang bebas, atau
+    ``semester`` + ``academic_year``; default semester yang sedang berjalan.
+    Mengembalikan (tanggal awal, tanggal akhir, label untuk nama file).
+    """
+    raw_start = (request.args.get("start") or "").strip()
+    raw_end = (request.args.get("end") or "").strip()
+    if raw_start and raw_end:
+        start_date = _parse_month_or_date(raw_start, end=False)
+        end_date = _parse_month_or_date(raw_end, end=True)
+        if end_date < start_date:
+            raise ValueError("Tanggal akhir harus setelah tanggal awal.")
+        return start_date, end_date, f"{start_date:%Y%m%d}-{end_date:%Y%m%d}"
+
+    raw_semester = request.args.get("semester")
+    if raw_semester:
+        semester = int(raw_semester)
+    academic_year = (request.args.get("academic_year") or academic_year or "").strip() or None
+    if semester is None or academic_year is None:
+        current_year, current_number = current_semester(current_jakarta_time().date())
+        academic_year = academic_year or current_year
+        semester = semester or current_number
+    start_date, end_date = semester_date_range(academic_year, semester)
+    return start_date, end_date, f"semester{semester}-{academic_year.replace('/', '-')}"
+
+
+def _semester_student_rows(students: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     student_rows: List[Dict[str, Any]] = []
     for idx, student in enumerate(students, start=1):
         seq_value = student.get("sequence")
@@ -945,47 +936,166 @@ def generate_semester_2() -> Any:
                 "gender": gender,
             }
         )
+    return student_rows
 
-    attendance_data: Dict[Tuple[int, int], Dict[Tuple[int, int], str]] = {}
-    for year, month in SEMESTER_2_2025_2026_MONTHS:
-        entries = fetch_class_month_attendance_entries(selected_class_id, year, month)
-        month_map: Dict[Tuple[int, int], str] = {}
-        for row in entries:
-            try:
-                sid = int(row.get("student_id"))
-            except (TypeError, ValueError):
-                continue
-            dt_val = row.get("attendance_date")
-            if isinstance(dt_val, date):
-                day_num = dt_val.day
-            else:
-                try:
-                    day_num = date.fromisoformat(str(dt_val)).day
-                except Exception:
-                    continue
-            status = (row.get("status") or "").strip().lower()
-            if status:
-                month_map[(sid, int(day_num))] = status
-        attendance_data[(year, month)] = month_map
+
+def _semester_excel_context(
+    *,
+    class_detail: Dict[str, Any],
+    students: List[Dict[str, Any]],
+    months: Tuple[Tuple[int, int], ...],
+    matrix: AttendanceMatrix,
+    school_identity: Dict[str, Any],
+    teacher_profile: Dict[str, Any],
+    teacher_fallback_name: Optional[str],
+) -> Dict[str, Any]:
+    """Argumen generate_semester_excel untuk satu kelas."""
+    class_id = int(class_detail["id"])
+    academic_year = (
+        class_detail.get("academic_year")
+        or school_identity.get("academic_year")
+        or "2025/2026"
+    )
+    headmaster_name = school_identity.get("headmaster_display_name") or _compose_teacher_display_name(
+        {
+            "degree_prefix": school_identity.get("headmaster_degree_prefix"),
+            "full_name": school_identity.get("headmaster_name"),
+            "degree_suffix": school_identity.get("headmaster_degree_suffix"),
+        },
+        None,
+    )
+    attendance_data = {
+        (year, month): matrix.month_entries(class_id, year, month)
+        for year, month in months
+    }
+    return dict(
+        months=months,
+        students=_semester_student_rows(students),
+        attendance_data=attendance_data,
+        school_name=school_identity.get("school_name"),
+        academic_year=academic_year,
+        class_label=class_detail.get("name"),
+        teacher_name=_compose_teacher_display_name(teacher_profile, teacher_fallback_name),
+        teacher_nip=teacher_profile.get("nip"),
+        headmaster_name=headmaster_name,
+        headmaster_nip=school_identity.get("headmaster_nip"),
+    )
+
+
+@attendance_bp.route("/absen/kelas/generate-semester", methods=["GET"], endpoint="generate_semester")
+@attendance_bp.route(
+    "/absen/kelas/generate-semester-2",
+    methods=["GET"],
+    endpoint="generate_semester_2",
+    defaults={"semester": 2, "academic_year": "2025/2026"},
+)
+@login_required
+@role_required("staff", "admin")
+def generate_semester(semester: Optional[int] = None, academic_year: Optional[str] = None) -> Any:
+    user = current_user()
+    if not user:
+        return redirect(url_for("auth.login"))
+
+    try:
+        start_date, end_date, range_label = _resolve_semester_range(semester, academic_year)
+    except ValueError as exc:
+        flash(f"Rentang semester tidak valid: {exc}", "warning")
+        return redirect(url_for("attendance.kelas"))
+    months = semester_months(start_date, end_date)
 
     template_path = Path(__file__).resolve().parent / "contoh" / "contoh format.xlsx"
     if not template_path.exists():
         flash("Template Excel belum tersedia. Hubungi admin.", "danger")
         return redirect(url_for("attendance.kelas"))
 
+    school_identity = fetch_school_identity()
+    role = user.get("role")
+    raw_class_id = request.args.get("class_id") if role == "admin" else None
+
+    # Semua kelas sekaligus (admin): satu query absensi, satu query siswa, hasil di-zip
+    if raw_class_id == "all":
+        students_by_class: Dict[int, List[Dict[str, Any]]] = {}
+        for student in fetch_all_students():
+            students_by_class.setdefault(int(student["class_id"]), []).append(student)
+        classes = [item for item in list_school_classes() if students_by_class.get(int(item["id"]))]
+        if not classes:
+            flash("Belum ada data siswa.", "warning")
+            return redirect(url_for("attendance.kelas"))
+        matrix = fetch_attendance_matrix(start_date, end_date)
+        teacher_profiles = fetch_class_teacher_profiles()
+        jobs = []
+        for class_detail in classes:
+            class_id = int(class_detail["id"])
+            entry_name = secure_filename(f"absen-{range_label}-{class_detail.get('name') or class_id}.xlsx")
+            jobs.append(
+                {
+                    "filename": entry_name or f"absen-{class_id}.xlsx",
+                    **_semester_excel_context(
+                        class_detail=class_detail,
+                        students=students_by_class[class_id],
+                        months=months,
+                        matrix=matrix,
+                        school_identity=school_identity,
+                        teacher_profile=teacher_profiles.get(class_id, {}),
+                        teacher_fallback_name=None,
+                    ),
+                }
+            )
+        try:
+            archive = generate_semester_zip(template_path, jobs)
+        except RuntimeError as exc:
+            flash(str(exc), "danger")
+            return redirect(url_for("attendance.kelas"))
+        except Exception as exc:
+            current_app.logger.exception("Gagal generate absen semester semua kelas: %s", exc)
+            flash("Gagal membuat file absen semester. Silakan coba lagi.", "danger")
+            return redirect(url_for("attendance.kelas"))
+        return send_file(
+            archive,
+            as_attachment=True,
+            download_name=f"absen-{range_label}-semua-kelas.zip",
+            mimetype="application/zip",
+        )
+
+    selected_class_id: Optional[int] = None
+    teacher_class: Dict[str, Any] = {}
+    if raw_class_id:
+        try:
+            selected_class_id = int(raw_class_id)
+        except (TypeError, ValueError):
+            selected_class_id = None
+
+    if selected_class_id is None:
+        teacher_class = fetch_teacher_assigned_class(user["id"]) or {}
+        selected_class_id = int(teacher_class.get("assigned_class_id") or 0) or None
+    if not selected_class_id:
+        flash("Silakan pilih kelas terlebih dahulu.", "warning")
+        return redirect(url_for("attendance.kelas"))
+
+    class_detail = get_school_class(selected_class_id) or {}
+    if not class_detail:
+        flash("Kelas tidak ditemukan.", "warning")
+        return redirect(url_for("attendance.kelas"))
+    students = fetch_students_for_class(selected_class_id)
+    if not students:
+        flash("Belum ada data siswa untuk kelas ini.", "warning")
+        return redirect(url_for("attendance.kelas"))
+    if not class_detail.get("name") and teacher_class.get("class_name"):
+        class_detail = {**class_detail, "name": teacher_class.get("class_name")}
+
+    matrix = fetch_attendance_matrix(start_date, end_date, class_ids=[selected_class_id])
     try:
         stream = generate_semester_excel(
             template_path,
-            months=SEMESTER_2_2025_2026_MONTHS,
-            students=student_rows,
-            attendance_data=attendance_data,
-            school_name=school_name,
-            academic_year=academic_year,
-            class_label=class_label,
-            teacher_name=teacher_name,
-            teacher_nip=teacher_nip,
-            headmaster_name=headmaster_name,
-            headmaster_nip=headmaster_nip,
+            **_semester_excel_context(
+                class_detail=class_detail,
+                students=students,
+                months=months,
+                matrix=matrix,
+                school_identity=school_identity,
+                teacher_profile=fetch_teacher_profile(user["id"]) or {},
+                teacher_fallback_name=user.get("full_name"),
+            ),
         )
     except RuntimeError as exc:
         flash(str(exc), "danger")
@@ -995,10 +1105,10 @@ def generate_semester_2() -> Any:
         flash("Gagal membuat file absen semester. Silakan coba lagi.", "danger")
         return redirect(url_for("attendance.kelas"))
 
-    safe_class = class_label or "kelas"
-    filename = secure_filename(f"absen-semester2-2025-2026-{safe_class}.xlsx")
+    safe_class = class_detail.get("name") or "kelas"
+    filename = secure_filename(f"absen-{range_label}-{safe_class}.xlsx")
     if not filename:
-        filename = "absen-semester2-2025-2026.xlsx"
+        filename = f"absen-{range_label}.xlsx"
 
     return send_file(
         stream,
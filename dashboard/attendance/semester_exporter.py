@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import calendar
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from io import BytesIO
 from pathlib import Path
@@ -11,9 +15,16 @@ from utils import INDONESIAN_MONTH_NAMES
 import re
 
 try:
-    from openpyxl import load_workbook
+    from openpyxl import Workbook as _Workbook, load_workbook
+    from openpyxl.cell.cell import Cell
+    from openpyxl.utils import get_column_letter
     from openpyxl.utils.datetime import from_excel
+    from openpyxl.worksheet.cell_range import CellRange
 except ImportError:  # pragma: no cover - handled by caller
+    _Workbook = None
+    Cell = None
+    CellRange = None
+    get_column_letter = None
     load_workbook = None
     from_excel = None
 
@@ -36,6 +47,40 @@ SEMESTER_2_2025_2026_MONTHS: Tuple[Tuple[int, int], ...] = (
     (2026, 6),
 )
 
+
+def semester_months(start_date: date, end_date: date) -> Tuple[Tuple[int, int], ...]:
+    """Daftar (tahun, bulan) yang tercakup rentang tanggal, urut."""
+    months: List[Tuple[int, int]] = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return tuple(months)
+
+
+def semester_date_range(academic_year: str, semester: int) -> Tuple[date, date]:
+    """Rentang tanggal semester: 1 = Juli-Desember tahun pertama, 2 = Januari-Juni tahun kedua.
+
+    ``academic_year`` berformat "2025/2026" (atau "2025-2026").
+    """
+    years = [int(part) for part in re.findall(r"\d{4}", academic_year or "")]
+    if not years:
+        raise ValueError(f"Tahun pelajaran tidak valid: {academic_year!r}")
+    first_year = years[0]
+    if semester == 1:
+        return date(first_year, 7, 1), date(first_year, 12, 31)
+    if semester == 2:
+        return date(first_year + 1, 1, 1), date(first_year + 1, 6, 30)
+    raise ValueError(f"Semester harus 1 atau 2, bukan {semester!r}")
+
+
+def current_semester(today: date) -> Tuple[str, int]:
+    """Tahun pelajaran & semester yang sedang berjalan pada ``today``."""
+    if today.month >= 7:
+        return f"{today.year}/{today.year + 1}", 1
+    return f"{today.year - 1}/{today.year}", 2
+
+
 DATE_START_COLUMN = 4  # Column D
 DATE_COLUMNS = 31
 
@@ -689,6 +734,541 @@ def build_semester_workbook(
     return wb
 
 
+# ---------------------------------------------------------------------------
+# Generator cepat: template diurai sekali per proses, lembar bulan ditulis
+# write-only baris demi baris tanpa load_workbook/copy_worksheet per kelas.
+# ---------------------------------------------------------------------------
+
+SEMESTER_EXPORT_WORKERS = int(os.getenv("SEMESTER_EXPORT_WORKERS", "0") or 0)
+
+Coord = Tuple[int, int]
+
+
+@dataclass
+class SemesterTemplate:
+    """Isi lembar template yang sudah diurai: nilai, style, merge, dimensi, dan posisi penanda."""
+
+    max_row: int
+    max_col: int
+    values: Dict[Coord, Any]
+    cell_styles: Dict[Coord, int]
+    styles: List[Dict[str, Any]]
+    background_style: Optional[int]
+    merged: List[Tuple[int, int, int, int]]
+    row_heights: Dict[int, float]
+    column_dimensions: Dict[str, Dict[str, Any]]
+    sheet_settings: Dict[str, Any]
+    zoom_scale: Optional[int]
+    theme: Optional[bytes]
+    header_row: int
+    date_row: int
+    date_start_col: int
+    grid_max_col: int
+    student_start_row: int
+    reserved_row: Optional[int]
+    jumlah_row: Optional[int]
+    recap_rows: Dict[str, int]
+    recap_cols: Dict[str, int]
+    bulan_cell: Optional[Coord]
+    kepsek_cell: Optional[Coord]
+    guru_cell: Optional[Coord]
+    date_weekday_style: Optional[int]
+    date_weekend_style: Optional[int]
+    student_weekday_style: Optional[int]
+    student_weekend_style: Optional[int]
+
+
+@dataclass
+class _ClassSheetLayout:
+    """Lembar satu kelas sebelum diisi data bulanan (baris sudah digeser bila siswa melebihi kapasitas)."""
+
+    content_max_row: int
+    student_end_row: int
+    values: Dict[Coord, Any]
+    cell_styles: Dict[Coord, int]
+    merged: List[Tuple[int, int, int, int]]
+    covered: frozenset
+    row_heights: Dict[int, float]
+    shift: int = 0
+    anchors: Dict[str, Optional[int]] = field(default_factory=dict)
+
+
+_TEMPLATE_CACHE: Dict[Tuple[str, float], SemesterTemplate] = {}
+
+
+def load_semester_template(template_path: Path) -> SemesterTemplate:
+    """Template terurai untuk ``template_path``; diurai ulang hanya jika file berubah."""
+    path = Path(template_path).resolve()
+    key = (str(path), path.stat().st_mtime)
+    template = _TEMPLATE_CACHE.get(key)
+    if template is None:
+        template = _parse_semester_template(path)
+        _TEMPLATE_CACHE.clear()
+        _TEMPLATE_CACHE[key] = template
+    return template
+
+
+def _parse_semester_template(template_path: Path) -> SemesterTemplate:
+    if load_workbook is None:  # pragma: no cover - handled by caller
+        raise RuntimeError("openpyxl belum terpasang.")
+
+    wb = load_workbook(template_path)
+    ws = wb.active
+
+    styles: List[Dict[str, Any]] = []
+    style_ids: Dict[Tuple[int, ...], int] = {}
+    values: Dict[Coord, Any] = {}
+    cell_styles: Dict[Coord, int] = {}
+    empty_style_counts: Dict[int, int] = {}
+    max_row = max_col = 1
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is None and not cell.has_style:
+                continue
+            coord = (int(cell.row), int(cell.column))
+            if cell.value is not None:
+                values[coord] = cell.value
+            if cell.has_style:
+                key = tuple(cell._style)
+                style_id = style_ids.get(key)
+                if style_id is None:
+                    style_id = style_ids[key] = len(styles)
+                    styles.append(_clone_style(cell))
+                cell_styles[coord] = style_id
+                if cell.value is None:
+                    empty_style_counts[style_id] = empty_style_counts.get(style_id, 0) + 1
+            max_row = max(max_row, coord[0])
+            max_col = max(max_col, coord[1])
+
+    def register(style: Optional[Dict[str, Any]]) -> Optional[int]:
+        if style is None:
+            return None
+        styles.append(style)
+        return len(styles) - 1
+
+    header_row = _find_header_row(ws)
+    date_row = header_row + 1
+    student_start_row = header_row + 2
+    date_start_col = _find_date_start_col(ws, header_row)
+    jumlah_row = _find_row_by_label(ws, "JUMLAH SISWA HADIR", start_row=student_start_row)
+    recap_title_row = _find_row_by_label(ws, "REKAPITULASI KETIDAKHADIRAN TIAP HARI", start_row=student_start_row)
+    reserved_candidates = [
+        row for row in (jumlah_row, recap_title_row, _find_nip_row(ws), _find_ket_row(ws)) if row
+    ]
+    recap_start = recap_title_row + 1 if recap_title_row else date_row
+    recap_rows = {}
+    for label, key in (("SAKIT", "sakit"), ("IZIN", "izin"), ("ALFA", "alpa")):
+        row_num = _find_row_by_label(ws, label, start_row=recap_start)
+        if row_num:
+            recap_rows[key] = row_num
+
+    kepsek_cell = None
+    kepsek_row = _find_row_by_label(ws, "KEPALA SEKOLAH", start_row=1)
+    if kepsek_row:
+        for cell in ws[kepsek_row]:
+            if isinstance(cell.value, str) and cell.value.strip().upper() == "KEPALA SEKOLAH":
+                kepsek_cell = (kepsek_row, int(cell.column))
+                break
+    guru = _find_cell(
+        ws,
+        lambda value: isinstance(value, str) and value.strip().upper().startswith("GURU KELAS"),
+        max_rows=80,
+    )
+    bulan = _find_bulan_cell(ws)
+
+    template_month_year = _parse_bulan_label(bulan.value if bulan else None)
+    date_weekday_style, date_weekend_style = _extract_weekday_weekend_styles(
+        ws,
+        wb,
+        date_row=date_row,
+        date_start_col=date_start_col,
+        reference_row=date_row,
+        template_month_year=template_month_year,
+    )
+    student_weekday_style, student_weekend_style = _extract_weekday_weekend_styles(
+        ws,
+        wb,
+        date_row=date_row,
+        date_start_col=date_start_col,
+        reference_row=student_start_row,
+        template_month_year=template_month_year,
+    )
+
+    column_dimensions = {
+        key: {
+            attr: getattr(dim, attr)
+            for attr in ("min", "max", "width", "bestFit", "hidden", "outlineLevel", "collapsed")
+        }
+        for key, dim in ws.column_dimensions.items()
+    }
+    return SemesterTemplate(
+        max_row=max_row,
+        max_col=max_col,
+        values=values,
+        cell_styles=cell_styles,
+        styles=styles,
+        # Style sel kosong yang paling sering (mis. font seluruh lembar) dipasang di level
+        # kolom, sehingga ribuan sel kosong di bawah tabel tidak perlu ditulis satu per satu.
+        background_style=max(empty_style_counts, key=empty_style_counts.get) if empty_style_counts else None,
+        merged=[
+            (rng.min_row, rng.min_col, rng.max_row, rng.max_col)
+            for rng in ws.merged_cells.ranges
+        ],
+        row_heights={
+            int(row): dim.height for row, dim in ws.row_dimensions.items() if dim.height is not None
+        },
+        column_dimensions=column_dimensions,
+        sheet_settings={
+            "sheet_format": copy(ws.sheet_format),
+            "sheet_properties": copy(ws.sheet_properties),
+            "page_margins": copy(ws.page_margins),
+            "page_setup": copy(ws.page_setup),
+            "print_options": copy(ws.print_options),
+        },
+        zoom_scale=ws.sheet_view.zoomScale,
+        theme=wb.loaded_theme,
+        header_row=header_row,
+        date_row=date_row,
+        date_start_col=date_start_col,
+        grid_max_col=_find_max_col(ws, date_row),
+        student_start_row=student_start_row,
+        reserved_row=min(reserved_candidates) if reserved_candidates else None,
+        jumlah_row=jumlah_row,
+        recap_rows=recap_rows,
+        recap_cols=_find_recap_columns(ws, date_row),
+        bulan_cell=(int(bulan.row), int(bulan.column)) if bulan else None,
+        kepsek_cell=kepsek_cell,
+        guru_cell=(int(guru.row), int(guru.column)) if guru else None,
+        date_weekday_style=register(date_weekday_style),
+        date_weekend_style=register(date_weekend_style),
+        student_weekday_style=register(student_weekday_style),
+        student_weekend_style=register(student_weekend_style),
+    )
+
+
+def _layout_class_sheet(
+    template: SemesterTemplate,
+    *,
+    students: List[Dict[str, Any]],
+    school_name: Optional[str],
+    academic_year: Optional[str],
+    class_label: Optional[str],
+    teacher_name: Optional[str],
+    teacher_nip: Optional[str],
+    headmaster_name: Optional[str],
+    headmaster_nip: Optional[str],
+) -> _ClassSheetLayout:
+    """Padanan ``_apply_static_context`` di atas data template terurai."""
+    start_row = template.student_start_row
+    reserved_row = template.reserved_row
+    extra_rows = 0
+    if reserved_row:
+        student_end_row = reserved_row - 1
+        capacity = student_end_row - start_row + 1
+        if len(students) > capacity:
+            extra_rows = len(students) - capacity
+            student_end_row += extra_rows
+    else:
+        student_end_row = start_row + max(len(students), 40) - 1
+
+    def shifted(row: int) -> int:
+        return row + extra_rows if extra_rows and row >= reserved_row else row
+
+    values = {(shifted(row), col): value for (row, col), value in template.values.items()}
+    cell_styles = {(shifted(row), col): style for (row, col), style in template.cell_styles.items()}
+    row_heights = {shifted(row): height for row, height in template.row_heights.items()}
+    merged = [
+        (shifted(min_row), min_col, shifted(max_row), max_col)
+        for min_row, min_col, max_row, max_col in template.merged
+    ]
+    if extra_rows:
+        # Baris sisipan meniru style baris siswa pertama (seperti _copy_row_style)
+        for row in range(reserved_row, reserved_row + extra_rows):
+            for col in range(1, template.grid_max_col + 1):
+                style = template.cell_styles.get((start_row, col))
+                if style is not None:
+                    cell_styles[(row, col)] = style
+            if start_row in template.row_heights:
+                row_heights[row] = template.row_heights[start_row]
+
+    for coord in [
+        coord for coord in values
+        if start_row <= coord[0] <= student_end_row and coord[1] <= template.grid_max_col
+    ]:
+        del values[coord]
+
+    if school_name:
+        values[(2, 1)] = school_name
+    academic_label = _format_academic_year(academic_year)
+    if academic_label:
+        values[(3, 1)] = f"TAHUN PELAJARAN {academic_label}"
+    class_value = _format_class_label(class_label)
+    if class_value:
+        values[(5, 2)] = class_value
+
+    for idx, student in enumerate(students, start=1):
+        row = start_row + idx - 1
+        values[(row, 1)] = student.get("no", idx)
+        values[(row, 2)] = student.get("name")
+        values[(row, 3)] = student.get("gender")
+
+    if template.kepsek_cell:
+        row, col = shifted(template.kepsek_cell[0]), template.kepsek_cell[1]
+        if headmaster_name:
+            values[(row + 5, col)] = headmaster_name
+        values[(row + 6, col)] = f"NIP. {headmaster_nip}" if headmaster_nip else "NIP."
+    if template.guru_cell:
+        row, col = shifted(template.guru_cell[0]), template.guru_cell[1]
+        if class_label:
+            values[(row, col)] = f"Guru Kelas {class_label}"
+        if teacher_name:
+            values[(row + 5, col)] = teacher_name
+        values[(row + 6, col)] = f"NIP. {teacher_nip}" if teacher_nip else "NIP."
+
+    covered = frozenset(
+        (row, col)
+        for min_row, min_col, max_row, max_col in merged
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+        if (row, col) != (min_row, min_col)
+    )
+    background = template.background_style
+    content_rows = [row for row, _ in values]
+    content_rows.extend(row for (row, _), style in cell_styles.items() if style != background)
+    content_rows.extend(row_heights)
+    return _ClassSheetLayout(
+        content_max_row=max([student_end_row, *content_rows]),
+        student_end_row=student_end_row,
+        values=values,
+        cell_styles=cell_styles,
+        merged=merged,
+        covered=covered,
+        row_heights=row_heights,
+        shift=extra_rows,
+        anchors={
+            "jumlah_row": shifted(template.jumlah_row) if template.jumlah_row else None,
+            **{key: shifted(row) for key, row in template.recap_rows.items()},
+        },
+    )
+
+
+def _month_sheet_cells(
+    template: SemesterTemplate,
+    layout: _ClassSheetLayout,
+    *,
+    students: List[Dict[str, Any]],
+    month_entries: Dict[Tuple[int, int], str],
+    year: int,
+    month: int,
+) -> Tuple[Dict[Coord, Any], Dict[Coord, int]]:
+    """Nilai & style satu lembar bulan; padanan _apply_month_context s.d. _apply_attendance_data."""
+    values = dict(layout.values)
+    cell_styles = dict(layout.cell_styles)
+    covered = layout.covered
+    date_row = template.date_row
+    date_start_col = template.date_start_col
+    student_start_row = template.student_start_row
+    days_in_month = calendar.monthrange(year, month)[1]
+    total_col = date_start_col + DATE_COLUMNS
+
+    for day in range(1, DATE_COLUMNS + 1):
+        coord = (date_row, date_start_col + day - 1)
+        if day <= days_in_month:
+            values[coord] = date(year, month, day)
+        else:
+            values.pop(coord, None)
+    if template.bulan_cell:
+        month_label = INDONESIAN_MONTH_NAMES.get(month, str(month))
+        values[template.bulan_cell] = f"Bulan : {month_label} {year}"
+
+    # Grid siswa & kolom rekap sudah kosong dari _layout_class_sheet; tinggal baris ringkasan.
+    summary_rows = [layout.anchors.get(key) for key in ("jumlah_row", "sakit", "izin", "alpa")]
+    for row in summary_rows:
+        if not row:
+            continue
+        for col in range(date_start_col, total_col + 1):
+            values.pop((row, col), None)
+
+    # Urutan style sengaja sama dengan _apply_weekend_styles agar hasil identik.
+    for day in range(1, days_in_month + 1):
+        col = date_start_col + day - 1
+        is_weekend = date(year, month, day).weekday() >= 5
+        header_style = template.date_weekday_style if is_weekend else template.date_weekend_style
+        if header_style is not None and (date_row, col) not in covered:
+            cell_styles[(date_row, col)] = header_style
+        row_style = template.student_weekday_style if is_weekend else template.student_weekend_style
+        if row_style is not None:
+            for row in range(student_start_row, layout.student_end_row + 1):
+                if (row, col) not in covered:
+                    cell_styles[(row, col)] = row_style
+
+    if not month_entries:
+        return values, cell_styles
+
+    recap_cols = template.recap_cols
+    symbol_map = {"masuk": "✓", "sakit": "S", "izin": "I", "alpa": "A"}
+    effective_days = len({day for (_, day) in month_entries})
+    daily_counts = {day: {"masuk": 0, "sakit": 0, "izin": 0, "alpa": 0} for day in range(1, days_in_month + 1)}
+
+    for idx, student in enumerate(students):
+        row = student_start_row + idx
+        student_id = int(student.get("id"))
+        totals = {"masuk": 0, "sakit": 0, "izin": 0, "alpa": 0}
+        has_any = False
+        for day in range(1, days_in_month + 1):
+            status = month_entries.get((student_id, day))
+            if not status:
+                continue
+            normalized = status.strip().lower()
+            symbol = symbol_map.get(normalized)
+            if symbol and (row, date_start_col + day - 1) not in covered:
+                values[(row, date_start_col + day - 1)] = symbol
+            if normalized in totals:
+                totals[normalized] += 1
+                daily_counts[day][normalized] += 1
+                has_any = True
+        if not has_any:
+            continue
+
+        hadir = totals["masuk"]
+        present_percent = round((hadir / effective_days) * 100) if effective_days else 0
+        for label, value in (
+            ("HADIR", hadir),
+            ("SAKIT", totals["sakit"]),
+            ("IZIN", totals["izin"]),
+            ("ALFA", totals["alpa"]),
+            ("%", present_percent / 100),
+        ):
+            if label in recap_cols:
+                values[(row, recap_cols[label])] = value
+
+    for anchor, key in (("jumlah_row", "masuk"), ("sakit", "sakit"), ("izin", "izin"), ("alpa", "alpa")):
+        row = layout.anchors.get(anchor)
+        if not row:
+            continue
+        for day in range(1, days_in_month + 1):
+            values[(row, date_start_col + day - 1)] = daily_counts[day][key]
+        values[(row, total_col)] = sum(daily_counts[day][key] for day in range(1, days_in_month + 1))
+
+    return values, cell_styles
+
+
+def _write_month_sheet(
+    wb: "Workbook",
+    template: SemesterTemplate,
+    layout: _ClassSheetLayout,
+    style_arrays: Dict[int, Any],
+    *,
+    title: str,
+    values: Dict[Coord, Any],
+    cell_styles: Dict[Coord, int],
+) -> None:
+    ws = wb.create_sheet(title)
+    for attr, setting in template.sheet_settings.items():
+        setattr(ws, attr, copy(setting))
+    if template.zoom_scale:
+        ws.sheet_view.zoomScale = template.zoom_scale
+    background = template.background_style
+    covered_cols = set()
+    for key, attrs in template.column_dimensions.items():
+        dim = ws.column_dimensions[key]
+        for attr, value in attrs.items():
+            setattr(dim, attr, value)
+        covered_cols.update(range(dim.min or 1, (dim.max or dim.min or 1) + 1))
+    if background is not None:
+        for col in range(1, template.max_col + 1):
+            if col not in covered_cols:
+                ws.column_dimensions[get_column_letter(col)].width = 0
+        for dim in ws.column_dimensions.values():
+            _apply_style(dim, template.styles[background])
+    for row, height in layout.row_heights.items():
+        ws.row_dimensions[row].height = height
+    for min_row, min_col, max_row, max_col in layout.merged:
+        ws.merged_cells.add(
+            CellRange(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col)
+        )
+
+    for row in range(1, layout.content_max_row + 1):
+        cells: List[Any] = []
+        for col in range(1, template.max_col + 1):
+            value = values.get((row, col))
+            style_id = cell_styles.get((row, col))
+            if style_id is None or (value is None and style_id == background):
+                cells.append(value)
+                continue
+            style_array = style_arrays.get(style_id)
+            if style_array is None:
+                # Style template didaftarkan ke workbook tujuan sekali saja, selanjutnya disalin.
+                probe = Cell(ws)
+                _apply_style(probe, template.styles[style_id])
+                style_array = style_arrays[style_id] = probe._style
+            if (row, col) in layout.covered:
+                value = None
+            cells.append(Cell(ws, row=row, column=col, value=value, style_array=style_array))
+        ws.append(cells)
+
+
+def write_semester_workbook(
+    template_path: Path,
+    *,
+    months: Iterable[Tuple[int, int]],
+    students: List[Dict[str, Any]],
+    attendance_data: Dict[Tuple[int, int], Dict[Tuple[int, int], str]],
+    school_name: Optional[str],
+    academic_year: Optional[str],
+    class_label: Optional[str],
+    teacher_name: Optional[str],
+    teacher_nip: Optional[str],
+    headmaster_name: Optional[str],
+    headmaster_nip: Optional[str],
+) -> BytesIO:
+    """Versi write-only ``build_semester_workbook``: hasil sama, tanpa menyalin worksheet per bulan."""
+    if _Workbook is None:  # pragma: no cover - handled by caller
+        raise RuntimeError("openpyxl belum terpasang.")
+
+    template = load_semester_template(template_path)
+    layout = _layout_class_sheet(
+        template,
+        students=students,
+        school_name=school_name,
+        academic_year=academic_year,
+        class_label=class_label,
+        teacher_name=teacher_name,
+        teacher_nip=teacher_nip,
+        headmaster_name=headmaster_name,
+        headmaster_nip=headmaster_nip,
+    )
+
+    wb = _Workbook(write_only=True)
+    if template.theme:
+        wb.loaded_theme = template.theme
+    style_arrays: Dict[int, Any] = {}
+    for year, month in months:
+        values, cell_styles = _month_sheet_cells(
+            template,
+            layout,
+            students=students,
+            month_entries=attendance_data.get((year, month), {}),
+            year=year,
+            month=month,
+        )
+        month_label = INDONESIAN_MONTH_NAMES.get(month, str(month))
+        _write_month_sheet(
+            wb,
+            template,
+            layout,
+            style_arrays,
+            title=f"{month_label} {year}",
+            values=values,
+            cell_styles=cell_styles,
+        )
+
+    stream = BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    return stream
+
+
 def generate_semester_excel(
     template_path: Path,
     *,
@@ -702,9 +1282,9 @@ def generate_semester_excel(
     teacher_nip: Optional[str],
     headmaster_name: Optional[str],
     headmaster_nip: Optional[str],
+    write_only: bool = True,
 ) -> BytesIO:
-    wb = build_semester_workbook(
-        template_path,
+    context = dict(
         months=months,
         students=students,
         attendance_data=attendance_data,
@@ -716,7 +1296,50 @@ def generate_semester_excel(
         headmaster_name=headmaster_name,
         headmaster_nip=headmaster_nip,
     )
+    if write_only:
+        return write_semester_workbook(template_path, **context)
+
+    wb = build_semester_workbook(template_path, **context)
     stream = BytesIO()
     wb.save(stream)
     stream.seek(0)
     return stream
+
+
+def _render_semester_job(job: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Dijalankan di proses worker: satu kelas -> (nama file, isi xlsx)."""
+    job = dict(job)
+    filename = job.pop("filename")
+    template_path = Path(job.pop("template_path"))
+    return filename, generate_semester_excel(template_path, **job).getvalue()
+
+
+def generate_semester_zip(
+    template_path: Path,
+    jobs: List[Dict[str, Any]],
+    *,
+    workers: Optional[int] = None,
+) -> BytesIO:
+    """Workbook semester banyak kelas sekaligus, dibuat paralel lalu digabung dalam satu zip.
+
+    Tiap item ``jobs`` berisi ``filename`` plus argumen ``generate_semester_excel``.
+    Jumlah proses dari ``workers``, ``SEMESTER_EXPORT_WORKERS``, atau min(4, jumlah CPU).
+    """
+    payloads = [{**job, "template_path": str(template_path)} for job in jobs]
+    if workers is None:
+        workers = SEMESTER_EXPORT_WORKERS or min(4, os.cpu_count() or 1)
+    workers = max(1, min(workers, len(payloads)))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_semester_job, payloads))
+    else:
+        results = [_render_semester_job(payload) for payload in payloads]
+
+    archive = BytesIO()
+    # xlsx sudah terkompresi; disimpan apa adanya agar tidak membuang CPU
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for filename, content in results:
+            bundle.writestr(filename, content)
+    archive.seek(0)
+    return archive
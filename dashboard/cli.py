@@ -5,9 +5,11 @@ import sys
 from werkzeug.security import generate_password_hash
 
 from .queries import create_dashboard_user, get_user_by_email, upsert_dashboard_user
-from .schema import ensure_dashboard_schema
+from .db_access import get_cursor
+from .schema import ensure_dashboard_schema, recount_book_counters
 from .attendance.importer import import_attendance_from_excel
 from .attendance.teacher_importer import load_teacher_rows
+from .library.catalog_loader import import_catalog
 
 
 def _handle_create_user(args: argparse.Namespace) -> None:
@@ -33,7 +35,12 @@ def _handle_init_db(_args: argparse.Namespace) -> None:
 
 def _handle_import_attendance(args: argparse.Namespace) -> None:
     ensure_dashboard_schema()
-    import_attendance_from_excel(args.file, academic_year=args.academic_year)
+    import_attendance_from_excel(
+        args.file,
+        academic_year=args.academic_year,
+        dry_run=args.dry_run,
+        deactivate_missing=not args.keep_missing,
+    )
 
 
 def _handle_import_teachers(args: argparse.Namespace) -> None:
@@ -75,6 +82,34 @@ def _handle_import_teachers(args: argparse.Namespace) -> None:
     print(f"Import staff selesai. Ditambahkan: {inserted}, diperbarui: {updated}, dilewati: {skipped}.")
 
 
+def _handle_import_books(args: argparse.Namespace) -> None:
+    ensure_dashboard_schema()
+    result = import_catalog(
+        [(path, None) for path in args.files],
+        location_prefix=args.location_prefix,
+        dry_run=args.dry_run,
+        log=print,
+    )
+    if not result["books"]:
+        print("Tidak ada judul buku yang ditemukan pada file tersebut.")
+        return
+    summary = (
+        f"{result['books']} judul, {result['items']} item, "
+        f"kode {result['first_code']}-{result['last_code']}"
+    )
+    if args.dry_run:
+        print(f"Dry run: {summary}. Database tidak diubah.")
+    else:
+        print(f"Import buku selesai: {summary}.")
+
+
+def _handle_recount_books(_args: argparse.Namespace) -> None:
+    ensure_dashboard_schema()
+    with get_cursor(commit=True) as cur:
+        fixed = recount_book_counters(cur)
+    print(f"Counter stok buku disinkronkan ({fixed} buku dikoreksi).")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Dashboard management CLI")
     subparsers = parser.add_subparsers(dest="command")
@@ -95,11 +130,34 @@ def main() -> None:
     import_cmd = subparsers.add_parser("import-attendance", help="Import student master data from Excel")
     import_cmd.add_argument("file", help="Path to Excel workbook")
     import_cmd.add_argument("--academic-year", help="Override academic year label (auto-detected when tersedia)")
+    import_cmd.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Tampilkan siswa yang akan ditambah/diperbarui/dinonaktifkan tanpa mengubah database",
+    )
+    import_cmd.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="Jangan nonaktifkan siswa yang tidak ada lagi di sheet kelasnya",
+    )
 
     teacher_cmd = subparsers.add_parser("import-teachers", help="Import staff users from Excel")
     teacher_cmd.add_argument("file", help="Path to Excel workbook")
     teacher_cmd.add_argument("--password", help='Password default untuk semua staff (default: "tes")', default="tes")
 
+    books_cmd = subparsers.add_parser("import-books", help="Import katalog buku perpustakaan dari Excel")
+    books_cmd.add_argument("files", nargs="+", help="Workbook katalog (satu sheet per rak)")
+    books_cmd.add_argument(
+        "--location-prefix",
+        help='Prefix lokasi, mis. "Perpus Atas" (default: ditebak dari nama file)',
+    )
+    books_cmd.add_argument("--dry-run", action="store_true", help="Baca dan hitung tanpa menyimpan")
+
+    subparsers.add_parser(
+        "recount-books",
+        help="Hitung ulang counter stok buku (setelah data buku/item diubah langsung lewat SQL)",
+    )
+
     args = parser.parse_args()
 
     if args.command == "create-user":
@@ -110,6 +168,10 @@ def main() -> None:
         _handle_import_attendance(args)
     elif args.command == "import-teachers":
         _handle_import_teachers(args)
+    elif args.command == "import-books":
+        _handle_import_books(args)
+    elif args.command == "recount-books":
+        _handle_recount_books(args)
     else:
         parser.print_help()
         sys.exit(0)
@@ -36,7 +36,8 @@ conn_kwargs = dict(
 if optional_sslmode:
     conn_kwargs["sslmode"] = optional_sslmode
 
-_POOL: pool.SimpleConnectionPool = pool.SimpleConnectionPool(
+# Thread-safe pool: gthread workers and SSE streams borrow connections concurrently
+_POOL: pool.ThreadedConnectionPool = pool.ThreadedConnectionPool(
     minconn=1,
     maxconn=int(os.getenv("DASHBOARD_DB_MAX_CONN", "8")),
     **conn_kwargs,
@@ -0,0 +1,220 @@
+"""Listener NOTIFY kotak masuk laporan dan hub Server-Sent Events per proses worker."""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import select
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import psycopg2
+from psycopg2 import extensions
+
+from inbox_notify import INBOX_NOTIFY_CHANNEL, INBOX_REPORT_KINDS
+
+from .db_access import conn_kwargs
+from .queries import fetch_report_rows, invalidate_inbox_counters
+
+# Satu koneksi SSE menahan satu thread gthread selama terbuka, jadi jumlahnya dibatasi per
+# worker dan umurnya dibatasi; browser otomatis menyambung ulang setelah `retry`.
+INBOX_STREAM_MAX_CLIENTS = int(os.getenv("DASHBOARD_INBOX_STREAM_CLIENTS", "4"))
+INBOX_STREAM_SECONDS = float(os.getenv("DASHBOARD_INBOX_STREAM_SECONDS", "300"))
+# Heartbeat pendek: koneksi yang sudah ditutup browser baru ketahuan saat server menulis.
+INBOX_STREAM_HEARTBEAT_SECONDS = 10.0
+INBOX_STREAM_RETRY_MS = 3000
+# Klien yang tidak kebagian slot cukup menerima satu snapshot lalu mencoba lagi nanti.
+INBOX_STREAM_BUSY_RETRY_MS = 60000
+
+_SUBSCRIBERS: Set["queue.Queue[Dict[str, Any]]"] = set()
+_SUBSCRIBERS_LOCK = threading.Lock()
+_STREAM_SLOTS = threading.BoundedSemaphore(max(1, INBOX_STREAM_MAX_CLIENTS))
+_LISTENER: Optional[threading.Thread] = None
+_LISTENER_LOCK = threading.Lock()
+
+
+def publish_inbox_event(event: Dict[str, Any]) -> None:
+    """Teruskan event ke semua stream yang terbuka di proses ini."""
+    with _SUBSCRIBERS_LOCK:
+        subscribers = list(_SUBSCRIBERS)
+    for events in subscribers:
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            # Stream yang tertinggal dikosongkan; halaman diminta mengambil ulang baris barunya.
+            _drain(events)
+            try:
+                events.put_nowait({"event": "resync"})
+            except queue.Full:
+                pass
+
+
+def _drain(events: "queue.Queue[Dict[str, Any]]") -> List[Dict[str, Any]]:
+    drained = []
+    while True:
+        try:
+            drained.append(events.get_nowait())
+        except queue.Empty:
+            return drained
+
+
+def _handle_notify(payload: Optional[str]) -> None:
+    try:
+        event = json.loads(payload or "{}")
+    except ValueError:
+        event = {}
+    if not isinstance(event, dict):
+        event = {}
+    invalidate_inbox_counters()
+    if event.get("event") == "created" and event.get("kind") in INBOX_REPORT_KINDS and event.get("id"):
+        # Ambil baris sekali per worker; tiap stream cukup menyaring dan merender
+        try:
+            rows = fetch_report_rows(event["kind"], report_id=int(event["id"]))
+        except Exception:
+            rows = []
+        if rows:
+            event["record"] = rows[0]
+        else:
+            event = {"event": "resync"}
+    publish_inbox_event(event)
+
+
+def _listener_loop() -> None:
+    """LISTEN perubahan laporan dari bot maupun worker dashboard lain."""
+    backoff = 1.0
+    reconnecting = False
+    while True:
+        listen_conn = None
+        try:
+            listen_conn = psycopg2.connect(**conn_kwargs)
+            listen_conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with listen_conn.cursor() as cur:
+                cur.execute(f"LISTEN {INBOX_NOTIFY_CHANNEL}")
+            # Notifikasi yang lewat selama reconnect tidak bisa diulang; anggap semua berubah.
+            invalidate_inbox_counters()
+            if reconnecting:
+                publish_inbox_event({"event": "resync"})
+            reconnecting = True
+            backoff = 1.0
+            while True:
+                if select.select([listen_conn], [], [], 60) == ([], [], []):
+                    continue
+                listen_conn.poll()
+                while listen_conn.notifies:
+                    notify = listen_conn.notifies.pop(0)
+                    _handle_notify(notify.payload)
+        except Exception:
+            invalidate_inbox_counters()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+        finally:
+            if listen_conn is not None:
+                try:
+                    listen_conn.close()
+                except Exception:
+                    pass
+
+
+def ensure_inbox_listener() -> None:
+    global _LISTENER
+    if _LISTENER is not None and _LISTENER.is_alive():
+        return
+    with _LISTENER_LOCK:
+        if _LISTENER is not None and _LISTENER.is_alive():
+            return
+        _LISTENER = threading.Thread(
+            target=_listener_loop,
+            name="aska-inbox-listener",
+            daemon=True,
+        )
+        _LISTENER.start()
+
+
+@contextmanager
+def subscribe_inbox(maxsize: int = 32) -> Iterator["queue.Queue[Dict[str, Any]]"]:
+    events: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+    with _SUBSCRIBERS_LOCK:
+        _SUBSCRIBERS.add(events)
+    try:
+        yield events
+    finally:
+        with _SUBSCRIBERS_LOCK:
+            _SUBSCRIBERS.discard(events)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+def _report_frames(
+    batch: List[Dict[str, Any]],
+    render_report: Optional[Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]],
+) -> Iterator[str]:
+    reports = []
+    resync = False
+    for event in batch:
+        if event.get("event") == "resync":
+            resync = True
+        elif render_report is not None and event.get("record"):
+            payload = render_report(event["kind"], event["record"])
+            if payload is not None:
+                reports.append(payload)
+    # Laporan kritis dikirim lebih dulu dalam satu batch
+    reports.sort(key=lambda payload: not payload.get("critical"))
+    for payload in reports:
+        yield _sse("report", payload)
+    if resync:
+        yield _sse("resync", {})
+
+
+def iter_inbox_stream(
+    fetch_counters: Callable[[], Dict[str, Any]],
+    render_report: Optional[Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+) -> Iterator[str]:
+    """
+    Hasilkan frame SSE: snapshot `counters` di awal lalu setiap kali ada NOTIFY yang
+    mengubah angka, dengan komentar heartbeat supaya proxy tidak memutus koneksi.
+    Laporan baru dikirim sebagai event `report` lewat `render_report(kind, record)`,
+    yang mengembalikan None untuk baris yang tidak boleh dilihat sesi ini.
+    """
+    if not _STREAM_SLOTS.acquire(blocking=False):
+        yield f"retry: {INBOX_STREAM_BUSY_RETRY_MS}\n\n"
+        yield _sse("counters", fetch_counters())
+        return
+    try:
+        ensure_inbox_listener()
+        with subscribe_inbox() as events:
+            yield f"retry: {INBOX_STREAM_RETRY_MS}\n\n"
+            last = fetch_counters()
+            yield _sse("counters", last)
+            deadline = time.monotonic() + INBOX_STREAM_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    first = events.get(timeout=min(INBOX_STREAM_HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                # Gabungkan event yang datang beruntun menjadi satu pembacaan counter
+                yield from _report_frames([first, *_drain(events)], render_report)
+                counters = fetch_counters()
+                if counters != last:
+                    last = counters
+                    yield _sse("counters", counters)
+    finally:
+        _STREAM_SLOTS.release()
+
+
+__all__ = [
+    "INBOX_STREAM_MAX_CLIENTS",
+    "INBOX_STREAM_SECONDS",
+    "ensure_inbox_listener",
+    "iter_inbox_stream",
+    "publish_inbox_event",
+    "subscribe_inbox",
+]
@@ -0,0 +1,205 @@
+"""Bulk loader for library catalogue workbooks (one sheet per shelf, tables side by side)."""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:  # pragma: no cover - optional dependency
+    from openpyxl import load_workbook
+except ImportError:  # pragma: no cover - handled at runtime
+    load_workbook = None
+
+TITLE_KEYWORDS = ("judul", "nama buku")
+YEAR_KEYWORDS = ("tahun",)
+PUBLISHER_KEYWORDS = ("penerbit",)
+STOCK_KEYWORDS = ("jumlah",)
+HEADER_SEARCH_ROWS = 20
+
+
+@dataclass
+class CatalogBook:
+    title: str
+    publisher: str
+    year: Optional[int]
+    stock: int
+    location: str
+    sheet: str
+
+    def as_row(self) -> Tuple[str, str, str, Optional[int], int, str]:
+        # (title, author, publisher, year, stock, location) for bulk_add_books; author is not in the sheets
+        return (self.title, "", self.publisher, self.year, self.stock, self.location)
+
+
+def clean_sheet_name(sheet_name: str) -> str:
+    # Normalize "RAK1" to "Rak 1"
+    match = re.match(r"([a-zA-Z]+)(\d+)", sheet_name)
+    if match:
+        return f"{match.group(1).capitalize()} {match.group(2)}"
+    return sheet_name.capitalize()
+
+
+def location_prefix_for(filename: str) -> str:
+    name = os.path.splitext(os.path.basename(filename))[0]
+    lowered = name.lower()
+    if "atas" in lowered:
+        return "Perpus Atas"
+    if "bawah" in lowered:
+        return "Perpus Bawah"
+    return name
+
+
+def _matches(value: Any, keywords: Sequence[str]) -> bool:
+    if value is None:
+        return False
+    text = str(value).lower()
+    return any(keyword in text for keyword in keywords)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _table_columns(header: Sequence[Any]) -> List[Dict[str, Optional[int]]]:
+    """
+    Every title column in the header row starts a table; the other columns of that
+    table are searched between it and the next title column.
+    """
+    title_positions = [idx for idx, value in enumerate(header) if _matches(value, TITLE_KEYWORDS)]
+    tables = []
+    for pos, title_idx in enumerate(title_positions):
+        end = title_positions[pos + 1] if pos + 1 < len(title_positions) else len(header)
+
+        def find(keywords: Sequence[str]) -> Optional[int]:
+            for idx in range(title_idx + 1, end):
+                if _matches(header[idx], keywords):
+                    return idx
+            return None
+
+        tables.append(
+            {
+                "title": title_idx,
+                "year": find(YEAR_KEYWORDS),
+                "publisher": find(PUBLISHER_KEYWORDS),
+                "stock": find(STOCK_KEYWORDS),
+            }
+        )
+    return tables
+
+
+def _cell(row: Sequence[Any], idx: Optional[int]) -> Any:
+    if idx is None or idx >= len(row):
+        return None
+    return row[idx]
+
+
+def read_catalog_sheet(rows: Iterable[Sequence[Any]], *, sheet: str, location: str) -> List[CatalogBook]:
+    """Parse one sheet in a single pass; returns [] when no header row is found."""
+    iterator = iter(rows)
+    header: Optional[Sequence[Any]] = None
+    for _ in range(HEADER_SEARCH_ROWS):
+        row = next(iterator, None)
+        if row is None:
+            break
+        if any(_matches(value, TITLE_KEYWORDS) for value in row):
+            header = row
+            break
+    if header is None:
+        return []
+
+    tables = _table_columns(header)
+    per_table: List[List[CatalogBook]] = [[] for _ in tables]
+    for row in iterator:
+        for books, columns in zip(per_table, tables):
+            title = _cell(row, columns["title"])
+            if title is None or str(title).strip() == "":
+                continue
+            publisher = _cell(row, columns["publisher"])
+            year = _cell(row, columns["year"])
+            if _matches(title, TITLE_KEYWORDS) and (
+                _matches(publisher, PUBLISHER_KEYWORDS) or _matches(year, YEAR_KEYWORDS)
+            ):
+                continue  # header repeated further down the sheet
+            stock = _to_int(_cell(row, columns["stock"]))
+            books.append(
+                CatalogBook(
+                    title=str(title).strip(),
+                    publisher=str(publisher).strip() if publisher is not None else "",
+                    year=_to_int(year),
+                    stock=1 if stock is None else stock,
+                    location=location,
+                    sheet=sheet,
+                )
+            )
+    # Keep table order (left table first, then the next one) like the shelf list on paper
+    return [book for books in per_table for book in books]
+
+
+def read_catalog_workbook(
+    source: Union[str, IO[bytes]],
+    *,
+    location_prefix: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Iterator[Tuple[str, List[CatalogBook]]]:
+    """Yield (sheet name, books) for every sheet of a catalogue workbook."""
+    if load_workbook is None:
+        raise RuntimeError("openpyxl belum terpasang; jalankan pip install openpyxl.")
+    name = filename or (source if isinstance(source, str) else "katalog.xlsx")
+    prefix = location_prefix or location_prefix_for(name)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            location = f"{prefix} - {clean_sheet_name(worksheet.title)}"
+            books = read_catalog_sheet(
+                worksheet.iter_rows(values_only=True),
+                sheet=worksheet.title,
+                location=location,
+            )
+            yield worksheet.title, books
+    finally:
+        workbook.close()
+
+
+def import_catalog(
+    sources: Iterable[Tuple[Union[str, IO[bytes]], Optional[str]]],
+    *,
+    location_prefix: Optional[str] = None,
+    dry_run: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Parse every (source, filename) workbook, then insert all books in one transaction.
+    ``log`` receives progress lines (per sheet while reading, per batch while inserting).
+    """
+    from .queries import bulk_add_books  # Lazy import so parsing works without a DB
+
+    report = log or (lambda _message: None)
+    books: List[CatalogBook] = []
+    sheets: List[Dict[str, Any]] = []
+    for source, filename in sources:
+        label = filename or (source if isinstance(source, str) else "workbook")
+        for sheet, sheet_books in read_catalog_workbook(
+            source, location_prefix=location_prefix, filename=filename
+        ):
+            sheets.append({"file": os.path.basename(str(label)), "sheet": sheet, "books": len(sheet_books)})
+            if sheet_books:
+                report(f"  {os.path.basename(str(label))} / {sheet}: {len(sheet_books)} judul")
+            else:
+                report(f"  {os.path.basename(str(label))} / {sheet}: header tidak ditemukan, dilewati")
+            books.extend(sheet_books)
+
+    result = bulk_add_books(
+        (book.as_row() for book in books),
+        progress=lambda done, total: report(f"  disimpan {done}/{total} judul"),
+        dry_run=dry_run,
+    )
+    result["sheets"] = sheets
+    result["dry_run"] = dry_run
+    return result
@@ -0,0 +1,297 @@
+"""Print-ready QR label sheets for book items, streamed page by page as PDF or SVG (in HTML)."""
+
+from __future__ import annotations
+
+import html
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import segno
+except ImportError:  # pragma: no cover - handled at runtime
+    segno = None
+
+LABEL_FORMATS = ("pdf", "svg")
+QR_CACHE_SIZE = 4096
+PT_PER_MM = 72 / 25.4
+# Rough Helvetica advance width (in em) used to cut titles without font metrics
+AVG_CHAR_EM = 0.52
+
+
+@dataclass(frozen=True)
+class LabelLayout:
+    columns: int = 4
+    rows: int = 10
+    page_width_mm: float = 210.0
+    page_height_mm: float = 297.0
+    margin_mm: float = 8.0
+    padding_mm: float = 1.5
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    @property
+    def cell_width_mm(self) -> float:
+        return (self.page_width_mm - 2 * self.margin_mm) / self.columns
+
+    @property
+    def cell_height_mm(self) -> float:
+        return (self.page_height_mm - 2 * self.margin_mm) / self.rows
+
+    def cell_origin_mm(self, index: int) -> Tuple[float, float]:
+        # Top-left corner of the index-th label on a page, row by row
+        row, column = divmod(index, self.columns)
+        return self.margin_mm + column * self.cell_width_mm, self.margin_mm + row * self.cell_height_mm
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_runs(code: str) -> Tuple[int, Tuple[Tuple[int, int, int], ...]]:
+    """(modules per side, dark runs as (row, first column, length)) for a QR code without quiet zone."""
+    if segno is None:
+        raise RuntimeError("segno belum terpasang; jalankan pip install segno.")
+    matrix = segno.make_qr(code, error="m").matrix
+    runs = []
+    for y, row in enumerate(matrix):
+        x, width = 0, len(row)
+        while x < width:
+            if row[x]:
+                start = x
+                while x < width and row[x]:
+                    x += 1
+                runs.append((y, start, x - start))
+            else:
+                x += 1
+    return len(matrix), tuple(runs)
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _qr_pdf_ops(code: str) -> bytes:
+    # Rectangles in module units; the caller positions and scales them with a cm operator
+    _size, runs = qr_runs(code)
+    return "".join(f"{x} {y} {length} 1 re\n" for y, x, length in runs).encode("ascii")
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _qr_svg_path(code: str) -> str:
+    _size, runs = qr_runs(code)
+    return "".join(f"M{x} {y}h{length}v1h-{length}z" for y, x, length in runs)
+
+
+def _wrap(text: str, max_chars: int, max_lines: int) -> List[str]:
+    words = (text or "").split()
+    lines: List[str] = []
+    current = ""
+    for word in words:
+        candidate = f"{current} {word}".strip()
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = word[:max_chars]
+        if len(lines) == max_lines:
+            break
+    if current and len(lines) < max_lines:
+        lines.append(current)
+    if len(lines) == max_lines and len(" ".join(lines)) < len(" ".join(words)):
+        last = lines[-1]
+        lines[-1] = (last[: max_chars - 1] if len(last) >= max_chars else last) + "…"
+    return lines
+
+
+def _label_text(item: Dict[str, Any], layout: LabelLayout) -> Tuple[float, float, float, float, List[str]]:
+    """QR side, code font size, title font size, text x offset (mm) and the title lines for one label."""
+    qr_mm = min(layout.cell_height_mm - 2 * layout.padding_mm, layout.cell_width_mm * 0.5)
+    text_x = layout.padding_mm * 2 + qr_mm
+    text_width = layout.cell_width_mm - text_x - layout.padding_mm
+    code_pt = min(8.0, layout.cell_height_mm * 0.3)
+    title_pt = code_pt * 0.8
+    max_chars = max(4, int(text_width * PT_PER_MM / (title_pt * AVG_CHAR_EM)))
+    max_lines = max(1, int((qr_mm * PT_PER_MM - code_pt) / (title_pt * 1.2)))
+    return qr_mm, code_pt, title_pt, text_x, _wrap(item.get("title") or "", max_chars, max_lines)
+
+
+def _pages(items: Iterable[Dict[str, Any]], per_page: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(items)
+    while True:
+        page = list(islice(iterator, per_page))
+        if not page:
+            return
+        yield page
+
+
+# --- PDF -----------------------------------------------------------------------------------
+
+def _pdf_text(value: str) -> str:
+    # Standard Type1 fonts use WinAnsi; anything outside it becomes '?'
+    raw = value.encode("cp1252", errors="replace").decode("latin-1")
+    return raw.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_page_content(items: List[Dict[str, Any]], layout: LabelLayout) -> bytes:
+    page_h = layout.page_height_mm * PT_PER_MM
+    cell_w = layout.cell_width_mm * PT_PER_MM
+    cell_h = layout.cell_height_mm * PT_PER_MM
+    pad = layout.padding_mm * PT_PER_MM
+    parts: List[bytes] = [b"0.8 G 0.3 w [2 2] 0 d\n"]
+    for index in range(len(items)):
+        x_mm, y_mm = layout.cell_origin_mm(index)
+        parts.append(f"{x_mm * PT_PER_MM:.2f} {page_h - y_mm * PT_PER_MM - cell_h:.2f} {cell_w:.2f} {cell_h:.2f} re S\n".encode())
+    parts.append(b"[] 0 d 0 g\n")
+    for index, item in enumerate(items):
+        x_mm, y_mm = layout.cell_origin_mm(index)
+        left = x_mm * PT_PER_MM
+        top = page_h - y_mm * PT_PER_MM
+        qr_mm, code_pt, title_pt, text_x_mm, lines = _label_text(item, layout)
+        modules, _runs = qr_runs(item["qr_code"])
+        scale = qr_mm * PT_PER_MM / modules
+        # Flip y so module rows run downwards from the label's top-left padding corner
+        parts.append(f"q {scale:.4f} 0 0 {-scale:.4f} {left + pad:.2f} {top - pad:.2f} cm\n".encode())
+        parts.append(_qr_pdf_ops(item["qr_code"]))
+        parts.append(b"f Q\n")
+        text_x = left + text_x_mm * PT_PER_MM
+        baseline = top - pad - code_pt
+        parts.append(f"BT /F2 {code_pt:.1f} Tf {text_x:.2f} {baseline:.2f} Td ({_pdf_text(item['qr_code'])}) Tj ET\n".encode("latin-1"))
+        for line in lines:
+            baseline -= title_pt * 1.2
+            parts.append(f"BT /F1 {title_pt:.1f} Tf {text_x:.2f} {baseline:.2f} Td ({_pdf_text(line)}) Tj ET\n".encode("latin-1"))
+    return b"".join(parts)
+
+
+class _PdfWriter:
+    """Writes numbered objects in order and remembers their byte offsets for the xref table."""
+
+    def __init__(self) -> None:
+        self.offsets: Dict[int, int] = {}
+        self.position = 0
+        self.next_id = 1
+
+    def reserve(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def chunk(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def object(self, obj_id: int, body: bytes) -> bytes:
+        self.offsets[obj_id] = self.position
+        return self.chunk(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def trailer(self, root_id: int) -> bytes:
+        xref_at = self.position
+        lines = [b"xref\n", b"0 %d\n" % self.next_id, b"0000000000 65535 f \n"]
+        lines.extend(b"%010d 00000 n \n" % self.offsets[obj_id] for obj_id in range(1, self.next_id))
+        lines.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, root_id, xref_at))
+        return self.chunk(b"".join(lines))
+
+
+def iter_label_pdf(items: Iterable[Dict[str, Any]], layout: LabelLayout = LabelLayout()) -> Iterator[bytes]:
+    """Yield a PDF one page at a time; only the page list and xref offsets are kept until the end."""
+    writer = _PdfWriter()
+    catalog_id, pages_id, font_id, bold_id = (writer.reserve() for _ in range(4))
+    yield writer.chunk(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    yield writer.object(catalog_id, b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    yield writer.object(font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    yield writer.object(bold_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    media_box = f"[0 0 {layout.page_width_mm * PT_PER_MM:.2f} {layout.page_height_mm * PT_PER_MM:.2f}]".encode()
+    page_ids = []
+    for page in _pages(items, layout.per_page):
+        content = zlib.compress(_pdf_page_content(page, layout))
+        content_id, page_id = writer.reserve(), writer.reserve()
+        yield writer.object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream",
+        )
+        yield writer.object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox %s /Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, media_box, font_id, bold_id, content_id),
+        )
+        page_ids.append(page_id)
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    yield writer.object(pages_id, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    yield writer.trailer(catalog_id)
+
+
+# --- SVG -----------------------------------------------------------------------------------
+
+def _svg_page(items: List[Dict[str, Any]], layout: LabelLayout) -> str:
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.page_width_mm}mm" height="{layout.page_height_mm}mm" '
+        f'viewBox="0 0 {layout.page_width_mm} {layout.page_height_mm}">'
+    ]
+    for index, item in enumerate(items):
+        x_mm, y_mm = layout.cell_origin_mm(index)
+        qr_mm, code_pt, title_pt, text_x_mm, lines = _label_text(item, layout)
+        modules, _runs = qr_runs(item["qr_code"])
+        code_mm, title_mm = code_pt / PT_PER_MM, title_pt / PT_PER_MM
+        parts.append(f'<g transform="translate({x_mm:.2f} {y_mm:.2f})">')
+        parts.append(
+            f'<rect width="{layout.cell_width_mm:.2f}" height="{layout.cell_height_mm:.2f}" fill="none" '
+            'stroke="#ccc" stroke-width="0.1" stroke-dasharray="0.7 0.7"/>'
+        )
+        parts.append(
+            f'<path transform="translate({layout.padding_mm} {layout.padding_mm}) scale({qr_mm / modules:.4f})" '
+            f'd="{_qr_svg_path(item["qr_code"])}"/>'
+        )
+        baseline = layout.padding_mm + code_mm
+        parts.append(
+            f'<text x="{text_x_mm:.2f}" y="{baseline:.2f}" font-family="Helvetica, Arial, sans-serif" '
+            f'font-weight="bold" font-size="{code_mm:.2f}">{html.escape(item["qr_code"])}</text>'
+        )
+        for line in lines:
+            baseline += title_mm * 1.2
+            parts.append(
+                f'<text x="{text_x_mm:.2f}" y="{baseline:.2f}" font-family="Helvetica, Arial, sans-serif" '
+                f'font-size="{title_mm:.2f}">{html.escape(line)}</text>'
+            )
+        parts.append("</g>")
+    parts.append("</svg>\n")
+    return "".join(parts)
+
+
+def iter_label_svg(items: Iterable[Dict[str, Any]], layout: LabelLayout = LabelLayout()) -> Iterator[bytes]:
+    """Yield an HTML document with one inline SVG sheet per page, ready for the browser's print dialog."""
+    yield (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Label QR Buku</title>'
+        f"<style>@page {{ size: {layout.page_width_mm}mm {layout.page_height_mm}mm; margin: 0; }} "
+        "body { margin: 0; } svg { display: block; page-break-after: always; }</style>"
+        "</head><body>\n"
+    ).encode("utf-8")
+    for page in _pages(items, layout.per_page):
+        yield _svg_page(page, layout).encode("utf-8")
+    yield b"</body></html>\n"
+
+
+def stream_label_sheets(
+    items: Iterable[Dict[str, Any]],
+    fmt: str = "pdf",
+    layout: LabelLayout = LabelLayout(),
+    on_complete: Optional[Callable[[List[int]], None]] = None,
+) -> Iterator[bytes]:
+    """
+    Render ``items`` (dicts with id, qr_code, title) and call ``on_complete`` with the ids that
+    were included once the last chunk has been handed to the server. If the client disconnects
+    first the server closes this generator and the callback never runs.
+    """
+    if fmt not in LABEL_FORMATS:
+        raise ValueError(f"Format label tidak dikenal: {fmt}")
+    included: List[int] = []
+
+    def tracked() -> Iterator[Dict[str, Any]]:
+        for item in items:
+            included.append(item["id"])
+            yield item
+
+    render = iter_label_pdf if fmt == "pdf" else iter_label_svg
+    yield from render(tracked(), layout)
+    if on_complete and included:
+        on_complete(included)
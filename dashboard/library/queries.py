@@ -1,6 +1,16 @@
-from typing import List, Optional, Dict, Any, Tuple
+import logging
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator, Callable
+from psycopg2.extras import execute_values
 from ..db_access import get_cursor
 
+BOOK_IMPORT_BATCH_SIZE = 1000
+CIRCULATION_BATCH_LIMIT = 200
+LABEL_FETCH_BATCH_SIZE = 500
+CIRCULATION_SCAN_ERROR = "Scan gagal diproses, akan dicoba lagi"
+
+logger = logging.getLogger(__name__)
+
 def get_all_books(search_query: str = "", page: int = 1, per_page: int = 10) -> Tuple[List[Dict[str, Any]], int]:
     offset = (page - 1) * per_page
     with get_cursor() as cur:
@@ -10,37 +20,89 @@ def get_all_books(search_query: str = "", page: int = 1, per_page: int = 10) ->
         params = []
         
         if search_query:
+            # Served by the trigram indexes from schema.ensure_book_search_indexes
             where_clause = "WHERE b.title ILIKE %s OR b.author ILIKE %s OR b.code ILIKE %s"
             search_term = f"%{search_query}%"
             params.extend([search_term, search_term, search_term])
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) {base_query} {where_clause}"
-        cur.execute(count_query, tuple(params))
-        result = cur.fetchone()
-        total_items = result[0] if result else 0
-
-        # Get paginated books
-        # Stock is now calculated from available items
+        # Stock is the available item counter kept up to date by the write paths below.
+        # When searching, the window count replaces a second ILIKE pass for pagination;
+        # the unfiltered list keeps a plain COUNT so the page itself stops after LIMIT rows.
+        count_column = ", COUNT(*) OVER () as total_count" if search_query else ""
         query = f"""
             SELECT b.id, b.title, b.author, b.publisher, b.year, b.code, 
-                   (SELECT COUNT(*) FROM book_items bi WHERE bi.book_id = b.id AND bi.status = 'available') as stock,
+                   b.available_items as stock,
                    b.location,
-                   (SELECT COUNT(*) FROM borrowing_records br WHERE br.book_id = b.id AND br.status = 'borrowed') as borrowed_count,
-                   (SELECT COUNT(*) FROM book_items bi WHERE bi.book_id = b.id) as total_items
+                   b.borrowed_count,
+                   b.total_items
+                   {count_column}
             {base_query}
             {where_clause}
             ORDER BY b.created_at DESC
             LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
-        
-        cur.execute(query, tuple(params))
+        cur.execute(query, tuple(params + [per_page, offset]))
         columns = [desc[0] for desc in cur.description]
         books = [dict(zip(columns, row)) for row in cur.fetchall()]
+
+        if search_query and books:
+            total_items = books[0]["total_count"]
+            for book in books:
+                del book["total_count"]
+        elif search_query and not offset:
+            total_items = 0
+        else:
+            # Unfiltered list, or a search page past the end (no row carries the window count)
+            cur.execute(f"SELECT COUNT(*) {base_query} {where_clause}", tuple(params))
+            total_items = cur.fetchone()[0]
         
         return books, total_items
 
+def _adjust_book_counters(cur, book_id: int, *, available: int = 0, borrowed: int = 0, total: int = 0) -> None:
+    # Deltas (not recounts) so concurrent borrows/returns of the same title never overwrite each other
+    if not (available or borrowed or total):
+        return
+    cur.execute("""
+        UPDATE books
+        SET available_items = available_items + %s,
+            borrowed_count = borrowed_count + %s,
+            total_items = total_items + %s
+        WHERE id = %s
+    """, (available, borrowed, total, book_id))
+
+def _set_item_status(cur, item_id: int, status: str, qr_code: Optional[str] = None) -> Optional[Tuple[int, str]]:
+    """Change one item's status (and optionally its QR code); returns (book_id, previous status)."""
+    cur.execute("SELECT book_id, status FROM book_items WHERE id = %s FOR UPDATE", (item_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    book_id, previous = row
+    if qr_code is None:
+        cur.execute("UPDATE book_items SET status = %s WHERE id = %s", (status, item_id))
+    else:
+        cur.execute("UPDATE book_items SET status = %s, qr_code = %s WHERE id = %s", (status, qr_code, item_id))
+    _adjust_book_counters(cur, book_id, available=(status == 'available') - (previous == 'available'))
+    return book_id, previous
+
+def _reserve_item_seqs(cur, book_id: int, count: int) -> Optional[Tuple[str, int]]:
+    """Claim ``count`` item numbers for a book; returns (book code, first number)."""
+    cur.execute("""
+        UPDATE books
+        SET next_item_seq = next_item_seq + %s,
+            total_items = total_items + %s,
+            available_items = available_items + %s
+        WHERE id = %s
+        RETURNING code, next_item_seq - %s
+    """, (count, count, count, book_id, count))
+    return cur.fetchone()
+
+def _insert_items(cur, book_id: int, code: str, first_seq: int, count: int) -> None:
+    cur.execute("""
+        INSERT INTO book_items (book_id, qr_code, status)
+        SELECT %s, %s || '-' || n, 'available'
+        FROM generate_series(%s, %s) AS n
+    """, (book_id, code, first_seq, first_seq + count - 1))
+
 def get_next_book_code() -> str:
     with get_cursor() as cur:
         # Try to find the max integer code. 
@@ -54,6 +116,66 @@ def get_next_book_code() -> str:
         max_code = row[0] if row and row[0] is not None else 0
         return str(max_code + 1)
 
+def bulk_add_books(
+    books: Iterable[Tuple[str, str, str, Optional[int], int, str]],
+    *,
+    batch_size: int = BOOK_IMPORT_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Insert many (title, author, publisher, year, stock, location) rows in one transaction.
+    Codes come from one nextval range on book_code_seq; items are generated in SQL per batch.
+    """
+    rows = list(books)
+    result = {"books": 0, "items": 0, "first_code": None, "last_code": None}
+    if not rows:
+        return result
+    with get_cursor(commit=not dry_run) as cur:
+        # Form tambah buku memakai MAX(code) + 1, jadi tahan tulis lain selama import
+        # dan mulai sequence tepat setelah kode numerik tertinggi.
+        cur.execute("LOCK TABLE books IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute("""
+            SELECT setval('book_code_seq', COALESCE(MAX(CAST(code AS BIGINT)), 0) + 1, false)
+            FROM books
+            WHERE code ~ '^[0-9]+$'
+        """)
+        cur.execute("SELECT nextval('book_code_seq') FROM generate_series(1, %s)", (len(rows),))
+        codes = [str(row[0]) for row in cur.fetchall()]
+        result["first_code"], result["last_code"] = codes[0], codes[-1]
+
+        for start in range(0, len(rows), batch_size):
+            batch = [
+                (title, author, publisher, year, code, stock, location, max(stock, 0), max(stock, 0), max(stock, 0) + 1)
+                for (title, author, publisher, year, stock, location), code in zip(
+                    rows[start:start + batch_size], codes[start:start + batch_size]
+                )
+            ]
+            book_ids = [row[0] for row in execute_values(cur, """
+                INSERT INTO books (
+                    title, author, publisher, year, code, stock, location,
+                    available_items, total_items, next_item_seq
+                )
+                VALUES %s
+                RETURNING id
+            """, batch, page_size=len(batch), fetch=True)]
+            cur.execute("""
+                INSERT INTO book_items (book_id, qr_code, status)
+                SELECT b.id, b.code || '-' || n, 'available'
+                FROM books b
+                CROSS JOIN LATERAL generate_series(1, b.stock) AS n
+                WHERE b.id = ANY(%s)
+                ORDER BY b.id, n
+            """, (book_ids,))
+            result["books"] += len(book_ids)
+            result["items"] += cur.rowcount
+            if progress:
+                progress(result["books"], len(rows))
+
+        if dry_run:
+            cur.connection.rollback()
+    return result
+
 def add_book(title: str, author: str, publisher: str, year: int, code: str, stock: int, location: str) -> None:
     with get_cursor(commit=True) as cur:
         # Insert book
@@ -65,80 +187,54 @@ def add_book(title: str, author: str, publisher: str, year: int, code: str, stoc
         book_id = cur.fetchone()[0]
         
         # Create items
-        for i in range(stock):
-            qr_code = f"{code}-{i+1}"
-            cur.execute("""
-                INSERT INTO book_items (book_id, qr_code, status)
-                VALUES (%s, %s, 'available')
-            """, (book_id, qr_code))
+        if stock > 0:
+            code, first_seq = _reserve_item_seqs(cur, book_id, stock)
+            _insert_items(cur, book_id, code, first_seq, stock)
 
 def update_book(book_id: int, title: str, author: str, publisher: str, year: int, stock: int, location: str) -> None:
     # Note: 'stock' argument here is treated as "target total stock". 
     
     with get_cursor(commit=True) as cur:
+        # Lock book_items before the books row, the same order as borrow/return, so an edit
+        # racing a scan waits instead of deadlocking. Only available copies can be removed.
+        cur.execute("""
+            SELECT id FROM book_items
+            WHERE book_id = %s AND status = 'available'
+            ORDER BY id
+            FOR UPDATE
+        """, (book_id,))
+        available_ids = [row[0] for row in cur.fetchall()]
+
         cur.execute("""
             UPDATE books 
             SET title = %s, author = %s, publisher = %s, year = %s, location = %s
             WHERE id = %s
+            RETURNING total_items
         """, (title, author, publisher, year, location, book_id))
-        
-        # Check current total items
-        cur.execute("SELECT COUNT(*) FROM book_items WHERE book_id = %s", (book_id,))
-        current_total = cur.fetchone()[0]
+        row = cur.fetchone()
+        if not row:
+            return
+        current_total = row[0]
         
         if stock > current_total:
-            # Add more items
+            # Add more items, numbered after the highest sequence ever issued
             to_add = stock - current_total
-            
-            # Get book code to generate QR
-            cur.execute("SELECT code FROM books WHERE id = %s", (book_id,))
-            code = cur.fetchone()[0]
-            
-            # Find max sequence number
-            # Assuming format code-seq
-            cur.execute("""
-                SELECT qr_code FROM book_items WHERE book_id = %s
-            """, (book_id,))
-            existing_qrs = [row[0] for row in cur.fetchall()]
-            
-            max_seq = 0
-            for qr in existing_qrs:
-                try:
-                    parts = qr.split('-')
-                    if len(parts) > 1:
-                        seq = int(parts[-1])
-                        if seq > max_seq:
-                            max_seq = seq
-                except ValueError:
-                    pass
-            
-            for i in range(to_add):
-                max_seq += 1
-                qr_code = f"{code}-{max_seq}"
-                cur.execute("""
-                    INSERT INTO book_items (book_id, qr_code, status)
-                    VALUES (%s, %s, 'available')
-                """, (book_id, qr_code))
+            code, first_seq = _reserve_item_seqs(cur, book_id, to_add)
+            _insert_items(cur, book_id, code, first_seq, to_add)
         
         elif stock < current_total:
             # Reduce items (only available ones)
             to_remove = current_total - stock
             
-            # Get available items, ordered by sequence number descending (try to remove newest first)
-            # We rely on ID or QR code to guess "newest". ID is safer.
-            cur.execute("""
-                SELECT id FROM book_items 
-                WHERE book_id = %s AND status = 'available'
-                ORDER BY id DESC
-                LIMIT %s
-            """, (book_id, to_remove))
-            
-            items_to_delete = [row[0] for row in cur.fetchall()]
+            # Remove the newest available items first (highest id), from the rows locked above
+            items_to_delete = available_ids[::-1][:to_remove]
             
             if items_to_delete:
                 cur.execute("""
                     DELETE FROM book_items WHERE id = ANY(%s)
                 """, (items_to_delete,))
+                removed = cur.rowcount
+                _adjust_book_counters(cur, book_id, available=-removed, total=-removed)
 
 def delete_book(book_id: int) -> None:
     with get_cursor(commit=True) as cur:
@@ -188,44 +284,50 @@ def borrow_book(student_id: int, item_qr_code: str, user_id: int) -> str:
     Returns 'success', 'item_not_found', 'item_not_available', 'already_borrowed'
     """
     with get_cursor(commit=True) as cur:
-        # Check item availability
-        cur.execute("""
-            SELECT bi.id, bi.book_id, bi.status, b.title 
-            FROM book_items bi
-            JOIN books b ON bi.book_id = b.id
-            WHERE bi.qr_code = %s FOR UPDATE
-        """, (item_qr_code,))
-        item = cur.fetchone()
-        
-        if not item:
-            return 'item_not_found'
-        
-        item_id, book_id, status, title = item
-        
-        if status != 'available':
-            return 'item_not_available'
-
-        # Check if student already borrowing THIS specific item (unlikely if status is available, but good check)
-        # Or check if student borrowing ANY copy of this book? Maybe we allow multiple copies?
-        # Let's restrict: Student cannot borrow the SAME book title twice if not returned?
-        # For now, let's just check if they are borrowing this specific item (which is covered by status check)
-        # But let's check if they have unreturned book of same title?
-        # The user didn't specify, but usually library rules prevent borrowing same title twice.
-        # Let's stick to simple: can borrow if item is available.
-        
-        # Record borrowing
-        cur.execute("""
-            INSERT INTO borrowing_records (student_id, book_id, book_item_id, recorded_by, status)
-            VALUES (%s, %s, %s, %s, 'borrowed')
-        """, (student_id, book_id, item_id, user_id))
-
-        # Update item status
-        cur.execute("UPDATE book_items SET status = 'borrowed' WHERE id = %s", (item_id,))
-        
-        # Update book stock cache (optional, but we are moving away from it)
-        # cur.execute("UPDATE books SET stock = stock - 1 WHERE id = %s", (book_id,))
-        
-        return 'success'
+        return _borrow_item(cur, student_id, item_qr_code, user_id)[0]
+
+def _borrow_item(
+    cur, student_id: int, item_qr_code: str, user_id: Optional[int], scanned_at: Optional[datetime] = None
+) -> Tuple[str, Optional[int], Optional[str]]:
+    """Borrow one item inside the caller's transaction; returns (result, borrowing id, title)."""
+    # Check item availability
+    cur.execute("""
+        SELECT bi.id, bi.book_id, bi.status, b.title 
+        FROM book_items bi
+        JOIN books b ON bi.book_id = b.id
+        WHERE bi.qr_code = %s FOR UPDATE OF bi
+    """, (item_qr_code,))
+    item = cur.fetchone()
+    
+    if not item:
+        return 'item_not_found', None, None
+    
+    item_id, book_id, status, title = item
+    
+    if status != 'available':
+        return 'item_not_available', None, title
+
+    # Check if student already borrowing THIS specific item (unlikely if status is available, but good check)
+    # Or check if student borrowing ANY copy of this book? Maybe we allow multiple copies?
+    # Let's restrict: Student cannot borrow the SAME book title twice if not returned?
+    # For now, let's just check if they are borrowing this specific item (which is covered by status check)
+    # But let's check if they have unreturned book of same title?
+    # The user didn't specify, but usually library rules prevent borrowing same title twice.
+    # Let's stick to simple: can borrow if item is available.
+    
+    # Record borrowing
+    cur.execute("""
+        INSERT INTO borrowing_records (student_id, book_id, book_item_id, recorded_by, status, borrow_date)
+        VALUES (%s, %s, %s, %s, 'borrowed', COALESCE(%s::timestamptz::date, CURRENT_DATE))
+        RETURNING id
+    """, (student_id, book_id, item_id, user_id, scanned_at))
+    borrow_id = cur.fetchone()[0]
+
+    # Update item status and the book's counters
+    cur.execute("UPDATE book_items SET status = 'borrowed' WHERE id = %s", (item_id,))
+    _adjust_book_counters(cur, book_id, available=-1, borrowed=1)
+    
+    return 'success', borrow_id, title
 
 def get_borrowings(student_id: Optional[int] = None, search_query: str = "", status: Optional[str] = None) -> List[Dict[str, Any]]:
     with get_cursor() as cur:
@@ -274,49 +376,153 @@ def get_borrowings(student_id: Optional[int] = None, search_query: str = "", sta
 def delete_borrowing(borrow_id: int) -> None:
     with get_cursor(commit=True) as cur:
         # Get item id to reset status if needed
-        cur.execute("SELECT book_item_id, status FROM borrowing_records WHERE id = %s", (borrow_id,))
+        cur.execute("SELECT book_id, book_item_id, status FROM borrowing_records WHERE id = %s FOR UPDATE", (borrow_id,))
         row = cur.fetchone()
         if row:
-            book_item_id, status = row
+            book_id, book_item_id, status = row
             # If currently borrowed, we should probably set item back to available?
             # Or assume deleting record means it never happened?
             # Let's set item to available if it was borrowed.
-            if status == 'borrowed' and book_item_id:
-                cur.execute("UPDATE book_items SET status = 'available' WHERE id = %s", (book_item_id,))
+            if status == 'borrowed':
+                if book_item_id:
+                    _set_item_status(cur, book_item_id, 'available')
+                _adjust_book_counters(cur, book_id, borrowed=-1)
         
         cur.execute("DELETE FROM borrowing_records WHERE id = %s", (borrow_id,))
 
 def return_book(borrow_id: int, user_id: Optional[int] = None) -> None:
     with get_cursor(commit=True) as cur:
-        # Get book_item_id and current status
-        cur.execute("SELECT book_item_id, status FROM borrowing_records WHERE id = %s", (borrow_id,))
-        row = cur.fetchone()
-        if not row:
-            return
-        book_item_id, status = row
-        
-        if status == 'returned':
-            return # Already returned
-
-        # Update record
+        _return_borrowing(cur, borrow_id, user_id)
+
+def _return_borrowing(cur, borrow_id: int, user_id: Optional[int], scanned_at: Optional[datetime] = None) -> bool:
+    # Get book_item_id and current status (locked so a double submit is counted once)
+    cur.execute("SELECT book_id, book_item_id, status FROM borrowing_records WHERE id = %s FOR UPDATE", (borrow_id,))
+    row = cur.fetchone()
+    if not row:
+        return False
+    book_id, book_item_id, status = row
+    
+    if status == 'returned':
+        return False # Already returned
+
+    # Update record
+    cur.execute("""
+        UPDATE borrowing_records 
+        SET status = 'returned', return_date = COALESCE(%s::timestamptz::date, CURRENT_DATE),
+            updated_at = NOW(), returned_by = %s
+        WHERE id = %s
+    """, (scanned_at, user_id, borrow_id))
+
+    # Update item status, then the book's counters (item before book, like borrow_book)
+    if book_item_id:
+        _set_item_status(cur, book_item_id, 'available')
+    _adjust_book_counters(cur, book_id, borrowed=-(status == 'borrowed'))
+    return True
+
+def _return_item(
+    cur, item_qr_code: str, user_id: Optional[int], scanned_at: Optional[datetime] = None
+) -> Tuple[str, Optional[int], Optional[str]]:
+    """Return whichever open borrowing holds this item; returns (result, borrowing id, title)."""
+    cur.execute("""
+        SELECT bi.id, b.title
+        FROM book_items bi
+        JOIN books b ON bi.book_id = b.id
+        WHERE bi.qr_code = %s
+    """, (item_qr_code,))
+    item = cur.fetchone()
+    if not item:
+        return 'item_not_found', None, None
+    item_id, title = item
+
+    cur.execute("""
+        SELECT id FROM borrowing_records
+        WHERE book_item_id = %s AND status = 'borrowed'
+        ORDER BY id DESC
+        LIMIT 1
+    """, (item_id,))
+    row = cur.fetchone()
+    if not row or not _return_borrowing(cur, row[0], user_id, scanned_at):
+        return 'not_borrowed', None, title
+    return 'success', row[0], title
+
+def process_circulation_scans(scans: List[Dict[str, Any]], user_id: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Apply a queue of scans ({scan_id, action 'borrow'|'return', qr_code, student_id, scanned_at})
+    in one transaction and return one result per scan, in order.
+    A scan_id that was already processed returns its stored result instead of running again,
+    so the borrow page can resend a whole queue after a dropped connection.
+    """
+    if not scans:
+        return []
+    with get_cursor(commit=True) as cur:
+        # Lock every scanned item, then their books, in id order so two batches (or a batch and
+        # a single borrow) touching the same titles wait for each other instead of deadlocking
         cur.execute("""
-            UPDATE borrowing_records 
-            SET status = 'returned', return_date = CURRENT_DATE, updated_at = NOW(), returned_by = %s
-            WHERE id = %s
-        """, (user_id, borrow_id))
-
-        # Update item status
-        if book_item_id:
-            cur.execute("UPDATE book_items SET status = 'available' WHERE id = %s", (book_item_id,))
+            SELECT id, book_id FROM book_items WHERE qr_code = ANY(%s) ORDER BY id FOR UPDATE
+        """, (sorted({scan["qr_code"] for scan in scans}),))
+        book_ids = sorted({row[1] for row in cur.fetchall()})
+        cur.execute("SELECT id FROM books WHERE id = ANY(%s) ORDER BY id FOR UPDATE", (book_ids,))
+
+        student_ids = sorted({scan["student_id"] for scan in scans if scan.get("student_id")})
+        cur.execute("SELECT id FROM students WHERE id = ANY(%s)", (student_ids,))
+        known_students = {row[0] for row in cur.fetchall()}
+
+        results = []
+        for scan in scans:
+            result = {"scan_id": scan["scan_id"], "action": scan["action"], "qr_code": scan["qr_code"]}
+            cur.execute("SAVEPOINT circulation_scan")
+            try:
+                # Claim the scan id first; a resend finds the row written by the first attempt
+                cur.execute("""
+                    INSERT INTO library_circulation_scans (scan_id, action, qr_code, student_id, status, scanned_at, recorded_by)
+                    VALUES (%s, %s, %s, %s, 'pending', %s, %s)
+                    ON CONFLICT (scan_id) DO NOTHING
+                """, (scan["scan_id"], scan["action"], scan["qr_code"], scan.get("student_id"), scan.get("scanned_at"), user_id))
+                if not cur.rowcount:
+                    cur.execute("""
+                        SELECT s.status, s.borrow_id, b.title
+                        FROM library_circulation_scans s
+                        LEFT JOIN book_items bi ON bi.qr_code = s.qr_code
+                        LEFT JOIN books b ON b.id = bi.book_id
+                        WHERE s.scan_id = %s
+                    """, (scan["scan_id"],))
+                    status, borrow_id, title = cur.fetchone()
+                    result["duplicate"] = True
+                elif scan["action"] == "borrow":
+                    if scan.get("student_id") in known_students:
+                        status, borrow_id, title = _borrow_item(
+                            cur, scan["student_id"], scan["qr_code"], user_id, scan.get("scanned_at")
+                        )
+                    else:
+                        status, borrow_id, title = 'student_not_found', None, None
+                else:
+                    status, borrow_id, title = _return_item(cur, scan["qr_code"], user_id, scan.get("scanned_at"))
+                if not result.get("duplicate"):
+                    cur.execute("""
+                        UPDATE library_circulation_scans SET status = %s, borrow_id = %s WHERE scan_id = %s
+                    """, (status, borrow_id, scan["scan_id"]))
+                cur.execute("RELEASE SAVEPOINT circulation_scan")
+            except Exception:
+                # Unexpected failure: drop this scan's claim so the client can retry it later.
+                # Details stay in the server log; the client only gets a generic message.
+                cur.execute("ROLLBACK TO SAVEPOINT circulation_scan")
+                logger.exception(
+                    "Circulation scan %s (%s %s) failed", scan["scan_id"], scan["action"], scan["qr_code"]
+                )
+                status, borrow_id, title = 'error', None, None
+                result["error"] = CIRCULATION_SCAN_ERROR
+            result.update({"status": status, "borrow_id": borrow_id, "title": title})
+            results.append(result)
+        return results
 
 def cancel_return_book(borrow_id: int) -> None:
     with get_cursor(commit=True) as cur:
         # Get book_item_id and current status
-        cur.execute("SELECT book_item_id, status FROM borrowing_records WHERE id = %s", (borrow_id,))
+        cur.execute("SELECT book_id, book_item_id, status FROM borrowing_records WHERE id = %s FOR UPDATE", (borrow_id,))
         row = cur.fetchone()
         if not row:
             return
-        book_item_id, status = row
+        book_id, book_item_id, status = row
         
         if status == 'borrowed':
             return # Already borrowed
@@ -328,9 +534,10 @@ def cancel_return_book(borrow_id: int) -> None:
             WHERE id = %s
         """, (borrow_id,))
 
-        # Update item status
+        # Update item status, then the book's counters
         if book_item_id:
-            cur.execute("UPDATE book_items SET status = 'borrowed' WHERE id = %s", (book_item_id,))
+            _set_item_status(cur, book_item_id, 'borrowed')
+        _adjust_book_counters(cur, book_id, borrowed=1)
 
 def get_book_items(book_id: int, page: int = 1, per_page: int = 20) -> Tuple[List[Dict[str, Any]], int]:
     offset = (page - 1) * per_page
@@ -404,15 +611,15 @@ def get_all_items(search_query: str = "", page: int = 1, per_page: int = 20) ->
 
 def update_item(item_id: int, status: str, qr_code: str) -> None:
     with get_cursor(commit=True) as cur:
-        cur.execute("""
-            UPDATE book_items 
-            SET status = %s, qr_code = %s
-            WHERE id = %s
-        """, (status, qr_code, item_id))
+        _set_item_status(cur, item_id, status, qr_code)
 
 def delete_item(item_id: int) -> None:
     with get_cursor(commit=True) as cur:
-        cur.execute("DELETE FROM book_items WHERE id = %s", (item_id,))
+        cur.execute("DELETE FROM book_items WHERE id = %s RETURNING book_id, status", (item_id,))
+        row = cur.fetchone()
+        if row:
+            book_id, status = row
+            _adjust_book_counters(cur, book_id, available=-(status == 'available'), total=-1)
 
 def get_book_by_code(code: str) -> Optional[Dict[str, Any]]:
     with get_cursor() as cur:
@@ -425,38 +632,56 @@ def get_book_by_code(code: str) -> Optional[Dict[str, Any]]:
 
 def add_item_to_book(book_id: int) -> None:
     with get_cursor(commit=True) as cur:
-        # Get book code
-        cur.execute("SELECT code FROM books WHERE id = %s", (book_id,))
-        res = cur.fetchone()
+        # Claim the next sequence number (also bumps the counters); the row lock serializes concurrent adds
+        res = _reserve_item_seqs(cur, book_id, 1)
         if not res:
             return
-        code = res[0]
-        
-        # Find max sequence
-        cur.execute("SELECT qr_code FROM book_items WHERE book_id = %s", (book_id,))
-        existing_qrs = [row[0] for row in cur.fetchall()]
-        
-        max_seq = 0
-        for qr in existing_qrs:
-            try:
-                parts = qr.split('-')
-                if len(parts) > 1:
-                    seq = int(parts[-1])
-                    if seq > max_seq:
-                        max_seq = seq
-            except ValueError:
-                pass
-        
-        new_qr = f"{code}-{max_seq + 1}"
-        
-        cur.execute("""
-            INSERT INTO book_items (book_id, qr_code, status)
-            VALUES (%s, %s, 'available')
-        """, (book_id, new_qr))
+        code, seq = res
+        _insert_items(cur, book_id, code, seq, 1)
         
         # Update stock count in books table (optional, but good for consistency if we still use it)
         cur.execute("UPDATE books SET stock = stock + 1 WHERE id = %s", (book_id,))
 
+def iter_unlabeled_items(
+    search_query: str = "",
+    book_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    batch_size: int = LABEL_FETCH_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield unlabelled items (id, qr_code, title, book_code) in id order, fetched in keyset
+    batches so a long label download never holds a pooled connection between batches.
+    """
+    last_id = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        where = ["bi.is_labeled IS NOT TRUE", "bi.id > %s"]
+        params: List[Any] = [last_id]
+        if search_query:
+            where.append("(bi.qr_code ILIKE %s OR b.title ILIKE %s)")
+            params.extend([f"%{search_query}%", f"%{search_query}%"])
+        if book_id:
+            where.append("bi.book_id = %s")
+            params.append(book_id)
+        with get_cursor() as cur:
+            cur.execute(f"""
+                SELECT bi.id, bi.qr_code, b.title, b.code as book_code
+                FROM book_items bi
+                JOIN books b ON bi.book_id = b.id
+                WHERE {" AND ".join(where)}
+                ORDER BY bi.id
+                LIMIT %s
+            """, tuple(params + [size]))
+            columns = [desc[0] for desc in cur.description]
+            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        yield from rows
+        if len(rows) < size:
+            return
+        last_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+
 def update_item_label_status(item_id: int, is_labeled: bool) -> None:
     with get_cursor(commit=True) as cur:
         cur.execute("UPDATE book_items SET is_labeled = %s WHERE id = %s", (is_labeled, item_id))
@@ -1,10 +1,13 @@
-from flask import render_template, request, flash, redirect, url_for, jsonify
+import io
+from datetime import datetime, timezone
+from flask import render_template, request, flash, redirect, url_for, jsonify, Response, stream_with_context, current_app
 from ..auth import login_required, current_user, role_required
 from . import library_bp
 from .queries import (
     get_all_books, add_book, get_book_by_code, search_students, 
     borrow_book, return_book, get_student_by_id,
-    get_next_book_code, get_book_items, get_item_by_qr
+    get_next_book_code, get_book_items, get_item_by_qr,
+    process_circulation_scans, CIRCULATION_BATCH_LIMIT
 )
 
 @library_bp.route("/")
@@ -50,7 +53,13 @@ def borrow():
             
             return redirect(url_for("library.borrow", student_id=student_id))
 
-    return render_template("library/borrow.html", student_id=student_id, student=student, borrowings=borrowings)
+    return render_template(
+        "library/borrow.html",
+        student_id=student_id,
+        student=student,
+        borrowings=borrowings,
+        circulation_batch_limit=CIRCULATION_BATCH_LIMIT,
+    )
 
 @library_bp.route("/books", methods=["GET", "POST"])
 @login_required
@@ -96,6 +105,36 @@ def books():
         total_items=total_items
     )
 
+@library_bp.route("/books/import", methods=["POST"])
+@role_required("admin")
+def import_books_route():
+    uploads = [item for item in request.files.getlist("catalog_files") if item and item.filename]
+    if not uploads:
+        flash("Pilih minimal satu file Excel katalog", "error")
+        return redirect(url_for("library.books"))
+    try:
+        from .catalog_loader import import_catalog
+        result = import_catalog(
+            [(io.BytesIO(item.read()), item.filename) for item in uploads],
+            location_prefix=request.form.get("location_prefix") or None,
+        )
+    except Exception as e:
+        flash(f"Gagal import katalog: {e}", "error")
+        return redirect(url_for("library.books"))
+
+    skipped = [f"{sheet['file']} / {sheet['sheet']}" for sheet in result["sheets"] if not sheet["books"]]
+    if result["books"]:
+        flash(
+            f"Import selesai: {result['books']} judul, {result['items']} item "
+            f"(kode {result['first_code']}-{result['last_code']})",
+            "success",
+        )
+    else:
+        flash("Tidak ada judul buku yang ditemukan pada file tersebut", "warning")
+    if skipped:
+        flash(f"Sheet tanpa header dilewati: {', '.join(skipped)}", "warning")
+    return redirect(url_for("library.books"))
+
 @library_bp.route("/books/update/<int:book_id>", methods=["POST"])
 @login_required
 def update_book_route(book_id):
@@ -223,6 +262,69 @@ def return_item(borrow_id):
     flash("Buku berhasil dikembalikan", "success")
     return redirect(request.referrer or url_for("library.borrow"))
 
+def _parse_circulation_scan(raw):
+    """Normalize one queued scan; invalid ones come back with status 'invalid'."""
+    if not isinstance(raw, dict):
+        return {"scan_id": None, "status": "invalid", "error": "Format scan tidak valid"}
+    scan_id = str(raw.get("scan_id") or "").strip()
+    action = raw.get("action")
+    qr_code = str(raw.get("qr_code") or "").strip()
+    invalid = {"scan_id": scan_id or None, "action": action, "qr_code": qr_code, "status": "invalid"}
+    if not scan_id or len(scan_id) > 64:
+        return dict(invalid, error="scan_id wajib diisi (maks. 64 karakter)")
+    if action not in ("borrow", "return"):
+        return dict(invalid, error="Aksi harus 'borrow' atau 'return'")
+    if not qr_code:
+        return dict(invalid, error="QR code kosong")
+
+    student_id = raw.get("student_id")
+    try:
+        student_id = int(student_id) if student_id not in (None, "") else None
+    except (TypeError, ValueError):
+        student_id = None
+    if action == "borrow" and student_id is None:
+        return dict(invalid, error="Siswa belum dipilih")
+
+    # Waktu scan di perangkat dipakai sebagai tanggal pinjam/kembali saat antrian terkirim belakangan
+    scanned_at = None
+    if raw.get("scanned_at"):
+        try:
+            scanned_at = datetime.fromisoformat(str(raw["scanned_at"]).replace("Z", "+00:00"))
+        except ValueError:
+            scanned_at = None
+        if scanned_at and (scanned_at.tzinfo is None or scanned_at > datetime.now(timezone.utc)):
+            scanned_at = None
+    return {
+        "scan_id": scan_id,
+        "action": action,
+        "qr_code": qr_code,
+        "student_id": student_id,
+        "scanned_at": scanned_at,
+    }
+
+@library_bp.route("/api/circulation/batch", methods=["POST"])
+@login_required
+def api_circulation_batch():
+    data = request.get_json(silent=True) or {}
+    raw_scans = data.get("scans")
+    if not isinstance(raw_scans, list) or not raw_scans:
+        return jsonify({"error": "No scans provided"}), 400
+    if len(raw_scans) > CIRCULATION_BATCH_LIMIT:
+        return jsonify({"error": f"Maksimal {CIRCULATION_BATCH_LIMIT} scan per kiriman"}), 400
+
+    parsed = [_parse_circulation_scan(raw) for raw in raw_scans]
+    user = current_user()
+    try:
+        processed = iter(process_circulation_scans(
+            [scan for scan in parsed if "status" not in scan],
+            user["id"] if user else None,
+        ))
+    except Exception:
+        current_app.logger.exception("Gagal memproses antrian scan sirkulasi")
+        return jsonify({"error": "Antrian scan gagal diproses, coba lagi"}), 500
+    results = [scan if "status" in scan else next(processed) for scan in parsed]
+    return jsonify({"results": results})
+
 @library_bp.route("/cancel_return/<int:borrow_id>", methods=["POST"])
 @login_required
 def cancel_return_item(borrow_id):
@@ -348,6 +450,50 @@ def toggle_item_label(item_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@library_bp.route("/items/labels")
+@login_required
+def item_label_sheets():
+    from .labels import LABEL_FORMATS, LabelLayout, stream_label_sheets
+    from .queries import iter_unlabeled_items, bulk_update_item_labels
+
+    fmt = request.args.get("format", "pdf")
+    if fmt not in LABEL_FORMATS:
+        fmt = "pdf"
+    search_query = request.args.get("q", "").strip()
+    book_id = request.args.get("book_id", type=int)
+    limit = max(1, min(request.args.get("limit", 400, type=int), 5000))
+    layout = LabelLayout(
+        columns=max(1, min(request.args.get("columns", 4, type=int), 8)),
+        rows=max(1, min(request.args.get("rows", 10, type=int), 20)),
+    )
+    mark_labeled = request.args.get("mark", "1") == "1"
+
+    items = iter_unlabeled_items(search_query, book_id=book_id, limit=limit)
+    first = next(items, None)
+    if first is None:
+        flash("Tidak ada item belum berlabel yang cocok dengan filter.", "warning")
+        return redirect(url_for("library.all_items", q=search_query))
+
+    def chained():
+        yield first
+        yield from items
+
+    # Items are marked only after the last chunk is written; an aborted download leaves them unlabelled
+    body = stream_label_sheets(
+        chained(),
+        fmt,
+        layout,
+        on_complete=(lambda ids: bulk_update_item_labels(ids, True)) if mark_labeled else None,
+    )
+    stamp = datetime.now().strftime("%Y%m%d-%H%M")
+    if fmt == "pdf":
+        return Response(
+            stream_with_context(body),
+            mimetype="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="label-qr-{stamp}.pdf"'},
+        )
+    return Response(stream_with_context(body), mimetype="text/html")
+
 @library_bp.route("/api/items/bulk_label", methods=["POST"])
 @login_required
 def bulk_label_items():
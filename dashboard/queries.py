@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import copy
 import json
 import os
 from pathlib import Path
 import re
-from collections import Counter
+import threading
+import time
+from collections import Counter, deque
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from flask import has_request_context, session
@@ -21,7 +24,10 @@ from db import (
     TKA_SECTION_KEY_ORDER,
     TKA_METADATA_SECTION_CONFIG_KEY,
 )
-from account_status import ACCOUNT_STATUS_CHOICES
+from account_status import ACCOUNT_STATUS_CHOICES, ACCOUNT_STATUS_NOTIFY_CHANNEL
+from inbox_notify import notify_inbox_change
+from chat_log_partitions import iter_chat_log_archive, list_chat_log_archives
+from utils import JAKARTA_TZ
 
 TOKEN_PATTERN = re.compile(r"[a-z0-9]+", re.IGNORECASE)
 STOPWORDS = {
@@ -1351,9 +1357,6 @@ def fetch_overview_metrics(window_days: int = 7) -> Dict[str, Any]:
     window_days = max(1, window_days)
     interval = timedelta(days=window_days)
 
-    bullying_rows: List[Dict[str, Any]] = []
-    escalated_total = 0
-
     with get_cursor() as cur:
         clause, params = _tester_condition("user_id")
         tester_param = params[0] if params else None
@@ -1411,39 +1414,14 @@ def fetch_overview_metrics(window_days: int = 7) -> Dict[str, Any]:
 
         active_today = unique_users_today
 
-        cur.execute(
-            """
-            SELECT status, COUNT(*) AS total
-            FROM bullying_reports
-            GROUP BY status
-            """
-        )
-        bullying_rows = cur.fetchall()
-        cur.execute(
-            """
-            SELECT COUNT(*) AS escalated_total
-            FROM bullying_reports
-            WHERE escalated = TRUE
-            """
-        )
-        escalated_total = cur.fetchone()["escalated_total"] or 0
-
     avg_response = response_stats["avg_response"] or 0.0
     p90_response = response_stats["p90_response"] or 0.0
 
-    bullying_summary = {status: 0 for status in BULLYING_STATUSES}
-    bullying_total = 0
-    for row in bullying_rows:
-        status = (row.get("status") or "").lower()
-        count = int(row.get("total") or 0)
-        if status in bullying_summary:
-            bullying_summary[status] = count
-            bullying_total += count
-    bullying_summary["total"] = bullying_total
-    bullying_summary["escalated"] = int(escalated_total or 0)
-
-    corruption_summary = fetch_corruption_summary()
-    psych_summary = fetch_psych_summary()
+    counters = fetch_inbox_counters()
+    bullying_summary = counters["bullying"]
+    bullying_total = bullying_summary["total"]
+    corruption_summary = counters["corruption"]
+    psych_summary = counters["psych"]
     corruption_active_total = int(
         (corruption_summary.get("total", 0) - corruption_summary.get("archived", 0))
         if corruption_summary
@@ -1626,6 +1604,62 @@ def fetch_chat_logs(
 
     return [dict(row) for row in rows], int(total or 0)
 
+def fetch_chat_log_archive_months() -> List[Dict[str, Any]]:
+    """Daftar bulan chat_logs yang sudah diarsipkan ke file (terbaru dulu)."""
+    return [
+        {"month": item["month"], "rows": item.get("rows") or 0}
+        for item in list_chat_log_archives()
+        if item.get("month")
+    ]
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=JAKARTA_TZ or timezone.utc)
+
+
+def fetch_archived_chat_logs(
+    month: date,
+    filters: ChatFilters,
+    limit: int = 50,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Versi fetch_chat_logs untuk partisi yang sudah diarsipkan.
+
+    File dibaca streaming; hanya ``offset + limit`` baris terbaru yang lolos filter
+    yang disimpan di memori.
+    """
+    start, end = _aware(filters.start), _aware(filters.end)
+    search = filters.search.lower() if filters.search else None
+    tester_ids = set(_load_tester_ids()) if _no_tester_active() else set()
+    newest: deque = deque(maxlen=offset + limit)
+    total = 0
+    try:
+        for row in iter_chat_log_archive(month):
+            created_at = row.get("created_at")
+            if start and (created_at is None or created_at < start):
+                continue
+            if end and (created_at is None or created_at > end):
+                continue
+            if filters.role and row.get("role") != filters.role:
+                continue
+            if filters.user_id and row.get("user_id") != filters.user_id:
+                continue
+            if filters.topic and row.get("topic") != filters.topic:
+                continue
+            if search and search not in (row.get("text") or "").lower():
+                continue
+            if tester_ids and row.get("user_id") in tester_ids:
+                continue
+            total += 1
+            newest.append(row)
+    except FileNotFoundError:
+        return [], 0
+    records = list(reversed(newest))[offset:offset + limit]
+    return records, total
+
+
 def fetch_conversation_thread(user_id: int, limit: int = 200) -> List[Dict[str, Any]]:
     if _no_tester_active() and user_id in set(_load_tester_ids()):
         return []
@@ -1943,110 +1977,260 @@ def fetch_twitter_worker_logs(limit: int = 100) -> List[Dict[str, Any]]:
 
 
 
-def fetch_bullying_summary() -> Dict[str, int]:
-    """Return aggregated counts of bullying reports by status."""
-    summary = {status: 0 for status in BULLYING_STATUSES}
-    total = 0
-    escalated_total = 0
+INBOX_COUNTERS_CACHE_SECONDS = float(os.getenv("DASHBOARD_INBOX_CACHE_SECONDS", "30"))
+
+_INBOX_COUNTERS_LOCK = threading.Lock()
+_INBOX_COUNTERS_CACHE: Dict[bool, Tuple[float, Dict[str, Any]]] = {}
+_INBOX_COUNTERS_GENERATION = 0
+
+
+def invalidate_inbox_counters() -> None:
+    """Drop cached inbox counters; called after report writes and on NOTIFY."""
+    global _INBOX_COUNTERS_GENERATION
+    with _INBOX_COUNTERS_LOCK:
+        _INBOX_COUNTERS_GENERATION += 1
+        _INBOX_COUNTERS_CACHE.clear()
+
+
+def _query_inbox_counters(clause: str, clause_params: List[Any]) -> Dict[str, Any]:
+    where = f"WHERE {clause}" if clause else ""
+    query = f"""
+        SELECT 'bullying' AS kind, status, NULL AS severity,
+               COUNT(*) AS total, COUNT(*) FILTER (WHERE escalated = TRUE) AS escalated
+        FROM bullying_reports
+        {where}
+        GROUP BY status
+        UNION ALL
+        SELECT 'psych', status, severity, COUNT(*), 0
+        FROM psych_reports
+        {where}
+        GROUP BY status, severity
+        UNION ALL
+        SELECT 'corruption', status, NULL, COUNT(*), 0
+        FROM corruption_reports
+        {where}
+        GROUP BY status
+    """
     with get_cursor() as cur:
-        clause, clause_params = _tester_condition("user_id")
-        query = [
-            "SELECT status, COUNT(*) AS total",
-            "FROM bullying_reports",
-        ]
-        if clause:
-            query.append(f"WHERE {clause}")
-        query.append("GROUP BY status")
-        cur.execute("\n".join(query), tuple(clause_params))
+        cur.execute(query, tuple(clause_params * 3))
         rows = cur.fetchall()
-        esc_query = "SELECT COUNT(*) FROM bullying_reports WHERE escalated = TRUE"
-        esc_params: List[Any] = []
-        if clause:
-            esc_query += f" AND {clause}"
-            esc_params.extend(clause_params)
-        cur.execute(esc_query, tuple(esc_params))
-        escalated_total = cur.fetchone()[0]
+
+    bullying = {status: 0 for status in BULLYING_STATUSES}
+    psych = {status: 0 for status in PSYCH_STATUSES}
+    severity_counts = {severity: 0 for severity in PSYCH_SEVERITIES}
+    corruption = {status: 0 for status in CORRUPTION_STATUSES}
+    bullying_total = psych_total = corruption_total = escalated_total = 0
+
     for row in rows:
-        status = (row.get('status') or '').lower()
-        count = int(row.get('total') or 0)
-        if status in summary:
-            summary[status] = count
-            total += count
-    summary['total'] = total
-    summary['escalated'] = int(escalated_total or 0)
-    return summary
+        raw_status = row["status"]
+        status = (raw_status or "").lower()
+        count = int(row["total"] or 0)
+        if row["kind"] == "bullying":
+            escalated_total += int(row["escalated"] or 0)
+            if status in bullying:
+                bullying[status] += count
+                bullying_total += count
+        elif row["kind"] == "psych":
+            if status in psych:
+                psych[status] += count
+                if status != "archived":
+                    psych_total += count
+            severity = (row["severity"] or "").lower()
+            if raw_status != "archived" and severity in severity_counts:
+                severity_counts[severity] += count
+        elif status in corruption:
+            corruption[status] += count
+            corruption_total += count
+
+    bullying["total"] = bullying_total
+    bullying["escalated"] = escalated_total
+    psych["total"] = psych_total
+    psych["severity"] = severity_counts
+    psych["critical"] = severity_counts.get("critical", 0)
+    psych["elevated"] = severity_counts.get("elevated", 0)
+    psych["general"] = severity_counts.get("general", 0)
+    corruption["total"] = corruption_total
+    pending = {
+        "bullying": bullying["pending"],
+        "psych": psych["open"],
+        "corruption": corruption["open"],
+    }
+    pending["total"] = sum(pending.values())
+    return {
+        "bullying": bullying,
+        "psych": psych,
+        "corruption": corruption,
+        "pending": pending,
+    }
+
+
+def fetch_inbox_counters() -> Dict[str, Any]:
+    """
+    Return bullying/psych/corruption status counters plus pending badge counts.
+    Answered by one grouped query and cached per tester filter; write paths and the
+    inbox NOTIFY listener invalidate the cache, the TTL is only a safety net.
+    """
+    clause, clause_params = _tester_condition("user_id")
+    key = bool(clause)
+    now = time.monotonic()
+    with _INBOX_COUNTERS_LOCK:
+        entry = _INBOX_COUNTERS_CACHE.get(key)
+        if entry and entry[0] > now:
+            return copy.deepcopy(entry[1])
+        generation = _INBOX_COUNTERS_GENERATION
+
+    counters = _query_inbox_counters(clause, clause_params)
+    if INBOX_COUNTERS_CACHE_SECONDS > 0:
+        with _INBOX_COUNTERS_LOCK:
+            # Skip storing when a write invalidated the cache while we were querying
+            if generation == _INBOX_COUNTERS_GENERATION:
+                _INBOX_COUNTERS_CACHE[key] = (now + INBOX_COUNTERS_CACHE_SECONDS, counters)
+    return copy.deepcopy(counters)
+
+
+def fetch_bullying_summary() -> Dict[str, int]:
+    """Return aggregated counts of bullying reports by status."""
+    return fetch_inbox_counters()["bullying"]
 
 
 def fetch_pending_bullying_count() -> int:
     """Shortcut to obtain the number of pending bullying reports."""
-    return fetch_bullying_summary().get('pending', 0)
+    return fetch_inbox_counters()["pending"]["bullying"]
 
 
 def fetch_psych_summary() -> Dict[str, Any]:
     """Return aggregated counts of psychological reports by status and severity."""
-    summary = {status: 0 for status in PSYCH_STATUSES}
-    severity_counts = {severity: 0 for severity in PSYCH_SEVERITIES}
-    total = 0
-    clause, clause_params = _tester_condition("user_id")
-
-    with get_cursor() as cur:
-        status_query = [
-            "SELECT status, COUNT(*) AS total",
-            "FROM psych_reports",
-        ]
-        if clause:
-            status_query.append(f"WHERE {clause}")
-        status_query.append("GROUP BY status")
-        cur.execute("\n".join(status_query), tuple(clause_params))
-        status_rows = cur.fetchall()
-
-        severity_query = [
-            "SELECT severity, COUNT(*) AS total",
-            "FROM psych_reports",
-            "WHERE status IS NULL OR status <> 'archived'",
-        ]
-        severity_params: List[Any] = []
-        if clause:
-            severity_query.append(f"  AND {clause}")
-            severity_params.extend(clause_params)
-        severity_query.append("GROUP BY severity")
-        cur.execute("\n".join(severity_query), tuple(severity_params))
-        severity_rows = cur.fetchall()
-
-    for row in status_rows:
-        status = (row.get('status') or '').lower()
-        count = int(row.get('total') or 0)
-        if status in summary:
-            summary[status] = count
-            if status != "archived":
-                total += count
-
-    for row in severity_rows:
-        severity = (row.get('severity') or '').lower()
-        count = int(row.get('total') or 0)
-        if severity in severity_counts:
-            severity_counts[severity] = count
-
-    summary['total'] = total
-    summary['severity'] = severity_counts
-    summary['critical'] = severity_counts.get('critical', 0)
-    summary['elevated'] = severity_counts.get('elevated', 0)
-    summary['general'] = severity_counts.get('general', 0)
-    return summary
+    return fetch_inbox_counters()["psych"]
 
 
 def fetch_pending_psych_count() -> int:
     """Return number of open psychological reports."""
-    clause, clause_params = _tester_condition("user_id")
-    query = "SELECT COUNT(*) FROM psych_reports WHERE status = 'open'"
+    return fetch_inbox_counters()["pending"]["psych"]
+
+
+_BULLYING_LIST_COLUMNS = """
+    br.id,
+    br.chat_log_id,
+    br.user_id,
+    br.username,
+    br.description,
+    br.status,
+    br.priority,
+    br.notes,
+    br.created_at,
+    br.updated_at,
+    br.last_updated_by,
+    br.category,
+    br.severity,
+    br.metadata,
+    br.assigned_to,
+    br.due_at,
+    br.resolved_at,
+    br.escalated,
+    cl.created_at AS chat_created_at
+"""
+
+_PSYCH_GROUP_EXPR = "COALESCE(CAST(pr.user_id AS TEXT), CONCAT('report-', pr.id))"
+
+_CORRUPTION_LIST_COLUMNS = """
+    id,
+    ticket_id,
+    user_id,
+    status,
+    involved,
+    location,
+    time,
+    chronology,
+    created_at,
+    updated_at
+"""
+
+# Max rows a list page back-fills after its report stream reconnects.
+REPORT_STREAM_BACKFILL_LIMIT = 20
+
+
+def _bullying_list_record(row: Any) -> Dict[str, Any]:
+    record = dict(row)
+    description = record.get("description") or ""
+    if description:
+        preview = description.split("\n\n", 1)[0].strip()
+    else:
+        preview = ""
+    record["description_preview"] = preview
+    return record
+
+
+def _psych_list_record(row: Any) -> Dict[str, Any]:
+    record = dict(row)
+    message_text = record.get("message") or ""
+    if message_text:
+        message_preview = message_text.split("\n\n", 1)[0].strip()
+    else:
+        message_preview = ""
+    summary_text = record.get("summary") or ""
+    if summary_text:
+        summary_preview = summary_text.split("\n\n", 1)[0].strip()
+    else:
+        summary_preview = message_preview
+    record["message_preview"] = message_preview
+    record["summary_preview"] = summary_preview or message_preview
+    return record
+
+
+def fetch_report_rows(
+    kind: str,
+    *,
+    report_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = REPORT_STREAM_BACKFILL_LIMIT,
+) -> List[Dict[str, Any]]:
+    """
+    Return bullying/psych/corruption rows shaped like the list pages, either one report
+    or the newest ones with id > after_id (oldest first so clients can prepend in order).
+    """
+    if report_id is None and after_id is None:
+        raise ValueError("Either report_id or after_id must be provided")
+
+    if kind == "bullying":
+        select = f"SELECT {_BULLYING_LIST_COLUMNS} FROM bullying_reports br LEFT JOIN chat_logs cl ON cl.id = br.chat_log_id"
+        alias, shape = "br.", _bullying_list_record
+    elif kind == "psych":
+        select = (
+            f"SELECT pr.*, cl.created_at AS chat_created_at, {_PSYCH_GROUP_EXPR} AS group_key "
+            "FROM psych_reports pr LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id"
+        )
+        alias, shape = "pr.", _psych_list_record
+    elif kind == "corruption":
+        select = f"SELECT {_CORRUPTION_LIST_COLUMNS} FROM corruption_reports"
+        alias, shape = "", dict
+    else:
+        raise ValueError(f"Jenis laporan tidak dikenal: {kind}")
+
+    conditions: List[str] = []
     params: List[Any] = []
-    if clause:
-        query += f" AND {clause}"
-        params.extend(clause_params)
+    if report_id is not None:
+        conditions.append(f"{alias}id = %s")
+        params.append(report_id)
+    else:
+        conditions.append(f"{alias}id > %s")
+        params.append(after_id)
+    tester_clause, tester_params = _tester_condition(f"{alias}user_id")
+    if tester_clause:
+        conditions.append(tester_clause)
+        params.extend(tester_params)
+
+    query = f"{select} WHERE {' AND '.join(conditions)} ORDER BY {alias}id DESC LIMIT %s"
     with get_cursor() as cur:
-        cur.execute(query, tuple(params))
-        row = cur.fetchone()
-    return int(row[0] if row else 0)
+        cur.execute(query, (*params, max(1, limit)))
+        rows = cur.fetchall()
+    return [shape(row) for row in reversed(rows)]
+
+
+def is_hidden_tester(user_id: Optional[int]) -> bool:
+    """Return True when the current request hides data from this tester user_id."""
+    if user_id is None or not _no_tester_active():
+        return False
+    return int(user_id) in _load_tester_ids()
 
 
 def fetch_bullying_reports(
@@ -2077,27 +2261,8 @@ def fetch_bullying_reports(
         where_clause = ' WHERE ' + ' AND '.join(conditions)
 
     query = (
+        f"SELECT {_BULLYING_LIST_COLUMNS}"
         """
-        SELECT
-            br.id,
-            br.chat_log_id,
-            br.user_id,
-            br.username,
-            br.description,
-            br.status,
-            br.priority,
-            br.notes,
-            br.created_at,
-            br.updated_at,
-            br.last_updated_by,
-            br.category,
-            br.severity,
-            br.metadata,
-            br.assigned_to,
-            br.due_at,
-            br.resolved_at,
-            br.escalated,
-            cl.created_at AS chat_created_at
         FROM bullying_reports br
         LEFT JOIN chat_logs cl ON cl.id = br.chat_log_id
         """
@@ -2114,18 +2279,97 @@ def fetch_bullying_reports(
         )
         total = cur.fetchone()[0]
 
-    records: List[Dict[str, Any]] = []
-    for row in rows:
-        record = dict(row)
-        description = record.get("description") or ""
-        if description:
-            preview = description.split("\n\n", 1)[0].strip()
-        else:
-            preview = ""
-        record["description_preview"] = preview
-        records.append(record)
+    return [_bullying_list_record(row) for row in rows], int(total or 0)
+
+
+_PSYCH_SEVERITY_RANK = (
+    "CASE WHEN {column} = 'critical' THEN 2 WHEN {column} = 'elevated' THEN 1 ELSE 0 END"
+)
 
-    return records, int(total or 0)
+
+def fetch_psych_group_page(
+    cur: Any,
+    conditions: List[str],
+    params: List[Any],
+    *,
+    limit: int,
+    offset: int,
+) -> Tuple[List[Any], int]:
+    """
+    Page psych report groups in a single statement on an open cursor.
+
+    Per-student counts and latest timestamps come from one aggregate over the filtered rows,
+    the latest report itself from an index probe on (user_id, created_at), and anonymous reports
+    form their own groups. Only the rows on the requested page are joined back to
+    psych_reports/chat_logs. `conditions` reference the `pr` alias.
+    """
+    filters = "".join(f" AND {condition}" for condition in conditions)
+    query = f"""
+        WITH per_student AS (
+            SELECT pr.user_id, COUNT(*) AS report_count, MAX(pr.created_at) AS latest_at
+            FROM psych_reports pr
+            WHERE pr.user_id IS NOT NULL{filters}
+            GROUP BY pr.user_id
+        ),
+        latest AS (
+            SELECT latest_report.id, latest_report.severity, latest_report.created_at, ps.report_count
+            FROM per_student ps
+            CROSS JOIN LATERAL (
+                SELECT pr.id, pr.severity, pr.created_at
+                FROM psych_reports pr
+                WHERE pr.user_id = ps.user_id AND pr.created_at = ps.latest_at{filters}
+                ORDER BY pr.id DESC
+                LIMIT 1
+            ) latest_report
+            UNION ALL
+            SELECT pr.id, pr.severity, pr.created_at, 1
+            FROM psych_reports pr
+            WHERE pr.user_id IS NULL{filters}
+        ),
+        page AS (
+            SELECT latest.*, COUNT(*) OVER () AS total_groups
+            FROM latest
+            ORDER BY {_PSYCH_SEVERITY_RANK.format(column="latest.severity")} DESC,
+                latest.created_at DESC, latest.id DESC
+            LIMIT %s OFFSET %s
+        )
+        SELECT
+            pr.id,
+            pr.chat_log_id,
+            pr.user_id,
+            pr.username,
+            pr.message,
+            pr.summary,
+            pr.severity,
+            pr.status,
+            pr.metadata,
+            pr.created_at,
+            pr.updated_at,
+            cl.created_at AS chat_created_at,
+            {_PSYCH_GROUP_EXPR} AS group_key,
+            page.report_count,
+            page.total_groups
+        FROM page
+        JOIN psych_reports pr ON pr.id = page.id
+        LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id
+        ORDER BY {_PSYCH_SEVERITY_RANK.format(column="page.severity")} DESC,
+            page.created_at DESC, page.id DESC
+    """
+    cur.execute(query, (*params, *params, *params, limit, offset))
+    rows = cur.fetchall()
+    if rows:
+        return rows, int(rows[0]["total_groups"] or 0)
+    if not offset:
+        return rows, 0
+
+    # Page past the end: the window total is unavailable, count groups directly.
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    cur.execute(
+        "SELECT COUNT(DISTINCT pr.user_id) + COUNT(*) FILTER (WHERE pr.user_id IS NULL)"
+        " FROM psych_reports pr" + where_clause,
+        tuple(params),
+    )
+    return rows, int(cur.fetchone()[0] or 0)
 
 
 def fetch_psych_reports(
@@ -2135,10 +2379,13 @@ def fetch_psych_reports(
     limit: int = 50,
     offset: int = 0,
 ) -> Tuple[List[Dict[str, Any]], int]:
-    """Return paginated psychological reports ordered by severity and recency."""
+    """
+    Return one page of psych report groups (a student, or a single anonymous report)
+    represented by their latest matching report, ordered by severity and recency.
+    The total counts groups, not raw reports.
+    """
     conditions: List[str] = []
     params: List[Any] = []
-    group_expr = "COALESCE(CAST(pr.user_id AS TEXT), CONCAT('report-', pr.id))"
 
     if status:
         normalized_status = status.lower()
@@ -2158,80 +2405,10 @@ def fetch_psych_reports(
         conditions.append(tester_clause)
         params.extend(tester_params)
 
-    where_clause = ""
-    if conditions:
-        where_clause = " WHERE " + " AND ".join(conditions)
-
-    filtered_cte = (
-        """
-        WITH filtered AS (
-            SELECT
-                pr.*,
-                cl.created_at AS chat_created_at,
-                {group_expr} AS group_key,
-                ROW_NUMBER() OVER (
-                    PARTITION BY {group_expr}
-                    ORDER BY pr.created_at DESC
-                ) AS row_no
-            FROM psych_reports pr
-            LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id
-            {where_clause}
-        )
-        """
-    ).format(group_expr=group_expr, where_clause=where_clause)
-
-    query = (
-        filtered_cte
-        + """
-        SELECT
-            id,
-            chat_log_id,
-            user_id,
-            username,
-            message,
-            summary,
-            severity,
-            status,
-            metadata,
-            created_at,
-            updated_at,
-            chat_created_at,
-            group_key
-        FROM filtered
-        WHERE row_no = 1
-        ORDER BY CASE WHEN severity = 'critical' THEN 2 WHEN severity = 'elevated' THEN 1 ELSE 0 END DESC, created_at DESC
-        LIMIT %s OFFSET %s
-        """
-    )
-
     with get_cursor() as cur:
-        cur.execute(query, (*params, limit, offset))
-        rows = cur.fetchall()
-        count_query = (
-            filtered_cte
-            + "SELECT COUNT(DISTINCT group_key) FROM filtered"
-        )
-        cur.execute(count_query, params)
-        total = cur.fetchone()[0] if cur.rowcount else 0
+        rows, total = fetch_psych_group_page(cur, conditions, params, limit=limit, offset=offset)
 
-    records: List[Dict[str, Any]] = []
-    for row in rows:
-        record = dict(row)
-        message_text = record.get("message") or ""
-        if message_text:
-            message_preview = message_text.split("\n\n", 1)[0].strip()
-        else:
-            message_preview = ""
-        summary_text = record.get("summary") or ""
-        if summary_text:
-            summary_preview = summary_text.split("\n\n", 1)[0].strip()
-        else:
-            summary_preview = message_preview
-        record["message_preview"] = message_preview
-        record["summary_preview"] = summary_preview or message_preview
-        records.append(record)
-
-    return records, int(total or 0)
+    return [_psych_list_record(row) for row in rows], int(total or 0)
 
 
 def fetch_psych_group_reports(
@@ -2245,57 +2422,37 @@ def fetch_psych_group_reports(
 
     tester_clause, tester_params = _tester_condition("pr.user_id")
 
+    if user_id is not None:
+        conditions = ["pr.user_id = %s"]
+        params: List[Any] = [user_id]
+    else:
+        conditions = ["pr.id = %s"]
+        params = [report_id]
+    if tester_clause:
+        conditions.append(tester_clause)
+        params.extend(tester_params)
+
+    query = f"""
+        SELECT
+            pr.id,
+            pr.chat_log_id,
+            pr.user_id,
+            pr.username,
+            pr.message,
+            pr.summary,
+            pr.severity,
+            pr.status,
+            pr.metadata,
+            pr.created_at,
+            pr.updated_at,
+            cl.created_at AS chat_created_at
+        FROM psych_reports pr
+        LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY pr.created_at DESC, pr.id DESC
+    """
     with get_cursor() as cur:
-        if user_id is not None:
-            query_parts = [
-                "SELECT",
-                "    pr.id,",
-                "    pr.chat_log_id,",
-                "    pr.user_id,",
-                "    pr.username,",
-                "    pr.message,",
-                "    pr.summary,",
-                "    pr.severity,",
-                "    pr.status,",
-                "    pr.metadata,",
-                "    pr.created_at,",
-                "    pr.updated_at,",
-                "    cl.created_at AS chat_created_at",
-                "FROM psych_reports pr",
-                "LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id",
-                "WHERE pr.user_id = %s",
-            ]
-            params: List[Any] = [user_id]
-            if tester_clause:
-                query_parts.append(f"  AND {tester_clause}")
-                params.extend(tester_params)
-            query_parts.append("ORDER BY pr.created_at DESC")
-            cur.execute("\n".join(query_parts), tuple(params))
-        else:
-            query_parts = [
-                "SELECT",
-                "    pr.id,",
-                "    pr.chat_log_id,",
-                "    pr.user_id,",
-                "    pr.username,",
-                "    pr.message,",
-                "    pr.summary,",
-                "    pr.severity,",
-                "    pr.status,",
-                "    pr.metadata,",
-                "    pr.created_at,",
-                "    pr.updated_at,",
-                "    cl.created_at AS chat_created_at",
-                "FROM psych_reports pr",
-                "LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id",
-                "WHERE pr.id = %s",
-            ]
-            params = [report_id]
-            if tester_clause:
-                query_parts.append(f"  AND {tester_clause}")
-                params.extend(tester_params)
-            query_parts.append("ORDER BY pr.created_at DESC")
-            cur.execute("\n".join(query_parts), tuple(params))
+        cur.execute(query, tuple(params))
         rows = cur.fetchall()
 
     records: List[Dict[str, Any]] = []
@@ -2371,7 +2528,12 @@ def update_psych_report_status(
             """,
             (normalized, metadata_param, report_id),
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            notify_inbox_change(cur, "psych", "status", report_id)
+    if updated:
+        invalidate_inbox_counters()
+    return updated
 
 def bulk_update_psych_report_status(
     report_ids: List[int],
@@ -2407,19 +2569,23 @@ def bulk_update_psych_report_status(
                 """,
                 (target_status, report_ids),
             )
-            return cur.rowcount > 0
-
-        # Update all reports for the found user_ids
-        cur.execute(
-            """
-            UPDATE psych_reports
-            SET status = %s,
-                updated_at = NOW()
-            WHERE user_id = ANY(%s::int[])
-            """,
-            (target_status, user_ids),
-        )
-        return cur.rowcount > 0
+        else:
+            # Update all reports for the found user_ids
+            cur.execute(
+                """
+                UPDATE psych_reports
+                SET status = %s,
+                    updated_at = NOW()
+                WHERE user_id = ANY(%s::int[])
+                """,
+                (target_status, user_ids),
+            )
+        updated = cur.rowcount > 0
+        if updated:
+            notify_inbox_change(cur, "psych", "status")
+    if updated:
+        invalidate_inbox_counters()
+    return updated
 
 
 def update_bullying_report_status(
@@ -2541,6 +2707,11 @@ def update_bullying_report_status(
             VALUES (%s, %s, %s, %s)
         """
         cur.execute(_insert_event, (report_id, event_type, updated_by, Json(payload)))
+        counters_changed = "status" in changes or "escalated" in changes
+        if counters_changed:
+            notify_inbox_change(cur, "bullying", "status", report_id)
+    if counters_changed:
+        invalidate_inbox_counters()
     return True
 
 def bulk_update_bullying_report_status(
@@ -2569,7 +2740,12 @@ def bulk_update_bullying_report_status(
             """,
             (target_status, updated_by, report_ids),
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            notify_inbox_change(cur, "bullying", "status")
+    if updated:
+        invalidate_inbox_counters()
+    return updated
 
 
 def fetch_bullying_report_detail(report_id: int) -> Optional[Dict[str, Any]]:
@@ -2645,32 +2821,12 @@ def fetch_bullying_report_basic(report_id: int) -> Optional[Dict[str, Any]]:
 
 def fetch_corruption_summary() -> Dict[str, int]:
     """Return aggregated counts of corruption reports by status."""
-    summary = {status: 0 for status in CORRUPTION_STATUSES}
-    total = 0
-    clause, clause_params = _tester_condition("user_id")
-    with get_cursor() as cur:
-        query_parts = [
-            "SELECT status, COUNT(*) AS total",
-            "FROM corruption_reports",
-        ]
-        if clause:
-            query_parts.append(f"WHERE {clause}")
-        query_parts.append("GROUP BY status")
-        cur.execute("\n".join(query_parts), tuple(clause_params))
-        rows = cur.fetchall()
-    for row in rows:
-        status = (row.get('status') or '').lower()
-        count = int(row.get('total') or 0)
-        if status in summary:
-            summary[status] = count
-            total += count
-    summary['total'] = total
-    return summary
+    return fetch_inbox_counters()["corruption"]
 
 
 def fetch_pending_corruption_count() -> int:
     """Shortcut to obtain the number of open corruption reports."""
-    return fetch_corruption_summary().get('open', 0)
+    return fetch_inbox_counters()["pending"]["corruption"]
 
 
 def fetch_corruption_reports(
@@ -2701,20 +2857,7 @@ def fetch_corruption_reports(
         where_clause = ' WHERE ' + ' AND '.join(conditions)
 
     query = (
-        """
-        SELECT
-            id,
-            ticket_id,
-            user_id,
-            status,
-            involved,
-            location,
-            time,
-            chronology,
-            created_at,
-            updated_at
-        FROM corruption_reports
-        """
+        f"SELECT {_CORRUPTION_LIST_COLUMNS} FROM corruption_reports"
         + where_clause
         + " ORDER BY created_at DESC LIMIT %s OFFSET %s"
     )
@@ -2809,7 +2952,12 @@ def bulk_update_corruption_report_status(
             """,
             (target_status, report_ids),
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            notify_inbox_change(cur, "corruption", "status")
+    if updated:
+        invalidate_inbox_counters()
+    return updated
 
 
 def update_corruption_report_status(
@@ -2835,7 +2983,12 @@ def update_corruption_report_status(
             """,
             (normalized, report_id)
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            notify_inbox_change(cur, "corruption", "status", report_id)
+    if updated:
+        invalidate_inbox_counters()
+    return updated
 
 
 def get_user_by_email(email: str) -> Optional[DictRow]:
@@ -3177,7 +3330,14 @@ def update_web_user_status(user_id: int, status: str, reason: Optional[str], *,
             """,
             (normalized, cleaned_reason, changed_by, user_id),
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            # Dikirim saat commit; bot/web membuang cache status user ini.
+            cur.execute(
+                "SELECT pg_notify(%s, %s)",
+                (ACCOUNT_STATUS_NOTIFY_CHANNEL, f"web:{user_id}"),
+            )
+        return updated
 
 
 def update_telegram_user_status(user_id: int, status: str, reason: Optional[str], *, changed_by: str) -> bool:
@@ -3199,7 +3359,14 @@ def update_telegram_user_status(user_id: int, status: str, reason: Optional[str]
             """,
             (normalized, cleaned_reason, changed_by, user_id),
         )
-        return cur.rowcount > 0
+        updated = cur.rowcount > 0
+        if updated:
+            # Dikirim saat commit; bot/web membuang cache status user ini.
+            cur.execute(
+                "SELECT pg_notify(%s, %s)",
+                (ACCOUNT_STATUS_NOTIFY_CHANNEL, f"telegram:{user_id}"),
+            )
+        return updated
 
 
 # --- Chat Feedback queries --------------------------------------------------
@@ -22,6 +22,7 @@ from flask import (
     url_for,
     session,
     current_app,
+    stream_with_context,
 )
 from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
@@ -40,6 +41,8 @@ from .queries import (
     fetch_bullying_summary,
     fetch_bullying_report_detail,
     fetch_bullying_report_basic,
+    fetch_archived_chat_logs,
+    fetch_chat_log_archive_months,
     fetch_chat_logs,
     fetch_conversation_thread,
     fetch_daily_activity,
@@ -59,6 +62,10 @@ from .queries import (
     fetch_corruption_report_detail,
     bulk_update_corruption_report_status,
     update_corruption_report_status,
+    fetch_inbox_counters,
+    fetch_report_rows,
+    is_hidden_tester,
+    REPORT_STREAM_BACKFILL_LIMIT,
     fetch_twitter_overview,
     fetch_twitter_activity,
     fetch_twitter_top_users,
@@ -88,6 +95,7 @@ from .queries import (
     update_landingpage_graduation_metadata,
     delete_landingpage_graduations,
 )
+from .inbox_stream import iter_inbox_stream
 from .attendance.queries import (
     fetch_students_for_class,
     get_school_class,
@@ -1337,10 +1345,22 @@ def chats() -> Response:
     user_id = args.get("user_id")
     user_id = int(user_id) if user_id else None
 
+    archive = args.get("archive") or None
+    archive_month = None
+    if archive:
+        try:
+            archive_month = datetime.strptime(archive, "%Y-%m").date()
+        except ValueError:
+            archive = None
+
     filters = ChatFilters(start=start, end=end, role=role, search=search, user_id=user_id)
     offset = (page - 1) * PAGE_SIZE
 
-    records, total = fetch_chat_logs(filters=filters, limit=PAGE_SIZE, offset=offset)
+    if archive_month:
+        # Partisi lama sudah dipindah ke file arsip; baca langsung dari file
+        records, total = fetch_archived_chat_logs(archive_month, filters=filters, limit=PAGE_SIZE, offset=offset)
+    else:
+        records, total = fetch_chat_logs(filters=filters, limit=PAGE_SIZE, offset=offset)
     total_pages = max(1, ceil(total / PAGE_SIZE))
 
     export_params = {}
@@ -1365,6 +1385,8 @@ def chats() -> Response:
         total_pages=total_pages,
         filters=filters,
         export_url=export_url,
+        archive=archive,
+        archive_months=fetch_chat_log_archive_months(),
     )
 
 
@@ -1814,6 +1836,71 @@ def activity_api() -> Response:
     return jsonify(payload)
 
 
+REPORT_ROW_TEMPLATES = {
+    "bullying": "partials/bullying_report_row.html",
+    "psych": "partials/psych_report_row.html",
+    "corruption": "partials/corruption_report_row.html",
+}
+
+
+def _report_row_payload(kind: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Render one new report as a list-page row, or None when this session hides it."""
+    if is_hidden_tester(record.get("user_id")):
+        return None
+    severity = (record.get("severity") or "").lower() or None
+    return {
+        "kind": kind,
+        "id": record.get("id"),
+        "status": record.get("status"),
+        "severity": severity,
+        "critical": severity == "critical" or bool(record.get("escalated")),
+        "group": record.get("group_key"),
+        "html": render_template(REPORT_ROW_TEMPLATES[kind], item=record),
+    }
+
+
+@main_bp.route("/api/inbox/stream")
+@login_required
+def inbox_stream() -> Response:
+    """Server-Sent Events carrying pending report counts and newly filed report rows."""
+
+    def pending_counters() -> Dict[str, int]:
+        return fetch_inbox_counters()["pending"]
+
+    response = Response(
+        stream_with_context(iter_inbox_stream(pending_counters, _report_row_payload)),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Matikan buffering nginx supaya event langsung sampai ke browser
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@main_bp.route("/api/inbox/reports")
+@login_required
+def inbox_new_reports() -> Response:
+    """Rows filed after ``after`` for one report list; used to fill gaps after a reconnect."""
+    kind = (request.args.get("kind") or "").strip().lower()
+    if kind not in REPORT_ROW_TEMPLATES:
+        return jsonify({"success": False, "message": "Jenis laporan tidak dikenal."}), 400
+    try:
+        after_id = max(0, int(request.args.get("after", 0)))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "Parameter after tidak valid."}), 400
+
+    records = fetch_report_rows(kind, after_id=after_id)
+    reports = [payload for payload in (_report_row_payload(kind, record) for record in records) if payload]
+    return jsonify(
+        {
+            "success": True,
+            "reports": reports,
+            # Terpotong: halaman sebaiknya dimuat ulang daripada menyisipkan sebagian
+            "truncated": len(records) >= REPORT_STREAM_BACKFILL_LIMIT,
+        }
+    )
+
+
 @main_bp.route("/feedback")
 @login_required
 def feedback() -> Response:
@@ -234,7 +234,7 @@ ON extracurricular_attendance_records (extracurricular_id, attendance_date);
 _BULLYING_REPORTS_SQL = """
 CREATE TABLE IF NOT EXISTS bullying_reports (
     id SERIAL PRIMARY KEY,
-    chat_log_id INTEGER UNIQUE REFERENCES chat_logs(id) ON DELETE CASCADE,
+    chat_log_id INTEGER UNIQUE,
     user_id BIGINT,
     username TEXT,
     description TEXT NOT NULL,
@@ -459,6 +459,67 @@ _BOOKS_CODE_INDEX_SQL = """
 CREATE INDEX IF NOT EXISTS idx_books_code ON books (code);
 """
 
+# Sumber rentang kode buku untuk import katalog massal (disinkronkan ke MAX(code) saat import)
+_BOOK_CODE_SEQUENCE_SQL = """
+CREATE SEQUENCE IF NOT EXISTS book_code_seq AS BIGINT;
+"""
+
+_BOOKS_CREATED_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_books_created_at ON books (created_at DESC);
+"""
+
+# Counter per buku untuk daftar buku; dijaga dengan delta oleh library/queries.py
+_BOOK_COUNTER_COLUMNS = (
+    ("available_items", "INTEGER NOT NULL DEFAULT 0"),
+    ("borrowed_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("total_items", "INTEGER NOT NULL DEFAULT 0"),
+    ("next_item_seq", "INTEGER NOT NULL DEFAULT 1"),
+)
+
+# Hitung ulang counter dari book_items/borrowing_records; hanya baris yang meleset yang ditulis
+_BOOK_COUNTERS_RECOUNT_SQL = """
+UPDATE books b
+SET available_items = c.available_items,
+    borrowed_count = c.borrowed_count,
+    total_items = c.total_items,
+    next_item_seq = GREATEST(b.next_item_seq, c.next_item_seq)
+FROM (
+    SELECT bk.id,
+           COALESCE(i.available_items, 0) AS available_items,
+           COALESCE(r.borrowed_count, 0) AS borrowed_count,
+           COALESCE(i.total_items, 0) AS total_items,
+           COALESCE(i.max_seq, 0) + 1 AS next_item_seq
+    FROM books bk
+    LEFT JOIN (
+        SELECT book_id,
+               COUNT(*) FILTER (WHERE status = 'available') AS available_items,
+               COUNT(*) AS total_items,
+               MAX(substring(qr_code FROM '-([0-9]{1,9})$')::INTEGER) AS max_seq
+        FROM book_items
+        GROUP BY book_id
+    ) i ON i.book_id = bk.id
+    LEFT JOIN (
+        SELECT book_id, COUNT(*) AS borrowed_count
+        FROM borrowing_records
+        WHERE status = 'borrowed'
+        GROUP BY book_id
+    ) r ON r.book_id = bk.id
+) c
+WHERE b.id = c.id
+  AND (
+      (b.available_items, b.borrowed_count, b.total_items)
+          IS DISTINCT FROM (c.available_items, c.borrowed_count, c.total_items)
+      OR b.next_item_seq < c.next_item_seq
+  )
+"""
+
+# Indeks trigram untuk pencarian ILIKE '%...%' pada judul, penulis, dan kode
+_BOOK_SEARCH_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_books_title_trgm ON books USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_books_author_trgm ON books USING gin (author gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_books_code_trgm ON books USING gin (code gin_trgm_ops)",
+)
+
 _BOOK_ITEMS_SQL = """
 CREATE TABLE IF NOT EXISTS book_items (
     id SERIAL PRIMARY KEY,
@@ -479,6 +540,11 @@ _BOOK_ITEMS_BOOK_INDEX_SQL = """
 CREATE INDEX IF NOT EXISTS idx_book_items_book_id ON book_items (book_id);
 """
 
+# Antrian cetak label: item yang belum ditempeli QR
+_BOOK_ITEMS_UNLABELED_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_book_items_unlabeled ON book_items (id) WHERE is_labeled IS NOT TRUE;
+"""
+
 _BORROWING_RECORDS_SQL = """
 CREATE TABLE IF NOT EXISTS borrowing_records (
     id SERIAL PRIMARY KEY,
@@ -509,10 +575,25 @@ _BORROWING_RECORDS_ITEM_INDEX_SQL = """
 CREATE INDEX IF NOT EXISTS idx_borrowing_records_book_item ON borrowing_records (book_item_id);
 """
 
+# Scan sirkulasi batch dari halaman peminjaman; scan_id dibuat klien sehingga kiriman ulang tidak diproses dua kali
+_LIBRARY_CIRCULATION_SCANS_SQL = """
+CREATE TABLE IF NOT EXISTS library_circulation_scans (
+    scan_id TEXT PRIMARY KEY,
+    action TEXT NOT NULL CHECK (action IN ('borrow', 'return')),
+    qr_code TEXT NOT NULL,
+    student_id INTEGER,
+    status TEXT NOT NULL,
+    borrow_id INTEGER REFERENCES borrowing_records(id) ON DELETE SET NULL,
+    scanned_at TIMESTAMPTZ,
+    recorded_by INTEGER REFERENCES dashboard_users(id) ON DELETE SET NULL,
+    processed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
 _CHAT_FEEDBACK_SQL = """
 CREATE TABLE IF NOT EXISTS chat_feedback (
     id SERIAL PRIMARY KEY,
-    chat_log_id INTEGER NOT NULL REFERENCES chat_logs(id) ON DELETE CASCADE,
+    chat_log_id INTEGER NOT NULL,
     user_id BIGINT NOT NULL,
     username TEXT,
     feedback_type TEXT NOT NULL CHECK (feedback_type IN ('like', 'dislike')),
@@ -585,12 +666,15 @@ def ensure_dashboard_schema() -> None:
         _TELEGRAM_USERS_INDEX_STATUS,
         _BOOKS_SQL,
         _BOOKS_CODE_INDEX_SQL,
+        _BOOKS_CREATED_INDEX_SQL,
+        _BOOK_CODE_SEQUENCE_SQL,
         _BOOK_ITEMS_SQL,
         _BOOK_ITEMS_QR_INDEX_SQL,
         _BOOK_ITEMS_BOOK_INDEX_SQL,
         _BORROWING_RECORDS_SQL,
         _BORROWING_RECORDS_STUDENT_INDEX_SQL,
         _BORROWING_RECORDS_STATUS_INDEX_SQL,
+        _LIBRARY_CIRCULATION_SCANS_SQL,
         _CHAT_FEEDBACK_SQL,
         _CHAT_FEEDBACK_CHAT_LOG_INDEX_SQL,
         _CHAT_FEEDBACK_USER_INDEX_SQL,
@@ -636,6 +720,8 @@ def ensure_dashboard_schema() -> None:
         "ALTER TABLE extracurricular_attendance_records ADD COLUMN IF NOT EXISTS accuracy_meters DOUBLE PRECISION",
         "ALTER TABLE extracurricular_attendance_records ADD COLUMN IF NOT EXISTS address TEXT",
         "ALTER TABLE extracurricular_attendance_records ADD COLUMN IF NOT EXISTS material TEXT",
+        "ALTER TABLE book_items ADD COLUMN IF NOT EXISTS is_labeled BOOLEAN DEFAULT FALSE",
+        _BOOK_ITEMS_UNLABELED_INDEX_SQL,
         "ALTER TABLE borrowing_records ADD COLUMN IF NOT EXISTS book_item_id INTEGER REFERENCES book_items(id) ON DELETE SET NULL",
         "ALTER TABLE borrowing_records ADD COLUMN IF NOT EXISTS returned_by INTEGER REFERENCES dashboard_users(id) ON DELETE SET NULL",
         _BORROWING_RECORDS_ITEM_INDEX_SQL,
@@ -651,6 +737,53 @@ def ensure_dashboard_schema() -> None:
             cur.execute(statement)
         ensure_tka_schema_tables(cur)
         ensure_sequences_integrity(cur)
+        ensure_book_counters(cur)
+        ensure_book_search_indexes(cur)
+
+
+def recount_book_counters(cur) -> int:
+    """
+    Sinkronkan ulang counter stok per buku dengan isi book_items dan borrowing_records.
+    Tabel books dikunci agar peminjaman yang berjalan menunggu, jadi delta mereka
+    diterapkan setelah hitungan ulang ini. Mengembalikan jumlah buku yang dikoreksi.
+    """
+    cur.execute("LOCK TABLE books IN SHARE ROW EXCLUSIVE MODE")
+    cur.execute(_BOOK_COUNTERS_RECOUNT_SQL)
+    return cur.rowcount
+
+
+def ensure_book_counters(cur) -> None:
+    """Tambahkan kolom counter buku; saat kolom baru dibuat, isi dari data yang ada."""
+    cur.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'books'
+        """
+    )
+    existing = {row[0] for row in cur.fetchall()}
+    missing = [(name, ddl) for name, ddl in _BOOK_COUNTER_COLUMNS if name not in existing]
+    if not missing:
+        return
+    cur.execute(
+        "ALTER TABLE books "
+        + ", ".join(f"ADD COLUMN IF NOT EXISTS {name} {ddl}" for name, ddl in missing)
+    )
+    recount_book_counters(cur)
+
+
+def ensure_book_search_indexes(cur) -> None:
+    """
+    Buat indeks trigram pencarian buku. Jika ekstensi pg_trgm tidak boleh dibuat
+    (misalnya user database bukan pemilik), pencarian tetap jalan tanpa indeks.
+    """
+    cur.execute("SAVEPOINT book_search_indexes")
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for statement in _BOOK_SEARCH_INDEXES:
+            cur.execute(statement)
+    except Exception:
+        cur.execute("ROLLBACK TO SAVEPOINT book_search_indexes")
+    cur.execute("RELEASE SAVEPOINT book_search_indexes")
 
 
 def ensure_sequences_integrity(cur) -> None:
@@ -708,4 +841,4 @@ def ensure_sequences_integrity(cur) -> None:
             # Ignore errors for individual tables to ensure partial success
             pass
 
-__all__ = ["ensure_dashboard_schema"]
+__all__ = ["ensure_dashboard_schema", "recount_book_counters"]
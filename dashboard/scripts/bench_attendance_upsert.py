@@ -0,0 +1,111 @@
+"""Benchmark simpan absensi satu hari penuh: INSERT per siswa vs upsert massal.
+
+Semua siswa aktif di semua kelas ditulis untuk satu tanggal, lalu transaksi di-rollback
+sehingga data asli tidak berubah.
+
+Contoh:
+    python dashboard/scripts/bench_attendance_upsert.py --date 2099-01-05 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from dashboard.attendance.queries import (  # noqa: E402
+    ATTENDANCE_STATUSES,
+    BULK_UPSERT_PAGE_SIZE,
+    _bulk_upsert_attendance,
+)
+from dashboard.db_access import get_cursor  # noqa: E402
+
+LEGACY_SQL = """
+    INSERT INTO attendance_records (
+        attendance_date,
+        student_id,
+        class_id,
+        teacher_id,
+        status,
+        note
+    )
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (attendance_date, student_id)
+    DO UPDATE SET
+        status = EXCLUDED.status,
+        note = EXCLUDED.note,
+        class_id = EXCLUDED.class_id,
+        teacher_id = EXCLUDED.teacher_id,
+        updated_at = NOW()
+"""
+
+
+def _load_rows(attendance_date: date) -> list[tuple]:
+    with get_cursor() as cur:
+        cur.execute("SELECT id, class_id FROM students ORDER BY class_id, id")
+        students = cur.fetchall()
+    rng = random.Random(42)
+    return [
+        (attendance_date, row["id"], row["class_id"], None, rng.choice(ATTENDANCE_STATUSES), None)
+        for row in students
+    ]
+
+
+def _run_legacy(rows: list[tuple]) -> float:
+    with get_cursor() as cur:
+        started = time.perf_counter()
+        for row in rows:
+            cur.execute(LEGACY_SQL, row)
+        elapsed = time.perf_counter() - started
+        cur.connection.rollback()
+    return elapsed
+
+
+def _run_bulk(rows: list[tuple]) -> float:
+    with get_cursor() as cur:
+        started = time.perf_counter()
+        _bulk_upsert_attendance(
+            cur,
+            table="attendance_records",
+            columns=("attendance_date", "student_id", "class_id", "teacher_id", "status", "note"),
+            conflict_columns=("attendance_date", "student_id"),
+            rows=rows,
+        )
+        elapsed = time.perf_counter() - started
+        cur.connection.rollback()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--date", type=date.fromisoformat, default=date(2099, 1, 5))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = _load_rows(args.date)
+    if not rows:
+        raise SystemExit("Tidak ada data siswa untuk di-benchmark.")
+    classes = len({row[2] for row in rows})
+
+    legacy = [_run_legacy(rows) for _ in range(args.repeat)]
+    bulk = [_run_bulk(rows) for _ in range(args.repeat)]
+
+    legacy_ms = statistics.median(legacy) * 1000
+    bulk_ms = statistics.median(bulk) * 1000
+    print(f"Absensi 1 hari: {len(rows)} siswa, {classes} kelas (median dari {args.repeat}x, di-rollback)")
+    print(f"  per siswa : {legacy_ms:9.1f} ms  ({len(rows)} statement)")
+    print(f"  massal    : {bulk_ms:9.1f} ms  ({-(-len(rows) // BULK_UPSERT_PAGE_SIZE)} statement)")
+    if bulk_ms > 0:
+        print(f"  speedup   : {legacy_ms / bulk_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
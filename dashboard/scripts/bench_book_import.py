@@ -0,0 +1,120 @@
+"""Benchmark import katalog buku: per judul (import_books.py lama) vs loader massal.
+
+Workbook sintetis dibuat di memori (beberapa sheet rak, dua tabel berdampingan), lalu
+kedua jalur dijalankan dan di-rollback sehingga data asli tidak berubah.
+
+Contoh:
+    python dashboard/scripts/bench_book_import.py --titles 10000 --max-stock 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from openpyxl import Workbook  # noqa: E402
+
+from dashboard.db_access import get_cursor  # noqa: E402
+from dashboard.library.catalog_loader import read_catalog_workbook  # noqa: E402
+from dashboard.library.queries import bulk_add_books  # noqa: E402
+
+HEADER = ("NO", "NAMA JUDUL BUKU", "TAHUN ", "NAMA PENERBIT", "JUMLAH BUKU")
+SHELVES = 8
+
+
+def _workbook(titles: int, max_stock: int, rng: random.Random) -> io.BytesIO:
+    workbook = Workbook(write_only=True)
+    per_sheet = -(-titles // SHELVES)
+    for shelf in range(SHELVES):
+        sheet = workbook.create_sheet(f"RAK{shelf + 1}")
+        count = min(per_sheet, titles - shelf * per_sheet)
+        half = -(-count // 2)
+        sheet.append([])
+        sheet.append([None, "Daftar Buku Perpustakaan Bawah"])
+        sheet.append([None, *HEADER, None, None, None, *HEADER])
+        for idx in range(half):
+            row = [None]
+            for offset in (idx, half + idx):
+                if offset < count:
+                    row += [
+                        offset + 1,
+                        f"Buku {shelf + 1}-{offset + 1}",
+                        rng.randint(2000, 2024),
+                        f"Penerbit {rng.randint(1, 200)}",
+                        rng.randint(1, max_stock),
+                    ]
+                else:
+                    row += [None] * 5
+                if offset == idx:
+                    row += [None, None, None]
+            sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _run_legacy(rows) -> float:
+    with get_cursor() as cur:
+        started = time.perf_counter()
+        for title, author, publisher, year, stock, location in rows:
+            cur.execute("SELECT MAX(CAST(code AS INTEGER)) FROM books WHERE code ~ '^[0-9]+$'")
+            code = str((cur.fetchone()[0] or 0) + 1)
+            cur.execute(
+                """
+                INSERT INTO books (title, author, publisher, year, code, stock, location)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (title, author, publisher, year, code, stock, location),
+            )
+            book_id = cur.fetchone()[0]
+            for i in range(stock):
+                cur.execute(
+                    "INSERT INTO book_items (book_id, qr_code, status) VALUES (%s, %s, 'available')",
+                    (book_id, f"{code}-{i + 1}"),
+                )
+        elapsed = time.perf_counter() - started
+        cur.connection.rollback()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=10000)
+    parser.add_argument("--max-stock", type=int, default=5)
+    parser.add_argument("--skip-legacy", action="store_true", help="lewati jalur per judul yang lambat")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    source = _workbook(args.titles, args.max_stock, rng)
+
+    started = time.perf_counter()
+    books = [book for _sheet, sheet_books in read_catalog_workbook(source, filename="bawah.xlsx") for book in sheet_books]
+    parse_s = time.perf_counter() - started
+    rows = [book.as_row() for book in books]
+    items = sum(book.stock for book in books)
+
+    print(f"Katalog sintetis: {len(rows)} judul, {items} item, {SHELVES} sheet")
+    print(f"  baca workbook      : {parse_s:8.2f} s")
+    if not args.skip_legacy:
+        legacy_s = _run_legacy(rows)
+        print(f"  per judul (lama)   : {legacy_s:8.2f} s")
+    started = time.perf_counter()
+    result = bulk_add_books(rows, dry_run=True)
+    bulk_s = time.perf_counter() - started
+    print(f"  massal             : {bulk_s:8.2f} s  ({result['books']} judul, {result['items']} item, di-rollback)")
+    if not args.skip_legacy and bulk_s > 0:
+        print(f"  speedup            : {legacy_s / bulk_s:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
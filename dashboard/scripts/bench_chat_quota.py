@@ -0,0 +1,152 @@
+"""Uji konkurensi consume_chat_quota: banyak thread menghabiskan kuota satu user terbatas.
+
+Satu baris web_users sementara (tier limited) dibuat, lalu N thread -- masing-masing dengan
+koneksi sendiri -- memanggil consume_chat_quota serentak. Hasilnya harus persis: tepat
+quota_limit panggilan diizinkan, quota_remaining berakhir 0, dan hanya satu cooldown yang
+dipasang. Baris uji dihapus lagi di akhir; exit code 1 bila ada pemeriksaan yang gagal.
+
+Contoh:
+    python dashboard/scripts/bench_chat_quota.py --threads 32 --calls 4 --quota-limit 25 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+import psycopg2  # noqa: E402
+
+import db  # noqa: E402
+
+
+def _create_limited_user(quota_limit: int) -> int:
+    with db.conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO web_users (email, full_name, access_tier, quota_limit, quota_remaining, quota_reset_at)
+            VALUES (%s, 'Bench kuota', 'limited', %s, NULL, NULL)
+            RETURNING id
+            """,
+            (f"bench-quota-{uuid.uuid4().hex}@example.invalid", quota_limit),
+        )
+        user_id = cur.fetchone()[0]
+    db.conn.commit()
+    return user_id
+
+
+def _reset_user(user_id: int, quota_limit: int) -> None:
+    with db.conn.cursor() as cur:
+        cur.execute(
+            "UPDATE web_users SET quota_limit = %s, quota_remaining = NULL, quota_reset_at = NULL WHERE id = %s",
+            (quota_limit, user_id),
+        )
+    db.conn.commit()
+
+
+def _final_state(user_id: int):
+    with db.conn.cursor() as cur:
+        cur.execute("SELECT quota_remaining, quota_reset_at FROM web_users WHERE id = %s", (user_id,))
+        row = cur.fetchone()
+    db.conn.commit()
+    return row
+
+
+def _hammer(user_id: int, threads: int, calls: int):
+    connections = [psycopg2.connect(**db.conn_args) for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+    results = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(connection) -> None:
+        barrier.wait()
+        for _ in range(calls):
+            try:
+                state = db.consume_chat_quota(user_id, connection=connection)
+            except Exception as exc:  # pragma: no cover - dilaporkan sebagai kegagalan
+                connection.rollback()
+                with lock:
+                    errors.append(repr(exc))
+                continue
+            with lock:
+                results.append(state)
+
+    workers = [threading.Thread(target=worker, args=(connection,)) for connection in connections]
+    started = time.perf_counter()
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        for connection in connections:
+            connection.close()
+    return results, errors, time.perf_counter() - started
+
+
+def _check_round(user_id: int, quota_limit: int, threads: int, calls: int) -> list:
+    results, errors, elapsed = _hammer(user_id, threads, calls)
+    remaining, reset_at = _final_state(user_id)
+    allowed = sum(1 for state in results if state.get("allowed"))
+    cooldowns = {state.get("quota_reset_at") for state in results if state.get("quota_reset_at") is not None}
+
+    failures = []
+    if errors:
+        failures.append(f"{len(errors)} panggilan error, mis. {errors[0]}")
+    if allowed != quota_limit:
+        failures.append(f"diizinkan {allowed}, seharusnya {quota_limit}")
+    if remaining != 0:
+        failures.append(f"quota_remaining akhir {remaining}, seharusnya 0")
+    if len(cooldowns) != 1 or reset_at not in cooldowns:
+        failures.append(f"cooldown terpasang {len(cooldowns)} kali (akhir {reset_at})")
+
+    total = threads * calls
+    print(
+        f"  {total} panggilan / {threads} thread: {allowed} diizinkan, sisa {remaining}, "
+        f"{len(cooldowns)} cooldown, {elapsed * 1000:.0f} ms ({total / elapsed:.0f} panggilan/s)"
+    )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=4, help="panggilan per thread")
+    parser.add_argument("--quota-limit", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.threads * args.calls <= args.quota_limit:
+        parser.error("threads x calls harus lebih besar dari quota-limit agar kuota benar-benar habis")
+
+    user_id = _create_limited_user(args.quota_limit)
+    failures = []
+    try:
+        for round_no in range(1, args.rounds + 1):
+            _reset_user(user_id, args.quota_limit)
+            print(f"Putaran {round_no}:")
+            failures.extend(f"putaran {round_no}: {failure}" for failure in _check_round(
+                user_id, args.quota_limit, args.threads, args.calls
+            ))
+    finally:
+        with db.conn.cursor() as cur:
+            cur.execute("DELETE FROM web_users WHERE id = %s", (user_id,))
+        db.conn.commit()
+
+    if failures:
+        for failure in failures:
+            print(f"GAGAL {failure}")
+        raise SystemExit(1)
+    print("OK: kuota tidak pernah terpakai ganda.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark daftar konseling berkelompok: query ROW_NUMBER lama vs halaman per siswa.
+
+Laporan sintetis (sebagian anonim) disisipkan dengan generate_series dalam satu transaksi,
+kedua query dijalankan pada cursor yang sama, lalu semuanya di-rollback sehingga data asli
+tidak berubah. Jalankan setelah skema bot dibuat (indeks psych_reports ikut dibuat di sana).
+
+Contoh:
+    python dashboard/scripts/bench_psych_reports.py --reports 150000 --students 4000
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from dashboard.db_access import get_cursor  # noqa: E402
+from dashboard.queries import fetch_psych_group_page  # noqa: E402
+
+PAGE_SIZE = 20
+
+# Query sebelum laporan dikelompokkan lewat agregat per siswa: CTE lebar + LEFT JOIN chat_logs
+# untuk semua baris, dijalankan dua kali (halaman dan COUNT DISTINCT).
+LEGACY_CTE = """
+    WITH filtered AS (
+        SELECT
+            pr.*,
+            cl.created_at AS chat_created_at,
+            COALESCE(CAST(pr.user_id AS TEXT), CONCAT('report-', pr.id)) AS group_key,
+            ROW_NUMBER() OVER (
+                PARTITION BY COALESCE(CAST(pr.user_id AS TEXT), CONCAT('report-', pr.id))
+                ORDER BY pr.created_at DESC
+            ) AS row_no
+        FROM psych_reports pr
+        LEFT JOIN chat_logs cl ON cl.id = pr.chat_log_id
+        {where_clause}
+    )
+"""
+
+CASES = (
+    ("semua, hal. 1", [], [], 1),
+    ("semua, hal. 40", [], [], 40),
+    ("status open", ["pr.status = %s"], ["open"], 1),
+    ("severity critical", ["pr.severity = %s"], ["critical"], 1),
+    ("open + critical, hal. 5", ["pr.status = %s", "pr.severity = %s"], ["open", "critical"], 5),
+)
+
+
+def _seed(cur, reports: int, students: int, anonymous_pct: int) -> None:
+    cur.execute(
+        """
+        INSERT INTO psych_reports (user_id, username, message, summary, severity, status, created_at, updated_at)
+        SELECT
+            CASE WHEN g %% 100 < %s THEN NULL ELSE 900000000 + (g * 7919) %% %s END,
+            'bench',
+            'Laporan sintetis ' || g,
+            'Ringkasan ' || g,
+            (ARRAY['general', 'general', 'general', 'elevated', 'critical'])[1 + g %% 5],
+            (ARRAY['open', 'in_progress', 'resolved', 'resolved', 'archived', 'archived'])[1 + g %% 6],
+            NOW() - (g %% 525600) * INTERVAL '1 minute',
+            NOW()
+        FROM generate_series(1, %s) AS g
+        """,
+        (anonymous_pct, max(1, students), reports),
+    )
+    cur.execute("ANALYZE psych_reports")
+
+
+def _legacy_page(cur, conditions, params, limit: int, offset: int):
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    cte = LEGACY_CTE.format(where_clause=where_clause)
+    cur.execute(
+        cte
+        + """
+        SELECT id, group_key FROM filtered
+        WHERE row_no = 1
+        ORDER BY CASE WHEN severity = 'critical' THEN 2 WHEN severity = 'elevated' THEN 1 ELSE 0 END DESC, created_at DESC
+        LIMIT %s OFFSET %s
+        """,
+        (*params, limit, offset),
+    )
+    rows = cur.fetchall()
+    cur.execute(cte + "SELECT COUNT(DISTINCT group_key) FROM filtered", params)
+    return rows, int(cur.fetchone()[0] or 0)
+
+
+def _timed(fn, repeat: int):
+    result = fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=150000)
+    parser.add_argument("--students", type=int, default=4000)
+    parser.add_argument("--anonymous-pct", type=int, default=5, help="persentase laporan tanpa user_id")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with get_cursor() as cur:
+        started = time.perf_counter()
+        _seed(cur, args.reports, args.students, args.anonymous_pct)
+        print(f"Seed {args.reports} laporan, {args.students} siswa: {time.perf_counter() - started:.1f} s")
+        print(f"{'kasus':26s} {'lama':>10s} {'baru':>10s} {'speedup':>8s}  grup")
+        for label, conditions, params, page in CASES:
+            offset = (page - 1) * PAGE_SIZE
+            (_, legacy_total), legacy_s = _timed(
+                lambda: _legacy_page(cur, conditions, params, PAGE_SIZE, offset), args.repeat
+            )
+            (_, total), new_s = _timed(
+                lambda: fetch_psych_group_page(cur, conditions, params, limit=PAGE_SIZE, offset=offset),
+                args.repeat,
+            )
+            # Urutan baris bisa berbeda bila created_at kembar (query lama tidak punya tie-break).
+            print(
+                f"{label:26s} {legacy_s * 1000:8.1f}ms {new_s * 1000:8.1f}ms {legacy_s / new_s:7.1f}x"
+                f"  {total}{'' if total == legacy_total else f' (lama {legacy_total})'}"
+            )
+        cur.connection.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark ekspor absen semester: copy_worksheet (lama) vs write-only vs zip paralel.
+
+Data siswa & absensi dibuat acak sehingga tidak butuh database.
+
+Contoh:
+    python dashboard/scripts/bench_semester_export.py --classes 12 --students 32 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import resource
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from dashboard.attendance.semester_exporter import (  # noqa: E402
+    generate_semester_excel,
+    generate_semester_zip,
+    load_semester_template,
+    semester_date_range,
+    semester_months,
+)
+
+TEMPLATE_PATH = PROJECT_ROOT / "dashboard" / "attendance" / "contoh" / "contoh format.xlsx"
+STATUS_WEIGHTS = (("masuk", 90), ("sakit", 4), ("izin", 4), ("alpa", 2))
+
+
+def _class_context(class_no: int, students: int, months, rng: random.Random) -> dict:
+    rows = [
+        {"no": idx, "id": class_no * 1000 + idx, "name": f"SISWA {class_no}-{idx}", "gender": "LP"[idx % 2]}
+        for idx in range(1, students + 1)
+    ]
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    attendance_data = {}
+    for year, month in months:
+        entries = {}
+        for day in range(1, 29):
+            if date(year, month, day).weekday() >= 5:
+                continue
+            for student in rows:
+                entries[(student["id"], day)] = rng.choices(statuses, weights)[0]
+        attendance_data[(year, month)] = entries
+    return dict(
+        months=months,
+        students=rows,
+        attendance_data=attendance_data,
+        school_name="SD BENCHMARK",
+        academic_year="2025/2026",
+        class_label=f"KELAS {class_no}",
+        teacher_name=f"GURU {class_no}",
+        teacher_nip=None,
+        headmaster_name="KEPALA SEKOLAH",
+        headmaster_nip=None,
+    )
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--students", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--skip-legacy", action="store_true", help="lewati jalur copy_worksheet yang lambat")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    months = semester_months(*semester_date_range("2025/2026", 2))
+    contexts = [_class_context(no, args.students, months, rng) for no in range(1, args.classes + 1)]
+    load_semester_template(TEMPLATE_PATH)
+
+    print(f"Ekspor {args.classes} kelas x {args.students} siswa x {len(months)} bulan (median dari {args.repeat}x)")
+    results = {}
+    if not args.skip_legacy:
+        results["lama (copy_worksheet)"] = [
+            _timed(lambda: [generate_semester_excel(TEMPLATE_PATH, write_only=False, **ctx) for ctx in contexts])
+            for _ in range(args.repeat)
+        ]
+    results["write-only"] = [
+        _timed(lambda: [generate_semester_excel(TEMPLATE_PATH, **ctx) for ctx in contexts])
+        for _ in range(args.repeat)
+    ]
+    jobs = [{"filename": f"kelas-{idx}.xlsx", **ctx} for idx, ctx in enumerate(contexts, start=1)]
+    results["write-only + zip paralel"] = [
+        _timed(lambda: generate_semester_zip(TEMPLATE_PATH, jobs, workers=args.workers))
+        for _ in range(args.repeat)
+    ]
+
+    baseline = None
+    for label, samples in results.items():
+        elapsed = statistics.median(samples)
+        baseline = baseline or elapsed
+        print(f"  {label:26s}: {elapsed:8.2f} s  ({elapsed / len(contexts) * 1000:7.0f} ms/kelas, {baseline / elapsed:5.1f}x)")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  puncak RSS proses utama   : {peak_mb:8.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
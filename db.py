@@ -1,14 +1,28 @@
 import os
 import random
+import select
+import threading
+import time
+from collections import OrderedDict, deque
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta, timezone
 
 import psycopg2
 from psycopg2 import extensions, InterfaceError, OperationalError, ProgrammingError
-from psycopg2.extras import Json, RealDictCursor
+from psycopg2.extras import Json, RealDictCursor, execute_values
 from dotenv import load_dotenv
-from account_status import ACCOUNT_STATUS_CHOICES, ACCOUNT_STATUS_ACTIVE
+from account_status import (
+    ACCOUNT_STATUS_CHOICES,
+    ACCOUNT_STATUS_ACTIVE,
+    ACCOUNT_STATUS_NOTIFY_CHANNEL,
+)
+from inbox_notify import notify_inbox_change
 from tka_schema import ensure_tka_schema as ensure_tka_schema_tables
+from chat_log_partitions import (
+    chat_logs_is_partitioned,
+    create_partitioned_chat_logs,
+    ensure_chat_log_partitions,
+)
 
 # Muat variabel dari file .env
 load_dotenv()
@@ -54,8 +68,20 @@ conn = psycopg2.connect(**conn_args)
 _CHAT_TOPIC_AVAILABLE: Optional[bool] = None
 _CHAT_CHANNEL_AVAILABLE: Optional[bool] = None
 MAX_TWITTER_LOG_ROWS = max(0, int(os.getenv("TWITTER_LOG_MAX_ROWS", "100") or 100))
+TWITTER_LOG_STATEMENT_TIMEOUT_MS = max(
+    100, int(os.getenv("TWITTER_LOG_STATEMENT_TIMEOUT_MS", "2000") or 2000)
+)
 DEFAULT_LIMITED_QUOTA = 3
 LIMIT_COOLDOWN_HOURS = 24
+UNLIMITED_QUOTA_CACHE_SECONDS = max(
+    0, int(os.getenv("WEB_UNLIMITED_QUOTA_CACHE_SECONDS", "300") or 300)
+)
+ACCOUNT_STATUS_CACHE_SECONDS = max(
+    0.0, float(os.getenv("ACCOUNT_STATUS_CACHE_SECONDS", "5") or 5)
+)
+CHAT_HISTORY_WINDOW_SIZE = max(0, int(os.getenv("CHAT_HISTORY_WINDOW_SIZE", "10") or 10))
+CHAT_HISTORY_WINDOW_USERS = max(1, int(os.getenv("CHAT_HISTORY_WINDOW_USERS", "2000") or 2000))
+CHAT_HISTORY_NOTIFY_CHANNEL = "aska_chat_history"
 DEFAULT_LIMITED_REASON = (
     "Akses Gmail: maksimal 3 chat per 24 jam. "
     "Kalau mau unlimited, pakai akun belajar.id atau Telegram."
@@ -118,6 +144,20 @@ TKA_METADATA_SECTION_CONFIG_KEY = "section_config"
 MAX_STIMULUS_QUESTIONS = 5
 MIN_STIMULUS_QUESTIONS = 3
 _TKA_SCHEMA_READY: Optional[bool] = None
+_USER_SCHEMA_READY: Optional[bool] = None
+_UNLIMITED_QUOTA_CACHE: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_UNLIMITED_QUOTA_LOCK = threading.Lock()
+_TELEGRAM_USER_SCHEMA_READY: Optional[bool] = None
+_ACCOUNT_STATUS_CACHE: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+_ACCOUNT_STATUS_LOCK = threading.Lock()
+_ACCOUNT_STATUS_LISTENER: Optional[threading.Thread] = None
+_HISTORY_WINDOWS: "OrderedDict[Tuple[int, Optional[str]], deque]" = OrderedDict()
+_HISTORY_WINDOWS_LOCK = threading.Lock()
+_HISTORY_WINDOWS_EPOCH = 0
+_HISTORY_LISTENER: Optional[threading.Thread] = None
+# Penanda proses ini di payload NOTIFY riwayat (save_chat sudah memperbarui window lokal).
+_HISTORY_NOTIFY_ORIGIN = f"{os.getpid()}-{random.getrandbits(32):08x}"
+_TWITTER_LOG_CONN = None
 
 
 def _chat_logs_has_topic_column(force_refresh: bool = False) -> bool:
@@ -166,19 +206,13 @@ def _ensure_chat_logs_schema() -> None:
     """Pastikan tabel chat_logs dan semua kolomnya tersedia."""
     global _CHAT_TOPIC_AVAILABLE, _CHAT_CHANNEL_AVAILABLE
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS chat_logs (
-                id SERIAL PRIMARY KEY,
-                user_id BIGINT,
-                username TEXT,
-                text TEXT,
-                role TEXT,
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                response_time_ms INTEGER
-            );
-            """
-        )
+        cur.execute("SELECT to_regclass('chat_logs') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            # Instalasi baru langsung berpartisi per bulan; heap lama dimigrasi
+            # lewat `python chat_log_partitions.py migrate`.
+            create_partitioned_chat_logs(cur)
+        elif chat_logs_is_partitioned(cur):
+            ensure_chat_log_partitions(cur)
         # Tambahkan kolom 'topic' jika belum ada, untuk menjaga kompatibilitas
         if not _chat_logs_has_topic_column(force_refresh=True):
             cur.execute("ALTER TABLE chat_logs ADD COLUMN topic TEXT")
@@ -207,7 +241,7 @@ def _ensure_bullying_schema() -> None:
             """
             CREATE TABLE IF NOT EXISTS bullying_reports (
                 id SERIAL PRIMARY KEY,
-                chat_log_id INTEGER UNIQUE REFERENCES chat_logs(id) ON DELETE CASCADE,
+                chat_log_id INTEGER UNIQUE,
                 user_id BIGINT,
                 username TEXT,
                 description TEXT NOT NULL,
@@ -237,7 +271,7 @@ def _ensure_psych_schema() -> None:
             """
             CREATE TABLE IF NOT EXISTS psych_reports (
                 id SERIAL PRIMARY KEY,
-                chat_log_id INTEGER REFERENCES chat_logs(id) ON DELETE SET NULL,
+                chat_log_id INTEGER,
                 user_id BIGINT,
                 username TEXT,
                 message TEXT NOT NULL,
@@ -251,6 +285,20 @@ def _ensure_psych_schema() -> None:
             );
             """
         )
+        # Daftar konseling dikelompokkan per siswa: laporan terbaru tiap siswa diambil lewat
+        # indeks (user_id, created_at), filter status/severity lewat indeks kedua.
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_psych_reports_user_created
+            ON psych_reports (user_id, created_at DESC, id DESC);
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_psych_reports_status_severity_created
+            ON psych_reports (status, severity, created_at DESC);
+            """
+        )
     conn.commit()
 
 
@@ -261,7 +309,7 @@ def _ensure_feedback_schema() -> None:
             """
             CREATE TABLE IF NOT EXISTS chat_feedback (
                 id SERIAL PRIMARY KEY,
-                chat_log_id INTEGER NOT NULL REFERENCES chat_logs(id) ON DELETE CASCADE,
+                chat_log_id INTEGER NOT NULL,
                 user_id BIGINT NOT NULL,
                 username TEXT,
                 feedback_type TEXT NOT NULL CHECK (feedback_type IN ('like', 'dislike')),
@@ -315,56 +363,72 @@ def save_feedback(
     
     Returns:
         Dict dengan feedback data jika berhasil, None jika gagal
-    
+
     Raises:
-        ValueError: Jika feedback_type tidak valid
-        psycopg2.IntegrityError: Jika chat_log_id tidak ada (foreign key violation)
+        ValueError: Jika feedback_type tidak valid atau chat_log_id bukan milik percakapan user
+        PermissionError: Jika pesan tersebut ditulis user sendiri (self-feedback)
     """
-    _ensure_feedback_schema()
-    
     # Validasi feedback_type
     if feedback_type not in ('like', 'dislike'):
         raise ValueError(f"Invalid feedback_type: {feedback_type}. Must be 'like' or 'dislike'")
-    
+
+    # Cek kepemilikan dan upsert dalam satu statement: hanya balasan ASKA di percakapan
+    # user sendiri yang boleh diberi feedback.
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Insert atau update jika sudah ada (ON CONFLICT)
             cur.execute(
                 """
-                INSERT INTO chat_feedback (
-                    chat_log_id,
-                    user_id,
-                    username,
-                    feedback_type,
-                    created_at,
-                    updated_at
+                WITH target AS (
+                    SELECT id, role
+                    FROM chat_logs
+                    WHERE id = %s AND user_id = %s
+                    LIMIT 1
+                ),
+                saved AS (
+                    INSERT INTO chat_feedback (
+                        chat_log_id,
+                        user_id,
+                        username,
+                        feedback_type,
+                        created_at,
+                        updated_at
+                    )
+                    SELECT id, %s, %s, %s, NOW(), NOW()
+                    FROM target
+                    WHERE role <> 'user'
+                    ON CONFLICT (chat_log_id, user_id)
+                    DO UPDATE SET
+                        feedback_type = EXCLUDED.feedback_type,
+                        updated_at = NOW()
+                    RETURNING
+                        id,
+                        chat_log_id,
+                        user_id,
+                        username,
+                        feedback_type,
+                        created_at,
+                        updated_at
                 )
-                VALUES (%s, %s, %s, %s, NOW(), NOW())
-                ON CONFLICT (chat_log_id, user_id)
-                DO UPDATE SET
-                    feedback_type = EXCLUDED.feedback_type,
-                    updated_at = NOW()
-                RETURNING
-                    id,
-                    chat_log_id,
-                    user_id,
-                    username,
-                    feedback_type,
-                    created_at,
-                    updated_at
+                SELECT target.role AS message_role, saved.*
+                FROM target
+                LEFT JOIN saved ON TRUE
                 """,
-                (chat_log_id, user_id, username, feedback_type),
+                (chat_log_id, user_id, user_id, username, feedback_type),
             )
             result = cur.fetchone()
         conn.commit()
-        return dict(result) if result else None
-    except psycopg2.IntegrityError as e:
+    except psycopg2.Error:
         conn.rollback()
-        # Check if it's a foreign key violation
-        if 'chat_logs' in str(e):
-            raise ValueError(f"chat_log_id {chat_log_id} does not exist")
         raise
 
+    if not result:
+        raise ValueError(f"chat_log_id {chat_log_id} does not exist")
+    if result["id"] is None:
+        raise PermissionError("Cannot provide feedback on your own message")
+    feedback = dict(result)
+    feedback.pop("message_role", None)
+    return feedback
+
 
 def delete_feedback(chat_log_id: int, user_id: int) -> bool:
     """
@@ -377,8 +441,6 @@ def delete_feedback(chat_log_id: int, user_id: int) -> bool:
     Returns:
         True jika feedback dihapus, False jika tidak ditemukan
     """
-    _ensure_feedback_schema()
-    
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -406,8 +468,6 @@ def get_feedback_status(chat_log_ids: List[int], user_id: int) -> Dict[int, Opti
     if not chat_log_ids:
         return {}
     
-    _ensure_feedback_schema()
-    
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
             """
@@ -447,8 +507,6 @@ def get_feedback_by_chat_log(chat_log_id: int) -> List[Dict[str, Any]]:
     Returns:
         List of feedback records
     """
-    _ensure_feedback_schema()
-    
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
             """
@@ -523,8 +581,11 @@ def _constraint_exists(table: str, constraint: str) -> bool:
         return cur.fetchone() is not None
 
 
-def _ensure_user_schema() -> None:
+def _ensure_user_schema(force_refresh: bool = False) -> None:
     """Pastikan tabel untuk pengguna web (web_users) tersedia."""
+    global _USER_SCHEMA_READY
+    if _USER_SCHEMA_READY and not force_refresh:
+        return
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -628,6 +689,7 @@ def _ensure_user_schema() -> None:
                 """
             )
         conn.commit()
+    _USER_SCHEMA_READY = True
 
 
 def _backfill_telegram_users() -> None:
@@ -657,8 +719,11 @@ def _backfill_telegram_users() -> None:
     conn.commit()
 
 
-def _ensure_telegram_user_schema() -> None:
+def _ensure_telegram_user_schema(force_refresh: bool = False) -> None:
     """Pastikan tabel telegram_users tersedia dan terisi dari chat_logs."""
+    global _TELEGRAM_USER_SCHEMA_READY
+    if _TELEGRAM_USER_SCHEMA_READY and not force_refresh:
+        return
     with conn.cursor() as cur:
         cur.execute(
             f"""
@@ -692,6 +757,7 @@ def _ensure_telegram_user_schema() -> None:
         )
     conn.commit()
     _backfill_telegram_users()
+    _TELEGRAM_USER_SCHEMA_READY = True
 
 
 def _sync_telegram_user_profile(
@@ -783,6 +849,8 @@ def record_psych_report(
             ),
         )
         row = cur.fetchone()
+        if row:
+            notify_inbox_change(cur, "psych", "created", row[0], severity=severity)
     conn.commit()
     return int(row[0]) if row else None
 
@@ -832,6 +900,7 @@ def record_bullying_report(
             conn.commit()
             return None
         report_id = int(row[0])
+        notify_inbox_change(cur, "bullying", "created", report_id, severity=severity)
     conn.commit()
     return report_id
 
@@ -863,6 +932,7 @@ def save_chat(
     use_channel = _chat_logs_has_channel_column()
     channel_value = _resolve_channel(normalized_topic)
     inserted_id: Optional[int] = None
+    created_at: Optional[datetime] = None
 
     with conn.cursor() as cur:
         if use_topic and use_channel:
@@ -879,7 +949,7 @@ def save_chat(
                     response_time_ms
                 )
                 VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                RETURNING id
+                RETURNING id, created_at
                 """,
                 (
                     user_id,
@@ -896,7 +966,7 @@ def save_chat(
                 """
                 INSERT INTO chat_logs (user_id, username, text, role, topic, created_at, response_time_ms)
                 VALUES (%s, %s, %s, %s, %s, NOW(), %s)
-                RETURNING id
+                RETURNING id, created_at
                 """,
                 (
                     user_id,
@@ -912,7 +982,7 @@ def save_chat(
                 """
                 INSERT INTO chat_logs (user_id, username, text, role, channel, created_at, response_time_ms)
                 VALUES (%s, %s, %s, %s, %s, NOW(), %s)
-                RETURNING id
+                RETURNING id, created_at
                 """,
                 (
                     user_id,
@@ -928,13 +998,14 @@ def save_chat(
                 """
                 INSERT INTO chat_logs (user_id, username, text, role, created_at, response_time_ms)
                 VALUES (%s, %s, %s, %s, NOW(), %s)
-                RETURNING id
+                RETURNING id, created_at
                 """,
                 (user_id, username, message, role, response_time_ms),
             )
         row = cur.fetchone()
         if row:
             inserted_id = int(row[0])
+            created_at = row[1]
 
         if normalized_topic and inserted_id and not use_topic:
             topic_supported = _chat_logs_has_topic_column(force_refresh=True)
@@ -947,13 +1018,21 @@ def save_chat(
                     topic_supported = _chat_logs_has_topic_column(force_refresh=True)
             if topic_supported:
                 cur.execute(
-                    "UPDATE chat_logs SET topic = %s WHERE id = %s",
-                    (normalized_topic, inserted_id),
+                    "UPDATE chat_logs SET topic = %s WHERE id = %s AND created_at = %s",
+                    (normalized_topic, inserted_id, created_at),
                 )
+        if inserted_id:
+            _notify_history_change(cur, user_id, origin=_HISTORY_NOTIFY_ORIGIN)
     if channel_value == "telegram" and role == "user" and user_id is not None:
         _sync_telegram_user_profile(user_id, username, message)
 
     conn.commit()
+    if inserted_id and user_id is not None:
+        _append_history_window(
+            user_id,
+            normalized_topic,
+            {"id": inserted_id, "role": role, "text": message, "created_at": created_at},
+        )
     return inserted_id
 
 def get_chat_history(
@@ -961,10 +1040,14 @@ def get_chat_history(
     limit: int,
     offset: int = 0,
     topic: Optional[str] = None,
+    *,
+    with_feedback: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Ambil riwayat chat dengan paginasi, mengembalikan list of dictionaries.
     Urutan: Terbaru di atas (DESC).
+    Dengan `with_feedback`, tiap baris ikut membawa `feedback_type` (like/dislike/None)
+    milik user tersebut dari chat_feedback dalam query yang sama.
     """
     normalized_topic: Optional[str] = None
     if topic is not None:
@@ -973,29 +1056,165 @@ def get_chat_history(
 
     use_topic = bool(normalized_topic) and _chat_logs_has_topic_column()
 
+    columns = "cl.id, cl.role, cl.text, cl.created_at"
+    joins = ""
+    if with_feedback:
+        columns += ", cf.feedback_type"
+        joins = " LEFT JOIN chat_feedback cf ON cf.chat_log_id = cl.id AND cf.user_id = cl.user_id"
+    conditions = "cl.user_id = %s"
+    params: List[Any] = [user_id]
+    if use_topic:
+        conditions += " AND cl.topic = %s"
+        params.append(normalized_topic)
+
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        if use_topic:
-            cur.execute(
-                """
-                SELECT id, role, text, created_at FROM chat_logs
-                WHERE user_id = %s AND topic = %s
-                ORDER BY created_at DESC
-                LIMIT %s OFFSET %s
-                """,
-                (user_id, normalized_topic, limit, offset),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, role, text, created_at FROM chat_logs
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT %s OFFSET %s
-                """,
-                (user_id, limit, offset),
-            )
+        cur.execute(
+            f"""
+            SELECT {columns} FROM chat_logs cl{joins}
+            WHERE {conditions}
+            ORDER BY cl.created_at DESC
+            LIMIT %s OFFSET %s
+            """,
+            (*params, limit, offset),
+        )
         return cur.fetchall()
 
+def _append_history_window(user_id: int, topic: Optional[str], entry: Dict[str, Any]) -> None:
+    """Tambahkan pesan baru ke window riwayat yang sudah hangat (tanpa query DB)."""
+    if CHAT_HISTORY_WINDOW_SIZE <= 0:
+        return
+    keys = [(user_id, None)]
+    if topic:
+        keys.append((user_id, topic))
+    with _HISTORY_WINDOWS_LOCK:
+        for key in keys:
+            window = _HISTORY_WINDOWS.get(key)
+            # Window yang belum pernah dimuat dibiarkan kosong; isinya belum lengkap.
+            if window is None:
+                continue
+            window.appendleft(dict(entry))
+            _HISTORY_WINDOWS.move_to_end(key)
+
+
+def _store_history_window(
+    key: Tuple[int, Optional[str]],
+    rows: List[Dict[str, Any]],
+    epoch: int,
+) -> None:
+    with _HISTORY_WINDOWS_LOCK:
+        # Ada invalidasi selama rows dibaca dari DB: rows mungkin sudah basi.
+        if epoch != _HISTORY_WINDOWS_EPOCH:
+            return
+        _HISTORY_WINDOWS[key] = deque(
+            (dict(row) for row in rows[:CHAT_HISTORY_WINDOW_SIZE]),
+            maxlen=CHAT_HISTORY_WINDOW_SIZE,
+        )
+        _HISTORY_WINDOWS.move_to_end(key)
+        while len(_HISTORY_WINDOWS) > CHAT_HISTORY_WINDOW_USERS:
+            _HISTORY_WINDOWS.popitem(last=False)
+
+
+def forget_history_window(user_id: Optional[int] = None) -> None:
+    """Buang window riwayat seorang user (atau semuanya) supaya dibaca ulang dari DB."""
+    global _HISTORY_WINDOWS_EPOCH
+    with _HISTORY_WINDOWS_LOCK:
+        _HISTORY_WINDOWS_EPOCH += 1
+        if user_id is None:
+            _HISTORY_WINDOWS.clear()
+            return
+        for key in [key for key in _HISTORY_WINDOWS if key[0] == user_id]:
+            _HISTORY_WINDOWS.pop(key, None)
+
+
+def _notify_history_change(cur, user_id: Optional[int], *, origin: str = "") -> None:
+    if user_id is None:
+        return
+    cur.execute(
+        "SELECT pg_notify(%s, %s)",
+        (CHAT_HISTORY_NOTIFY_CHANNEL, f"{origin}:{user_id}"),
+    )
+
+
+def notify_chat_history_change(cur, user_id: Optional[int]) -> None:
+    """
+    Kabarkan perubahan chat_logs seorang user di luar save_chat (mis. UPDATE teks).
+    Panggil dengan cursor transaksi yang mengubahnya; setelah commit semua proses,
+    termasuk proses ini, membuang window riwayat user tersebut.
+    """
+    _notify_history_change(cur, user_id)
+
+
+def _apply_history_notify(payload: Optional[str]) -> None:
+    """Payload NOTIFY berformat '<origin>:<user_id>'; payload lain flush semua."""
+    origin, _, raw_id = (payload or "").rpartition(":")
+    if origin and origin == _HISTORY_NOTIFY_ORIGIN:
+        return
+    try:
+        user_id = int(raw_id)
+    except ValueError:
+        forget_history_window()
+        return
+    forget_history_window(user_id)
+
+
+def _history_listener_loop() -> None:
+    """LISTEN penulisan chat dari proses lain lalu buang window riwayat yang terkait."""
+    _listen_forever(CHAT_HISTORY_NOTIFY_CHANNEL, _apply_history_notify, forget_history_window)
+
+
+def _ensure_history_listener() -> None:
+    global _HISTORY_LISTENER
+    if _HISTORY_LISTENER is not None and _HISTORY_LISTENER.is_alive():
+        return
+    with _HISTORY_WINDOWS_LOCK:
+        if _HISTORY_LISTENER is not None and _HISTORY_LISTENER.is_alive():
+            return
+        _HISTORY_LISTENER = threading.Thread(
+            target=_history_listener_loop,
+            name="aska-chat-history-listener",
+            daemon=True,
+        )
+        _HISTORY_LISTENER.start()
+
+
+def get_recent_chat_history(
+    user_id: int,
+    limit: int,
+    topic: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Riwayat terbaru untuk konteks QA (terbaru di atas, sama seperti get_chat_history).
+    Dilayani dari window in-memory yang diisi oleh save_chat; DB hanya dibaca saat
+    window user belum ada di proses ini. Window dibatasi CHAT_HISTORY_WINDOW_SIZE
+    pesan per user dan CHAT_HISTORY_WINDOW_USERS user (LRU).
+    Bot Telegram, web, dan Twitter bisa menulis riwayat user yang sama dari proses
+    berbeda: save_chat mengirim NOTIFY di CHAT_HISTORY_NOTIFY_CHANNEL dan listener
+    tiap proses membuang window user itu, jadi window tidak pernah dipakai basi.
+    """
+    normalized_topic: Optional[str] = None
+    if topic is not None:
+        normalized_topic = str(topic).strip().lower() or None
+    if limit > CHAT_HISTORY_WINDOW_SIZE:
+        return get_chat_history(user_id, limit=limit, offset=0, topic=normalized_topic)
+
+    _ensure_history_listener()
+    key = (user_id, normalized_topic)
+    with _HISTORY_WINDOWS_LOCK:
+        window = _HISTORY_WINDOWS.get(key)
+        if window is not None:
+            _HISTORY_WINDOWS.move_to_end(key)
+            return [dict(row) for row in list(window)[:limit]]
+        epoch = _HISTORY_WINDOWS_EPOCH
+
+    rows = get_chat_history(
+        user_id,
+        limit=CHAT_HISTORY_WINDOW_SIZE,
+        offset=0,
+        topic=normalized_topic,
+    )
+    _store_history_window(key, rows, epoch)
+    return [dict(row) for row in rows[:limit]]
+
 def get_or_create_web_user(
     email: str,
     full_name: Optional[str],
@@ -1096,6 +1315,8 @@ def get_or_create_web_user(
             cur.execute(query, params)
             updated_user = cur.fetchone()
             conn.commit()
+            # Tier bisa berubah saat login ulang (Gmail <-> belajar.id)
+            forget_quota_cache(existing_user["id"])
             return updated_user or existing_user
 
         cur.execute(
@@ -1192,8 +1413,106 @@ def _maybe_reset_quota(
     return row, updated
 
 
+def _apply_account_status_notify(payload: Optional[str]) -> None:
+    """Payload NOTIFY berformat '<channel>:<user_id>'; payload lain flush semua."""
+    channel, _, raw_id = (payload or "").partition(":")
+    try:
+        user_id = int(raw_id)
+    except ValueError:
+        forget_account_status()
+        return
+    forget_account_status(channel, user_id)
+
+
+def _listen_forever(channel: str, apply_notify, flush) -> None:
+    """LISTEN `channel` di koneksi sendiri; `flush` dipanggil setiap kali koneksi putus/pulih."""
+    backoff = 1.0
+    while True:
+        listen_conn = None
+        try:
+            listen_conn = psycopg2.connect(**conn_args)
+            listen_conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with listen_conn.cursor() as cur:
+                cur.execute(f"LISTEN {channel}")
+            # Notifikasi yang lewat selama reconnect tidak bisa diulang; flush saja.
+            flush()
+            backoff = 1.0
+            while True:
+                if select.select([listen_conn], [], [], 60) == ([], [], []):
+                    continue
+                listen_conn.poll()
+                while listen_conn.notifies:
+                    notify = listen_conn.notifies.pop(0)
+                    apply_notify(notify.payload)
+        except Exception:
+            flush()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+        finally:
+            if listen_conn is not None:
+                try:
+                    listen_conn.close()
+                except Exception:
+                    pass
+
+
+def _account_status_listener_loop() -> None:
+    """LISTEN perubahan status akun dari dashboard lalu buang cache yang terkait."""
+    _listen_forever(ACCOUNT_STATUS_NOTIFY_CHANNEL, _apply_account_status_notify, forget_account_status)
+
+
+def _ensure_account_status_listener() -> None:
+    global _ACCOUNT_STATUS_LISTENER
+    if _ACCOUNT_STATUS_LISTENER is not None and _ACCOUNT_STATUS_LISTENER.is_alive():
+        return
+    with _ACCOUNT_STATUS_LOCK:
+        if _ACCOUNT_STATUS_LISTENER is not None and _ACCOUNT_STATUS_LISTENER.is_alive():
+            return
+        _ACCOUNT_STATUS_LISTENER = threading.Thread(
+            target=_account_status_listener_loop,
+            name="aska-account-status-listener",
+            daemon=True,
+        )
+        _ACCOUNT_STATUS_LISTENER.start()
+
+
+def _cached_account_status(channel: str, user_id: int) -> Optional[Dict[str, Any]]:
+    if ACCOUNT_STATUS_CACHE_SECONDS <= 0:
+        return None
+    _ensure_account_status_listener()
+    with _ACCOUNT_STATUS_LOCK:
+        entry = _ACCOUNT_STATUS_CACHE.get((channel, user_id))
+        if not entry:
+            return None
+        expires_at, state = entry
+        if expires_at <= time.monotonic():
+            _ACCOUNT_STATUS_CACHE.pop((channel, user_id), None)
+            return None
+        return dict(state)
+
+
+def _remember_account_status(channel: str, user_id: int, state: Dict[str, Any]) -> None:
+    if ACCOUNT_STATUS_CACHE_SECONDS <= 0:
+        return
+    expires_at = time.monotonic() + ACCOUNT_STATUS_CACHE_SECONDS
+    with _ACCOUNT_STATUS_LOCK:
+        _ACCOUNT_STATUS_CACHE[(channel, user_id)] = (expires_at, dict(state))
+
+
+def forget_account_status(channel: Optional[str] = None, user_id: Optional[int] = None) -> None:
+    """Hapus cache status akun (semua entri jika channel/user_id kosong)."""
+    with _ACCOUNT_STATUS_LOCK:
+        if channel is None or user_id is None:
+            _ACCOUNT_STATUS_CACHE.clear()
+        else:
+            _ACCOUNT_STATUS_CACHE.pop((channel, user_id), None)
+
+
 def get_web_user_status(user_id: int) -> Dict[str, Any]:
-    """Ambil status akun web terbaru."""
+    """Ambil status akun web terbaru (di-cache singkat, di-invalidate via NOTIFY)."""
+    cached = _cached_account_status("web", user_id)
+    if cached is not None:
+        return cached
     _ensure_user_schema()
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
@@ -1213,18 +1532,24 @@ def get_web_user_status(user_id: int) -> Dict[str, Any]:
         )
         row = cur.fetchone()
     if not row:
-        return {
+        state = {
             "id": user_id,
             "status": ACCOUNT_STATUS_ACTIVE,
             "status_reason": None,
             "status_changed_at": None,
             "status_changed_by": None,
         }
-    return dict(row)
+    else:
+        state = dict(row)
+    _remember_account_status("web", user_id, state)
+    return state
 
 
 def get_telegram_user_status(user_id: int) -> Dict[str, Any]:
-    """Ambil status akun Telegram berdasarkan telegram_user_id."""
+    """Ambil status akun Telegram berdasarkan telegram_user_id (di-cache singkat)."""
+    cached = _cached_account_status("telegram", user_id)
+    if cached is not None:
+        return cached
     _ensure_telegram_user_schema()
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
@@ -1243,18 +1568,55 @@ def get_telegram_user_status(user_id: int) -> Dict[str, Any]:
         )
         row = cur.fetchone()
     if not row:
-        return {
+        state = {
             "telegram_user_id": user_id,
             "status": ACCOUNT_STATUS_ACTIVE,
             "status_reason": None,
             "status_changed_at": None,
             "status_changed_by": None,
         }
-    return dict(row)
+    else:
+        state = dict(row)
+    _remember_account_status("telegram", user_id, state)
+    return state
+
+
+def _remember_unlimited_user(user_id: int, state: Dict[str, Any]) -> None:
+    """Simpan status kuota user tanpa batas supaya request berikutnya tidak ke DB."""
+    if UNLIMITED_QUOTA_CACHE_SECONDS <= 0:
+        return
+    expires_at = time.monotonic() + UNLIMITED_QUOTA_CACHE_SECONDS
+    with _UNLIMITED_QUOTA_LOCK:
+        _UNLIMITED_QUOTA_CACHE[user_id] = (expires_at, dict(state))
+
+
+def _cached_unlimited_quota(user_id: int) -> Optional[Dict[str, Any]]:
+    with _UNLIMITED_QUOTA_LOCK:
+        entry = _UNLIMITED_QUOTA_CACHE.get(user_id)
+        if not entry:
+            return None
+        expires_at, state = entry
+        if expires_at <= time.monotonic():
+            _UNLIMITED_QUOTA_CACHE.pop(user_id, None)
+            return None
+        return dict(state)
+
+
+def forget_quota_cache(user_id: Optional[int] = None) -> None:
+    """Hapus cache kuota user tanpa batas (semua user jika user_id kosong)."""
+    with _UNLIMITED_QUOTA_LOCK:
+        if user_id is None:
+            _UNLIMITED_QUOTA_CACHE.clear()
+        else:
+            _UNLIMITED_QUOTA_CACHE.pop(user_id, None)
 
 
 def get_chat_quota_status(user_id: int) -> Dict[str, Any]:
     """Ambil status kuota chat user web, sekaligus reset jika cooldown selesai."""
+    cached = _cached_unlimited_quota(user_id)
+    if cached is not None:
+        cached.pop("allowed", None)
+        return cached
     _ensure_user_schema()
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
@@ -1281,119 +1643,134 @@ def get_chat_quota_status(user_id: int) -> Dict[str, Any]:
         row, updated = _maybe_reset_quota(cur, user_id, row, now)
         if updated:
             conn.commit()
-        return {
+        state = {
             "access_tier": row.get("access_tier") or "full",
             "quota_limit": row.get("quota_limit"),
             "quota_remaining": row.get("quota_remaining"),
             "quota_reset_at": row.get("quota_reset_at"),
             "limited_reason": row.get("limited_reason"),
         }
+        if state["access_tier"] != "limited":
+            _remember_unlimited_user(user_id, state)
+        return state
 
 
-def consume_chat_quota(user_id: int) -> Dict[str, Any]:
+def consume_chat_quota(user_id: int, *, connection=None) -> Dict[str, Any]:
     """
     Kurangi kuota chat user terbatas sebanyak 1.
     Mengembalikan detail status kuota serta flag apakah request boleh dilanjut.
+
+    Reset cooldown, pengurangan kuota, dan pemasangan cooldown baru dikerjakan
+    dalam satu statement (satu round trip) sehingga aman dipanggil paralel.
+    User tanpa batas dilayani dari cache in-process tanpa menyentuh DB.
+    `connection` menggantikan koneksi global (mis. satu koneksi per thread di
+    dashboard/scripts/bench_chat_quota.py).
     """
+    cached = _cached_unlimited_quota(user_id)
+    if cached is not None:
+        cached["allowed"] = True
+        return cached
     _ensure_user_schema()
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+    db_conn = connection or conn
+    with db_conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
             """
+            WITH target AS (
+                SELECT
+                    id,
+                    COALESCE(access_tier, 'full') AS access_tier,
+                    quota_limit,
+                    quota_remaining,
+                    quota_reset_at,
+                    limited_reason,
+                    COALESCE(quota_limit, %(default_limit)s) AS limit_value,
+                    (
+                        quota_remaining IS NULL
+                        OR (quota_reset_at IS NOT NULL AND quota_reset_at <= NOW())
+                    ) AS needs_reset
+                FROM web_users
+                WHERE id = %(user_id)s
+                FOR UPDATE
+            ),
+            decided AS (
+                SELECT
+                    target.*,
+                    CASE WHEN needs_reset THEN limit_value ELSE quota_remaining END AS available,
+                    CASE WHEN needs_reset THEN NULL ELSE quota_reset_at END AS current_reset_at
+                FROM target
+            ),
+            consumed AS (
+                UPDATE web_users AS u
+                SET
+                    quota_limit = d.limit_value,
+                    quota_remaining = GREATEST(d.available - 1, 0),
+                    quota_reset_at = CASE
+                        WHEN d.available = 1
+                            THEN NOW() + make_interval(hours => %(cooldown_hours)s)
+                        WHEN d.available <= 0
+                            THEN COALESCE(
+                                d.current_reset_at,
+                                NOW() + make_interval(hours => %(cooldown_hours)s)
+                            )
+                        ELSE d.current_reset_at
+                    END
+                FROM decided AS d
+                WHERE u.id = d.id
+                  AND d.access_tier = 'limited'
+                RETURNING u.id, u.quota_limit, u.quota_remaining, u.quota_reset_at
+            )
             SELECT
-                id, access_tier, quota_limit,
-                quota_remaining, quota_reset_at, limited_reason
-            FROM web_users
-            WHERE id = %s
-            FOR UPDATE
+                d.access_tier,
+                d.limited_reason,
+                d.available > 0 AS has_quota,
+                COALESCE(c.quota_limit, d.quota_limit) AS quota_limit,
+                COALESCE(c.quota_remaining, d.quota_remaining) AS quota_remaining,
+                CASE WHEN c.id IS NULL THEN d.quota_reset_at ELSE c.quota_reset_at END
+                    AS quota_reset_at
+            FROM decided AS d
+            LEFT JOIN consumed AS c ON c.id = d.id
             """,
-            (user_id,),
+            {
+                "user_id": user_id,
+                "default_limit": DEFAULT_LIMITED_QUOTA,
+                "cooldown_hours": LIMIT_COOLDOWN_HOURS,
+            },
         )
         row = cur.fetchone()
-        if not row:
-            conn.commit()
-            return {
-                "allowed": False,
-                "access_tier": None,
-                "quota_limit": None,
-                "quota_remaining": None,
-                "quota_reset_at": None,
-                "limited_reason": None,
-                "error": "user_not_found",
-            }
+    db_conn.commit()
 
-        now = datetime.now(timezone.utc)
-        row, updated = _maybe_reset_quota(cur, user_id, row, now)
-        access_tier = row.get("access_tier") or "full"
-
-        if access_tier != "limited":
-            conn.commit()
-            return {
-                "allowed": True,
-                "access_tier": access_tier,
-                "quota_limit": row.get("quota_limit"),
-                "quota_remaining": row.get("quota_remaining"),
-                "quota_reset_at": row.get("quota_reset_at"),
-                "limited_reason": row.get("limited_reason"),
-            }
-
-        limit_value = row.get("quota_limit") or DEFAULT_LIMITED_QUOTA
-        quota_remaining = row.get("quota_remaining")
-        reset_at = row.get("quota_reset_at")
-
-        if quota_remaining is None:
-            quota_remaining = limit_value
-            cur.execute(
-                """
-                UPDATE web_users
-                SET quota_remaining = %s,
-                    quota_reset_at = NULL
-                WHERE id = %s
-                """,
-                (quota_remaining, user_id),
-            )
-            updated = True
-
-        if quota_remaining <= 0:
-            if not reset_at:
-                reset_at = now + timedelta(hours=LIMIT_COOLDOWN_HOURS)
-                cur.execute(
-                    "UPDATE web_users SET quota_reset_at = %s WHERE id = %s",
-                    (reset_at, user_id),
-                )
-                updated = True
-            conn.commit()
-            return {
-                "allowed": False,
-                "access_tier": access_tier,
-                "quota_limit": limit_value,
-                "quota_remaining": 0,
-                "quota_reset_at": reset_at,
-                "limited_reason": row.get("limited_reason") or DEFAULT_LIMITED_REASON,
-            }
-
-        new_remaining = max(0, quota_remaining - 1)
-        new_reset_at = reset_at
-        if new_remaining == 0:
-            new_reset_at = now + timedelta(hours=LIMIT_COOLDOWN_HOURS)
-
-        cur.execute(
-            """
-            UPDATE web_users
-            SET quota_remaining = %s,
-                quota_reset_at = %s
-            WHERE id = %s
-            """,
-            (new_remaining, new_reset_at, user_id),
-        )
-        conn.commit()
+    if not row:
         return {
+            "allowed": False,
+            "access_tier": None,
+            "quota_limit": None,
+            "quota_remaining": None,
+            "quota_reset_at": None,
+            "limited_reason": None,
+            "error": "user_not_found",
+        }
+
+    access_tier = row.get("access_tier") or "full"
+    if access_tier != "limited":
+        state = {
             "allowed": True,
             "access_tier": access_tier,
-            "quota_limit": limit_value,
-            "quota_remaining": new_remaining,
-            "quota_reset_at": new_reset_at,
-            "limited_reason": row.get("limited_reason") or DEFAULT_LIMITED_REASON,
+            "quota_limit": row.get("quota_limit"),
+            "quota_remaining": row.get("quota_remaining"),
+            "quota_reset_at": row.get("quota_reset_at"),
+            "limited_reason": row.get("limited_reason"),
         }
+        _remember_unlimited_user(user_id, state)
+        return state
+
+    return {
+        "allowed": bool(row.get("has_quota")),
+        "access_tier": access_tier,
+        "quota_limit": row.get("quota_limit"),
+        "quota_remaining": row.get("quota_remaining"),
+        "quota_reset_at": row.get("quota_reset_at"),
+        "limited_reason": row.get("limited_reason") or DEFAULT_LIMITED_REASON,
+    }
 
 def _ensure_corruption_schema() -> None:
     """Pastikan tabel untuk laporan korupsi (corruption_reports) tersedia."""
@@ -1442,6 +1819,8 @@ def record_corruption_report(data: Dict[str, Any]) -> Optional[int]:
             ),
         )
         row = cur.fetchone()
+        if row:
+            notify_inbox_change(cur, "corruption", "created", row[0])
     conn.commit()
     return int(row[0]) if row else None
 
@@ -1503,21 +1882,20 @@ def _ensure_twitter_log_schema() -> None:
         )
     conn.commit()
 
-def record_twitter_log(
+def _normalize_twitter_log(
     level: str,
     message: str,
     *,
     tweet_id: Optional[int] = None,
     twitter_user_id: Optional[int] = None,
     context: Optional[Dict[str, Any]] = None,
-) -> None:
-    """Simpan log worker Twitter ke database untuk dipantau via dashboard."""
+) -> Optional[Tuple[Any, ...]]:
     if not message:
-        return
+        return None
     clean_level = (level or "INFO").strip().upper()
     clean_message = message.strip()
     if not clean_message:
-        return
+        return None
     if len(clean_message) > 4000:
         clean_message = clean_message[:4000]
 
@@ -1532,34 +1910,122 @@ def record_twitter_log(
             else:
                 context_payload[key] = str(value)
 
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO twitter_worker_logs (level, message, context, tweet_id, twitter_user_id)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (
-                clean_level,
-                clean_message,
-                Json(context_payload) if context_payload else None,
-                tweet_id,
-                twitter_user_id,
-            ),
+    return (
+        clean_level,
+        clean_message,
+        Json(context_payload) if context_payload else None,
+        tweet_id,
+        twitter_user_id,
+    )
+
+
+def _get_twitter_log_conn():
+    """Koneksi khusus writer log Twitter supaya tidak berebut dengan db.conn."""
+    global _TWITTER_LOG_CONN
+    if _TWITTER_LOG_CONN is None or _TWITTER_LOG_CONN.closed:
+        _TWITTER_LOG_CONN = psycopg2.connect(**conn_args)
+        with _TWITTER_LOG_CONN.cursor() as cur:
+            # Writer log tidak boleh menahan worker terlalu lama
+            cur.execute("SET statement_timeout = %s", (TWITTER_LOG_STATEMENT_TIMEOUT_MS,))
+        _TWITTER_LOG_CONN.commit()
+    return _TWITTER_LOG_CONN
+
+
+def record_twitter_logs(entries: List[Dict[str, Any]]) -> int:
+    """
+    Simpan banyak log worker Twitter dalam satu INSERT multi-row.
+    Setiap entry berisi key level, message, dan opsional tweet_id,
+    twitter_user_id, context. Mengembalikan jumlah baris yang ditulis.
+    """
+    rows = []
+    for entry in entries:
+        row = _normalize_twitter_log(
+            entry.get("level") or "INFO",
+            entry.get("message") or "",
+            tweet_id=entry.get("tweet_id"),
+            twitter_user_id=entry.get("twitter_user_id"),
+            context=entry.get("context"),
         )
-        if MAX_TWITTER_LOG_ROWS > 0:
+        if row:
+            rows.append(row)
+    if not rows:
+        return 0
+    log_conn = _get_twitter_log_conn()
+    try:
+        with log_conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO twitter_worker_logs (level, message, context, tweet_id, twitter_user_id)
+                VALUES %s
+                """,
+                rows,
+            )
+        log_conn.commit()
+    except Exception:
+        try:
+            log_conn.rollback()
+        except Exception:
+            log_conn.close()
+        raise
+    return len(rows)
+
+
+def prune_twitter_logs(max_rows: Optional[int] = None) -> int:
+    """
+    Retensi log Twitter: hapus semua baris di bawah ambang id ke-N terbaru.
+    Cukup satu lookup di primary key, jadi murah untuk dijalankan berkala.
+    """
+    keep = MAX_TWITTER_LOG_ROWS if max_rows is None else max(0, int(max_rows))
+    if keep <= 0:
+        return 0
+    log_conn = _get_twitter_log_conn()
+    try:
+        with log_conn.cursor() as cur:
             cur.execute(
                 """
                 DELETE FROM twitter_worker_logs
-                WHERE id NOT IN (
+                WHERE id <= (
                     SELECT id
                     FROM twitter_worker_logs
-                    ORDER BY created_at DESC, id DESC
-                    LIMIT %s
+                    ORDER BY id DESC
+                    OFFSET %s
+                    LIMIT 1
                 )
                 """,
-                (MAX_TWITTER_LOG_ROWS,),
-                )
-    conn.commit()
+                (keep,),
+            )
+            deleted = cur.rowcount or 0
+        log_conn.commit()
+    except Exception:
+        try:
+            log_conn.rollback()
+        except Exception:
+            log_conn.close()
+        raise
+    return deleted
+
+
+def record_twitter_log(
+    level: str,
+    message: str,
+    *,
+    tweet_id: Optional[int] = None,
+    twitter_user_id: Optional[int] = None,
+    context: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Simpan satu log worker Twitter ke database untuk dipantau via dashboard."""
+    record_twitter_logs(
+        [
+            {
+                "level": level,
+                "message": message,
+                "tweet_id": tweet_id,
+                "twitter_user_id": twitter_user_id,
+                "context": context,
+            }
+        ]
+    )
 
 # --- Latihan TKA helpers ----------------------------------------------------
 
@@ -3237,6 +3703,7 @@ def mark_tka_analysis_sent(attempt_id: int) -> None:
 _ensure_chat_logs_schema()
 _ensure_bullying_schema()
 _ensure_psych_schema()
+_ensure_feedback_schema()
 _ensure_user_schema()
 _ensure_telegram_user_schema()
 _ensure_corruption_schema()
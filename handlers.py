@@ -11,7 +11,7 @@ from telegram.ext import ContextTypes
 from dotenv import load_dotenv
 
 from ai_core import build_qa_chain
-from db import save_chat, get_chat_history, get_telegram_user_status
+from db import save_chat, get_recent_chat_history, get_telegram_user_status
 from responses import (
     ASKA_NO_DATA_RESPONSE,
     ASKA_TECHNICAL_ISSUE_RESPONSE,
@@ -324,7 +324,7 @@ async def handle_user_query(
         await send_typing_once(context.bot, update.effective_chat.id, delay=0)
         print(f"[{now_str()}] ASKA sedang mengetik...")
 
-        history_from_db = get_chat_history(user_id, limit=5, offset=0)
+        history_from_db = get_recent_chat_history(user_id, limit=5)
         chat_history = format_history_for_chain(history_from_db)
 
         start_time = time.perf_counter()
@@ -0,0 +1,51 @@
+"""Kanal LISTEN/NOTIFY untuk perubahan kotak masuk laporan (bullying, konseling, korupsi)."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+# Payload berformat JSON {"kind": ..., "event": ..., "id": ..., "severity": ...}; id kosong untuk
+# perubahan massal, severity hanya dikirim untuk laporan baru.
+INBOX_NOTIFY_CHANNEL = "aska_inbox"
+
+INBOX_REPORT_KINDS = ("bullying", "psych", "corruption")
+
+
+def inbox_notify_payload(
+    kind: str,
+    event: str,
+    report_id: Optional[int] = None,
+    *,
+    severity: Optional[str] = None,
+) -> str:
+    """Susun payload NOTIFY yang ringkas (batas Postgres 8000 byte)."""
+    payload: dict[str, Any] = {"kind": kind, "event": event}
+    if report_id is not None:
+        payload["id"] = int(report_id)
+    if severity:
+        payload["severity"] = str(severity)
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def notify_inbox_change(
+    cur: Any,
+    kind: str,
+    event: str,
+    report_id: Optional[int] = None,
+    *,
+    severity: Optional[str] = None,
+) -> None:
+    """Kirim NOTIFY di transaksi `cur`; baru terkirim ke listener saat transaksi commit."""
+    cur.execute(
+        "SELECT pg_notify(%s, %s)",
+        (INBOX_NOTIFY_CHANNEL, inbox_notify_payload(kind, event, report_id, severity=severity)),
+    )
+
+
+__all__ = [
+    "INBOX_NOTIFY_CHANNEL",
+    "INBOX_REPORT_KINDS",
+    "inbox_notify_payload",
+    "notify_inbox_change",
+]
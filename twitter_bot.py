@@ -1,6 +1,10 @@
+import asyncio
 import json
 import logging
 import os
+import queue
+import random
+import threading
 import time
 import hashlib
 from datetime import datetime
@@ -12,7 +16,7 @@ import requests
 from dotenv import load_dotenv
 
 from ai_core import build_qa_chain
-from db import save_chat, get_chat_history, record_twitter_log
+from db import save_chat, get_recent_chat_history, record_twitter_logs, prune_twitter_logs
 from responses import ASKA_NO_DATA_RESPONSE, ASKA_TECHNICAL_ISSUE_RESPONSE
 from utils import (
     coerce_to_text,
@@ -32,7 +36,36 @@ LOGGER = logging.getLogger("aska.twitter")
 
 
 class _TwitterDBLogHandler(logging.Handler):
-    """Logging handler yang menyimpan log penting ke database untuk dashboard."""
+    """
+    Logging handler yang menyimpan log penting ke database untuk dashboard.
+
+    `emit` hanya menaruh record ke antrean terbatas; thread latar menulis
+    batch lewat `record_twitter_logs` dan menjalankan retensi berkala.
+    Jika DB lambat dan antrean penuh, log dibuang (dihitung di `dropped`)
+    daripada menahan worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        prune_interval: float = 300.0,
+    ) -> None:
+        super().__init__()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.1, flush_interval)
+        self.prune_interval = max(0.0, prune_interval)
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._last_prune = 0.0
+        self._writer = threading.Thread(
+            target=self._drain_forever,
+            name="aska-twitter-db-log",
+            daemon=True,
+        )
+        self._writer.start()
 
     def emit(self, record: logging.LogRecord) -> None:
         if record.levelno < logging.INFO:
@@ -67,17 +100,57 @@ class _TwitterDBLogHandler(logging.Handler):
                 except Exception:
                     context["exception"] = "Unable to format exception."
 
-            record_twitter_log(
-                record.levelname,
-                message,
-                tweet_id=tweet_id,
-                twitter_user_id=twitter_user_id,
-                context=context,
+            self._queue.put_nowait(
+                {
+                    "level": record.levelname,
+                    "message": message,
+                    "tweet_id": tweet_id,
+                    "twitter_user_id": twitter_user_id,
+                    "context": context,
+                }
             )
+        except queue.Full:
+            self.dropped += 1
         except Exception:
             # Hindari recursive logging di handler
             pass
 
+    def _drain_forever(self) -> None:
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                batch.append(item)
+                while len(batch) < self.batch_size:
+                    try:
+                        extra = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if extra is not None:
+                        batch.append(extra)
+            if batch:
+                try:
+                    record_twitter_logs(batch)
+                except Exception:
+                    # DB sedang bermasalah; batch ini dibuang, worker tetap jalan
+                    self.dropped += len(batch)
+            self._maybe_prune()
+
+    def _maybe_prune(self) -> None:
+        if self.prune_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        try:
+            prune_twitter_logs()
+        except Exception:
+            pass
+
 DEFAULT_SPAM_KEYWORDS = {
     "follow back", "folback", "promo", "promote", "dm for collab",
     "shoutout", "boost me", "subscribe", "retweet this",
@@ -117,6 +190,62 @@ def _parse_tweepy_error(exc) -> Dict[str, Any]:
     return data
 
 
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class _TokenBucket:
+    """
+    Token bucket sederhana untuk anggaran rate-limit per tahap (fetch/LLM/post).
+    `penalize` dipakai saat API membalas 429 supaya bucket kosong sampai waktu reset.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float) -> None:
+        self.capacity = max(1.0, float(capacity))
+        self.refill_per_second = max(1e-6, float(refill_per_second))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Detik yang harus ditunggu sampai satu token tersedia."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            blocked = max(0.0, self._blocked_until - now)
+            missing = max(0.0, 1.0 - self._tokens)
+            return max(blocked, missing / self.refill_per_second)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until or self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    async def acquire(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(max(0.05, self.wait_time()))
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + max(0.0, seconds))
+
+
 class TwitterAskaBot:
     def __init__(self) -> None:
         load_dotenv()
@@ -125,7 +254,12 @@ class TwitterAskaBot:
             format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
         )
         if not any(isinstance(h, _TwitterDBLogHandler) for h in LOGGER.handlers):
-            db_handler = _TwitterDBLogHandler()
+            db_handler = _TwitterDBLogHandler(
+                queue_size=int(os.getenv("TWITTER_LOG_QUEUE_SIZE", "1000")),
+                batch_size=int(os.getenv("TWITTER_LOG_BATCH_SIZE", "50")),
+                flush_interval=_env_float("TWITTER_LOG_FLUSH_INTERVAL", 2.0),
+                prune_interval=_env_float("TWITTER_LOG_PRUNE_INTERVAL", 300.0),
+            )
             db_handler.setLevel(logging.INFO)
             LOGGER.addHandler(db_handler)
 
@@ -146,9 +280,30 @@ class TwitterAskaBot:
         self.mentions_cooldown = int(os.getenv("TWITTER_MENTIONS_COOLDOWN", "180"))
         self.mentions_max_results = int(os.getenv("TWITTER_MENTIONS_MAX_RESULTS", "5"))
         self.mentions_latest_only = os.getenv("TWITTER_MENTIONS_LATEST_ONLY", "false").strip().lower() in {"1", "true", "yes", "on"}
-        self._mentions_backoff_until = 0.0
         self._mentions_backoff_last = self.mentions_cooldown
 
+        # Anggaran rate-limit per tahap pipeline async (lihat run_async)
+        self.generate_concurrency = max(1, int(os.getenv("TWITTER_GENERATE_CONCURRENCY", "2")))
+        self.post_concurrency = max(1, int(os.getenv("TWITTER_POST_CONCURRENCY", "1")))
+        self.pipeline_queue_size = max(1, int(os.getenv("TWITTER_PIPELINE_QUEUE_SIZE", "20")))
+        self._mentions_bucket = _TokenBucket(
+            capacity=1,
+            refill_per_second=1.0 / max(1, self.poll_interval),
+        )
+        self._llm_bucket = _TokenBucket(
+            capacity=max(1.0, _env_float("TWITTER_LLM_BURST", 3)),
+            refill_per_second=max(0.01, _env_float("TWITTER_LLM_PER_MINUTE", 30)) / 60.0,
+        )
+        self._post_bucket = _TokenBucket(
+            capacity=max(1.0, _env_float("TWITTER_POST_BURST", 5)),
+            refill_per_second=max(0.001, _env_float("TWITTER_POST_PER_HOUR", 100)) / 3600.0,
+        )
+        self._state_lock = threading.Lock()
+        # Worker generate/post/autopost jalan di thread berbeda tetapi save_chat dan
+        # get_recent_chat_history memakai satu koneksi global db.conn: panggilan DB
+        # diserialkan supaya transaksi antar-thread tidak saling bercampur.
+        self._db_lock = threading.Lock()
+
         # Spam cfg (permisif)
         self.spam_keywords = self._load_spam_keywords()
 
@@ -265,41 +420,147 @@ class TwitterAskaBot:
 
     def _persist_state(self) -> None:
         try:
-            payload = {"last_seen_id": self.last_seen_id, "autopost": self.autopost_state}
-            with self.state_path.open("w", encoding="utf-8") as f:
-                json.dump(payload, f)
+            with self._state_lock:
+                payload = {"last_seen_id": self.last_seen_id, "autopost": self.autopost_state}
+                with self.state_path.open("w", encoding="utf-8") as f:
+                    json.dump(payload, f)
         except Exception as exc:
             LOGGER.error("Unable to persist state file %s: %s", self.state_path, exc)
 
     # ── Loop ───────────────────────────────────────────────
     def run(self) -> None:
-        LOGGER.info("Starting polling loop (interval=%s seconds)", self.poll_interval)
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        """
+        Worker async: fetch mention, generate jawaban LLM, dan posting berjalan
+        sebagai tahap terpisah yang dihubungkan antrean terbatas, masing-masing
+        dengan token bucket sendiri. Autopost punya task sendiri sehingga
+        jadwalnya tidak bergeser oleh lonjakan mention.
+        """
+        LOGGER.info(
+            "Starting async worker (poll=%ss, generate=%d, post=%d)",
+            self.poll_interval, self.generate_concurrency, self.post_concurrency,
+        )
+        generate_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        post_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+
+        tasks = [
+            asyncio.create_task(self._generate_worker(generate_queue, post_queue))
+            for _ in range(self.generate_concurrency)
+        ]
+        tasks.extend(
+            asyncio.create_task(self._post_worker(post_queue))
+            for _ in range(self.post_concurrency)
+        )
         if self.autopost_enabled:
-            self._maybe_autopost(ignore_interval=False)
+            tasks.append(asyncio.create_task(self._autopost_loop()))
+        tasks.append(asyncio.create_task(self._mentions_loop(generate_queue, post_queue)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _mentions_loop(self, generate_queue: asyncio.Queue, post_queue: asyncio.Queue) -> None:
         while True:
+            if not self.mentions_enabled:
+                LOGGER.debug("Mentions disabled by env; skipping.")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            remain = self._mentions_bucket.wait_time()
+            if remain > 1:
+                LOGGER.info("Mentions backoff active (%ss remaining); waiting.", int(remain))
+            await self._mentions_bucket.acquire()
             try:
-                if self.mentions_enabled and time.time() >= self._mentions_backoff_until:
-                    self.process_mentions()
-                elif not self.mentions_enabled:
-                    LOGGER.debug("Mentions disabled by env; skipping.")
-                else:
-                    remain = int(self._mentions_backoff_until - time.time())
-                    if remain > 0:
-                        LOGGER.info("Mentions backoff active (%ss remaining); skipping this cycle.", remain)
+                batch = await asyncio.to_thread(self._fetch_mentions)
+                if batch:
+                    tweets, user_map, newest_id = batch
+                    for tweet in tweets:
+                        await generate_queue.put((tweet, user_map))
+                    # last_seen_id baru digeser setelah seluruh batch terkirim
+                    await generate_queue.join()
+                    await post_queue.join()
+                    self._advance_last_seen(newest_id)
+            except Exception:
+                LOGGER.exception("Unexpected error while processing mentions cycle")
+
+    async def _generate_worker(self, generate_queue: asyncio.Queue, post_queue: asyncio.Queue) -> None:
+        while True:
+            tweet, user_map = await generate_queue.get()
+            try:
+                prepared = await asyncio.to_thread(self._prepare_mention, tweet, user_map)
+                if prepared:
+                    await self._llm_bucket.acquire()
+                    reply_text = await asyncio.to_thread(
+                        self._generate_reply, prepared["user_id"], prepared["cleaned"]
+                    )
+                    await post_queue.put((tweet, prepared, reply_text))
+            except Exception:
+                LOGGER.exception("Failed to generate reply for tweet %s", getattr(tweet, "id", None))
+            finally:
+                generate_queue.task_done()
 
-                if self.autopost_enabled:
-                    self._maybe_autopost(ignore_interval=False)
+    async def _post_worker(self, post_queue: asyncio.Queue) -> None:
+        while True:
+            tweet, prepared, reply_text = await post_queue.get()
+            try:
+                await self._post_bucket.acquire()
+                await asyncio.to_thread(
+                    self._post_reply, tweet, prepared["username"], prepared["user_id"], reply_text
+                )
+            except Exception:
+                LOGGER.exception("Failed to post reply for tweet %s", getattr(tweet, "id", None))
+            finally:
+                post_queue.task_done()
+
+    async def _autopost_once(self) -> None:
+        """Token post hanya diambil bila memang ada kandidat yang akan di-tweet."""
+        candidate = await asyncio.to_thread(self._next_autopost, ignore_interval=False)
+        if candidate is None:
+            return
+        await self._post_bucket.acquire()
+        await asyncio.to_thread(self._publish_autopost, candidate)
+
+    async def _autopost_loop(self) -> None:
+        try:
+            await self._autopost_once()
+        except Exception:
+            LOGGER.exception("Unexpected error while auto-posting")
+        while True:
+            last_ts = float(self.autopost_state.get("last_timestamp") or 0)
+            # Tidur sampai jadwal berikutnya (bukan poll_interval) supaya tidak drift
+            delay = max(1.0, last_ts + self.autopost_interval - time.time())
+            await asyncio.sleep(min(delay, self.autopost_interval))
+            if time.time() - float(self.autopost_state.get("last_timestamp") or 0) < self.autopost_interval:
+                continue
+            try:
+                await self._autopost_once()
             except Exception:
-                LOGGER.exception("Unexpected error while processing cycle")
-            time.sleep(self.poll_interval)
+                LOGGER.exception("Unexpected error while auto-posting")
 
     # ── Mentions ───────────────────────────────────────────
     def process_mentions(self) -> None:
-        if time.time() < self._mentions_backoff_until:
-            remain = int(self._mentions_backoff_until - time.time())
+        """Satu siklus mention secara serial (dipakai untuk run manual/sekali jalan)."""
+        if not self._mentions_bucket.try_acquire():
+            remain = int(self._mentions_bucket.wait_time())
             LOGGER.info("Mentions backoff still active (%ss); skip.", remain)
             return
+        batch = self._fetch_mentions()
+        if not batch:
+            return
+        tweets, user_map, newest_id = batch
+        for tweet in tweets:
+            self._handle_tweet(tweet, user_map)
+        self._advance_last_seen(newest_id)
+
+    def _advance_last_seen(self, newest_id: Optional[str]) -> None:
+        if newest_id:
+            self.last_seen_id = int(newest_id)
+            self._persist_state()
 
+    def _fetch_mentions(self):
+        """Ambil mention baru; kembalikan (tweets, user_map, newest_id) atau None."""
         # API mensyaratkan 5..100
         if self.mentions_latest_only:
             requested_max = 5
@@ -328,12 +589,11 @@ class TwitterAskaBot:
                     cool = max(30, min(reset_at - now, 900))
             except Exception:
                 pass
-            import random
             cool += int(cool * random.uniform(0, 0.1))  # jitter
             self._mentions_backoff_last = cool
-            self._mentions_backoff_until = time.time() + cool
+            self._mentions_bucket.penalize(cool)
             LOGGER.warning("Mentions rate-limited (429). Backing off for %ss (jittered).", cool)
-            return
+            return None
         except tweepy.BadRequest as exc:
             LOGGER.warning("Mentions 400 Bad Request: %s. Retrying once with max_results=5.", exc)
             params["max_results"] = 5
@@ -342,15 +602,15 @@ class TwitterAskaBot:
                 self._mentions_backoff_last = self.mentions_cooldown
             except Exception as exc2:
                 LOGGER.warning("Mentions fallback failed: %s", exc2)
-                return
+                return None
         except (tweepy.TweepyException, requests.RequestException) as exc:
             LOGGER.warning("Failed to fetch mentions (retry next cycle): %s", exc)
-            return
+            return None
 
         tweets = response.data or []
         if not tweets:
             LOGGER.debug("No new mentions found.")
-            return
+            return None
 
         # Build user map
         user_map: Dict[int, str] = {}
@@ -376,23 +636,30 @@ class TwitterAskaBot:
             tweets_to_process = list(reversed(tweets))
             LOGGER.info("Processing %d new mentions", len(tweets_to_process))
 
-        for tweet in tweets_to_process:
-            self._handle_tweet(tweet, user_map)
-
         newest_id = response.meta.get("newest_id") if response.meta else None
         try:
             if self.mentions_latest_only and tweets_to_process:
                 newest_id = str(tweets_to_process[0].id)
         except Exception:
             pass
-        if newest_id:
-            self.last_seen_id = int(newest_id)
-            self._persist_state()
+        return tweets_to_process, user_map, newest_id
 
     def _handle_tweet(self, tweet: tweepy.Tweet, user_map: Optional[Dict[int, str]] = None) -> None:
+        prepared = self._prepare_mention(tweet, user_map)
+        if not prepared:
+            return
+        reply_text = self._generate_reply(prepared["user_id"], prepared["cleaned"])
+        self._post_reply(tweet, prepared["username"], prepared["user_id"], reply_text)
+
+    def _prepare_mention(
+        self,
+        tweet: tweepy.Tweet,
+        user_map: Optional[Dict[int, str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Filter self/spam mention dan simpan pesan masuk; None jika dilewati."""
         if int(tweet.author_id) == self.bot_user_id:
             LOGGER.debug("Skipping self mention tweet %s", tweet.id)
-            return
+            return None
 
         username = None
         try:
@@ -412,17 +679,26 @@ class TwitterAskaBot:
 
         if self._is_spam_content(username, raw_text, cleaned):
             LOGGER.info("Skipping spam/empty mention from @%s (%s)", username, tweet.id)
-            return
+            return None
 
         LOGGER.info("Mention from @%s: %s", username, raw_text.replace("\n", " "))
         user_id = int(tweet.author_id)
 
         try:
-            save_chat(user_id, username, raw_text, role="user", topic="twitter")
+            with self._db_lock:
+                save_chat(user_id, username, raw_text, role="user", topic="twitter")
         except Exception:
             LOGGER.exception("Failed to persist incoming tweet %s to chat history", tweet.id)
 
-        reply_text = self._generate_reply(user_id, cleaned)
+        return {"user_id": user_id, "username": username, "cleaned": cleaned}
+
+    def _post_reply(
+        self,
+        tweet: tweepy.Tweet,
+        username: Optional[str],
+        user_id: int,
+        reply_text: str,
+    ) -> None:
         prefix = f"@{username} " if username else ""
         status = (prefix + reply_text)[:280]
 
@@ -480,7 +756,8 @@ class TwitterAskaBot:
             return
 
         try:
-            save_chat(user_id, "ASKA", reply_text, role="aska", topic="twitter")
+            with self._db_lock:
+                save_chat(user_id, "ASKA", reply_text, role="aska", topic="twitter")
         except Exception:
             LOGGER.exception("Failed to persist ASKA reply for tweet %s", tweet.id)
         finally:
@@ -561,7 +838,8 @@ class TwitterAskaBot:
 
         history = []
         try:
-            history = get_chat_history(user_id, limit=5)
+            with self._db_lock:
+                history = get_recent_chat_history(user_id, limit=5)
         except Exception:
             LOGGER.exception("Failed to fetch chat history for user %s", user_id)
 
@@ -623,11 +901,20 @@ class TwitterAskaBot:
         return entries
 
     def _maybe_autopost(self, *, ignore_interval: bool = False) -> None:
+        candidate = self._next_autopost(ignore_interval=ignore_interval)
+        if candidate is not None:
+            self._publish_autopost(candidate)
+
+    def _next_autopost(self, *, ignore_interval: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Pilih pesan autopost berikutnya (gerbang interval, render, cek duplikat).
+        None bila tidak ada yang perlu di-tweet; entri yang dilewati langsung dicatat.
+        """
         if not self.autopost_entries:
             if self._autopost_log_state != "empty":
                 LOGGER.info("Auto-post skipped: no messages loaded.")
                 self._autopost_log_state = "empty"
-            return
+            return None
 
         now_ts = time.time()
         last_ts = float(self.autopost_state.get("last_timestamp") or 0)
@@ -636,14 +923,14 @@ class TwitterAskaBot:
             if now_ts - last_ts < self.autopost_interval:
                 remain = int(self.autopost_interval - (now_ts - last_ts))
                 LOGGER.info("Auto-post skipped: interval gate (%ss remaining).", remain)
-                return
+                return None
         else:
             LOGGER.info("Auto-post running with ignore_interval=True (forced on start).")
 
         total_entries = len(self.autopost_entries)
         if total_entries == 0:
             LOGGER.info("Auto-post skipped: entries=0.")
-            return
+            return None
 
         next_index = int(self.autopost_state.get("next_index") or 0)
         entry = self.autopost_entries[next_index % total_entries]
@@ -655,7 +942,7 @@ class TwitterAskaBot:
             self.autopost_state["last_timestamp"] = now_ts
             self._autopost_log_state = "empty"
             self._persist_state()
-            return
+            return None
 
         message = self._apply_placeholders(" ".join(message.split()))
         if len(message) > 280:
@@ -670,10 +957,23 @@ class TwitterAskaBot:
             self.autopost_state["last_timestamp"] = now_ts
             self._autopost_log_state = "duplicate"
             self._persist_state()
-            return
+            return None
 
         LOGGER.debug("Auto-post candidate ready (index=%s, mode=%s, length=%s): %s",
                      next_index, entry.get("mode", "static"), len(message), message)
+        return {
+            "index": next_index,
+            "entry": entry,
+            "message": message,
+            "hash": message_hash,
+            "timestamp": now_ts,
+        }
+
+    def _publish_autopost(self, candidate: Dict[str, Any]) -> None:
+        next_index = candidate["index"]
+        entry = candidate["entry"]
+        message = candidate["message"]
+        total_entries = len(self.autopost_entries)
 
         try:
             self._client.create_tweet(text=message)
@@ -684,22 +984,24 @@ class TwitterAskaBot:
             return
 
         try:
-            save_chat(
-                self.bot_user_id,
-                self.bot_username,
-                message,
-                role="aska",
-                topic="twitter",
-            )
+            with self._db_lock:
+                save_chat(
+                    self.bot_user_id,
+                    self.bot_username,
+                    message,
+                    role="aska",
+                    topic="twitter",
+                )
         except Exception:
             LOGGER.exception("Failed to persist auto-post tweet to chat history")
 
-        recent_hashes.append(message_hash)
+        recent_hashes = list(self.autopost_state.get("recent_hashes") or [])
+        recent_hashes.append(candidate["hash"])
         if len(recent_hashes) > self.autopost_recent_limit:
             recent_hashes = recent_hashes[-self.autopost_recent_limit:]
         self.autopost_state["recent_hashes"] = recent_hashes
         self.autopost_state["next_index"] = (next_index + 1) % total_entries
-        self.autopost_state["last_timestamp"] = now_ts
+        self.autopost_state["last_timestamp"] = candidate["timestamp"]
         self._autopost_log_state = "posted"
         self._persist_state()
 
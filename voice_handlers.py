@@ -1,6 +1,9 @@
 import os
-import tempfile
+import io
+import shutil
 import asyncio
+import threading
+import time
 from typing import Optional
 
 from dotenv import load_dotenv
@@ -10,9 +13,22 @@ from telegram.ext import ContextTypes
 
 from utils import now_str, should_respond
 
+try:  # opsional, hanya dipakai bila STT lokal diaktifkan (model "local:<ukuran>")
+    from faster_whisper import WhisperModel
+except Exception:  # pragma: no cover - optional dependency
+    WhisperModel = None  # type: ignore[misc,assignment]
+
 
 load_dotenv()
 
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
 # Configure STT dengan endpoint OpenAI-compatible (default ke OpenAI Whisper)
 _STT_API_KEY = os.getenv("ASKA_STT_API_KEY") or os.getenv("OPENAI_API_KEY")
 _STT_API_BASE = os.getenv("ASKA_STT_API_BASE") or "https://api.openai.com/v1"
@@ -27,47 +43,230 @@ except Exception as exc:
     print(f"[VOICE] Gagal inisialisasi klien STT OpenAI-compatible: {exc}")
     audio_client = None
 
-STT_MODELS: list[str] = []
-_env_model = os.getenv("OPENAI_STT_MODEL")
-if _env_model:
-    STT_MODELS.append(_env_model)
-if "gpt-4o-mini-transcribe" not in STT_MODELS:
-    STT_MODELS.append("gpt-4o-mini-transcribe")
-if "whisper-1" not in STT_MODELS:
-    STT_MODELS.append("whisper-1")
+# Urutan model STT. Entri "local:<ukuran>" memakai faster-whisper di CPU (tanpa jaringan).
+STT_MODELS: list[str] = [
+    model.strip() for model in os.getenv("ASKA_STT_MODELS", "").split(",") if model.strip()
+]
+if not STT_MODELS:
+    _env_model = os.getenv("OPENAI_STT_MODEL")
+    if _env_model:
+        STT_MODELS.append(_env_model)
+    if "gpt-4o-mini-transcribe" not in STT_MODELS:
+        STT_MODELS.append("gpt-4o-mini-transcribe")
+    if "whisper-1" not in STT_MODELS:
+        STT_MODELS.append("whisper-1")
+    _local_model = os.getenv("ASKA_STT_LOCAL_MODEL")
+    if _local_model:
+        STT_MODELS.append(f"local:{_local_model}")
 
+STT_LANGUAGE = (os.getenv("ASKA_STT_LANGUAGE") or "").strip() or None
+# Model berikutnya dijalankan paralel bila model sebelumnya belum selesai dalam HEDGE detik
+STT_HEDGE_SECONDS = max(0.1, _env_float("ASKA_STT_HEDGE_SECONDS", 2.5))
+# Batas total waktu transkripsi satu pesan suara
+STT_BUDGET_SECONDS = max(1.0, _env_float("ASKA_STT_BUDGET_SECONDS", 15.0))
 
-def transcribe_audio(path: str) -> str:
-    if audio_client is None:
+# Pra-proses audio lewat ffmpeg: buang hening di awal/akhir, mono, downsample
+STT_SAMPLE_RATE = int(_env_float("ASKA_STT_SAMPLE_RATE", 16000))
+STT_SILENCE_DB = _env_float("ASKA_STT_SILENCE_DB", -45.0)
+_FFMPEG_BIN = shutil.which(os.getenv("ASKA_FFMPEG_BIN", "ffmpeg"))
+_PREPROCESS_ENABLED = os.getenv("ASKA_STT_PREPROCESS", "1").strip().lower() not in {"0", "false", "no"}
+
+_LOCAL_DEVICE = os.getenv("ASKA_STT_LOCAL_DEVICE", "cpu")
+_LOCAL_COMPUTE_TYPE = os.getenv("ASKA_STT_LOCAL_COMPUTE", "int8")
+_local_models: dict[str, "WhisperModel"] = {}
+_local_lock = threading.Lock()
+
+_stt_stats: dict[str, dict[str, float]] = {}
+_stt_stats_lock = threading.Lock()
+
+
+def _record_stt(model: str, elapsed: float, ok: bool, won: bool = False) -> None:
+    with _stt_stats_lock:
+        stats = _stt_stats.setdefault(
+            model, {"calls": 0, "failures": 0, "wins": 0, "total_ms": 0.0, "last_ms": 0.0}
+        )
+        if won:
+            stats["wins"] += 1
+            return
+        stats["calls"] += 1
+        stats["failures"] += 0 if ok else 1
+        stats["total_ms"] += elapsed * 1000
+        stats["last_ms"] = elapsed * 1000
+
+
+def get_stt_stats() -> dict[str, dict[str, float]]:
+    """Latensi & jumlah panggilan/menang per model STT sejak proses berjalan."""
+    with _stt_stats_lock:
+        result = {}
+        for model, stats in _stt_stats.items():
+            item = dict(stats)
+            item["avg_ms"] = round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0.0
+            result[model] = item
+        return result
+
+
+def _available_models() -> list[str]:
+    models = []
+    for model in STT_MODELS:
+        if model.startswith("local:"):
+            if WhisperModel is not None:
+                models.append(model)
+        elif audio_client is not None:
+            models.append(model)
+    return models
+
+
+def _get_local_model(size: str) -> "WhisperModel":
+    with _local_lock:
+        model = _local_models.get(size)
+        if model is None:
+            model = WhisperModel(size, device=_LOCAL_DEVICE, compute_type=_LOCAL_COMPUTE_TYPE)
+            _local_models[size] = model
+        return model
+
+
+def _extract_text(result) -> Optional[str]:
+    if isinstance(result, str):
+        return result
+    text = getattr(result, "text", None)
+    if text is None and isinstance(result, dict):
+        text = result.get("text")
+    return text
+
+
+def _transcribe_with_model(model: str, audio: bytes, filename: str) -> str:
+    """Satu percobaan STT (blocking); audio dikirim dari memori, tanpa membuka file lagi."""
+    started = time.perf_counter()
+    try:
+        if model.startswith("local:"):
+            segments, _info = _get_local_model(model.split(":", 1)[1]).transcribe(
+                io.BytesIO(audio),
+                language=STT_LANGUAGE,
+                beam_size=1,
+            )
+            text = " ".join(segment.text.strip() for segment in segments)
+        else:
+            params = {"model": model, "file": (filename, audio), "response_format": "text"}
+            if STT_LANGUAGE:
+                params["language"] = STT_LANGUAGE
+            text = _extract_text(audio_client.audio.transcriptions.create(**params))
+    except Exception:
+        _record_stt(model, time.perf_counter() - started, ok=False)
+        raise
+    elapsed = time.perf_counter() - started
+    _record_stt(model, elapsed, ok=True)
+    print(f"[{now_str()}] [VOICE] STT {model} selesai dalam {elapsed * 1000:.0f} ms")
+    return text or ""
+
+
+async def prepare_audio(data: bytes) -> tuple[bytes, str]:
+    """
+    Buang hening di awal/akhir, jadikan mono & downsample (Opus kecil) via ffmpeg.
+    Tanpa ffmpeg (atau bila gagal) audio asli dipakai apa adanya.
+    """
+    if not _FFMPEG_BIN or not _PREPROCESS_ENABLED:
+        return data, "voice.ogg"
+    trim = (
+        f"silenceremove=start_periods=1:start_silence=0.2:start_threshold={STT_SILENCE_DB}dB"
+    )
+    command = [
+        _FFMPEG_BIN, "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-af", f"{trim},areverse,{trim},areverse",
+        "-ac", "1", "-ar", str(STT_SAMPLE_RATE),
+        "-c:a", "libopus", "-b:a", "24k",
+        "-f", "ogg", "pipe:1",
+    ]
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout=10)
+    except Exception as exc:
+        print(f"[{now_str()}] [VOICE] Pra-proses audio dilewati: {exc}")
+        return data, "voice.ogg"
+    if process.returncode != 0 or not stdout:
+        print(f"[{now_str()}] [VOICE] ffmpeg gagal: {stderr.decode(errors='ignore')[:200]}")
+        return data, "voice.ogg"
+    return stdout, "voice.ogg"
+
+
+async def transcribe_voice(data: bytes) -> str:
+    """
+    Transkripsi pesan suara dengan hedging antar model STT.
+
+    Model pertama langsung jalan; bila belum selesai dalam STT_HEDGE_SECONDS
+    (atau gagal) model berikutnya ikut dijalankan paralel. Hasil non-kosong
+    pertama dipakai, semua dibatasi STT_BUDGET_SECONDS.
+    """
+    models = _available_models()
+    if not models:
         raise RuntimeError(
             "Speech-to-text belum aktif. Set ASKA_STT_API_KEY atau OPENAI_API_KEY agar STT berjalan."
         )
 
+    audio, filename = await prepare_audio(data)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STT_BUDGET_SECONDS
+    remaining_models = iter(models)
+    pending: dict[asyncio.Task, str] = {}
     last_error: Optional[Exception] = None
-    for model in STT_MODELS:
-        try:
-            with open(path, "rb") as audio_file:
-                result = audio_client.audio.transcriptions.create(
-                    model=model,
-                    file=audio_file,
-                    response_format="text",
-                )
-            if isinstance(result, str):
-                text = result
-            else:
-                text = getattr(result, "text", None)
-                if text is None and isinstance(result, dict):
-                    text = result.get("text")
-            if text:
-                return text
-        except Exception as exc:  # pragma: no cover - network / API errors
-            last_error = exc
-            continue
+
+    def _launch_next() -> None:
+        model = next(remaining_models, None)
+        if model is not None:
+            task = asyncio.create_task(
+                asyncio.to_thread(_transcribe_with_model, model, audio, filename)
+            )
+            pending[task] = model
+
+    _launch_next()
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"STT melebihi batas {STT_BUDGET_SECONDS:.0f} detik")
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=min(STT_HEDGE_SECONDS, remaining),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # Model yang jalan masih lambat: hedge ke model berikutnya
+                _launch_next()
+                continue
+            for task in done:
+                model = pending.pop(task)
+                try:
+                    text = task.result()
+                except Exception as exc:  # pragma: no cover - network / API errors
+                    last_error = exc
+                    _launch_next()
+                    continue
+                if text and text.strip():
+                    _record_stt(model, 0.0, ok=True, won=True)
+                    return text
+                _launch_next()
+    finally:
+        # Thread yang kalah dibiarkan selesai sendiri; hasilnya diabaikan
+        for task in pending:
+            task.cancel()
+
     if last_error:
         raise last_error
     return ""
 
 
+def transcribe_audio(path: str) -> str:
+    """Versi sinkron untuk file di disk (CLI / pengujian offline)."""
+    with open(path, "rb") as audio_file:
+        data = audio_file.read()
+    return asyncio.run(transcribe_voice(data))
+
+
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message = update.message
     if not message:
@@ -79,24 +278,23 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await message.reply_text("Oops, suaranya belum kebaca. Coba kirim ulang ya! ??")
         return
 
-    with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp_file:
-        temp_path = tmp_file.name
-
     try:
+        started = time.perf_counter()
         telegram_file = await context.bot.get_file(voice.file_id)
-        await telegram_file.download_to_drive(custom_path=temp_path)
-        transcription = await asyncio.to_thread(transcribe_audio, temp_path)
+        # Unduh langsung ke memori (voice note kecil), tanpa tulis-baca file sementara
+        buffer = io.BytesIO()
+        await telegram_file.download_to_memory(out=buffer)
+        transcription = await transcribe_voice(buffer.getvalue())
+        print(
+            f"[{now_str()}] [VOICE] {len(buffer.getbuffer())} byte ditranskripsi "
+            f"dalam {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
     except Exception as exc:
         print(f"[{now_str()}] [VOICE ERROR] {exc}")
         await message.reply_text(
             "ASKA belum bisa dengerin pesan suara kamu nih. Boleh dicoba lagi atau ketik aja ya!"
         )
         return
-    finally:
-        try:
-            os.remove(temp_path)
-        except OSError:
-            pass
 
     if not transcription or not transcription.strip():
         await message.reply_text(
@@ -115,3 +313,17 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_target=message,
         target_user=getattr(message, "from_user", None),
     )
+
+
+if __name__ == "__main__":
+    # Uji STT tanpa Telegram, mis. offline: ASKA_STT_MODELS=local:base python voice_handlers.py rekaman.ogg
+    import sys
+
+    if len(sys.argv) < 2:
+        raise SystemExit("Pemakaian: python voice_handlers.py <file-audio> [...]")
+    for audio_path in sys.argv[1:]:
+        t0 = time.perf_counter()
+        result_text = transcribe_audio(audio_path)
+        print(f"{audio_path} ({(time.perf_counter() - t0) * 1000:.0f} ms): {result_text}")
+    for model_name, model_stats in get_stt_stats().items():
+        print(f"  {model_name}: {model_stats}")
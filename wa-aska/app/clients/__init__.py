@@ -6,6 +6,7 @@ from app.clients.whatsapp_client import (
     WhatsAppClient,
     WhatsAppClientError,
     MediaExpiredError,
+    MediaFile,
     whatsapp_client
 )
 from app.clients.gdrive_client import (
@@ -25,6 +26,7 @@ __all__ = [
     "WhatsAppClient",
     "WhatsAppClientError",
     "MediaExpiredError",
+    "MediaFile",
     "whatsapp_client",
     # Google Drive
     "GoogleDriveClient",
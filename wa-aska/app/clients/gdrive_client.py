@@ -3,9 +3,13 @@ ASKA WhatsApp Bot - Google Drive API Client
 Handles authentication and file operations with Google Drive.
 """
 
+import asyncio
 import logging
 import os
-from typing import Optional, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, TypeVar, Union
 from io import BytesIO
 
 from google.oauth2.credentials import Credentials
@@ -17,9 +21,12 @@ from googleapiclient.errors import HttpError
 
 from app.config import settings
 from app.models.schemas import DriveUploadResult
+from app.clients.whatsapp_client import MediaFile
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Required scopes for Google Drive
 SCOPES = [
     'https://www.googleapis.com/auth/drive.file',  # Create/modify files created by app
@@ -36,14 +43,34 @@ class GoogleDriveClient:
     """
     Client for Google Drive API.
     Handles authentication and file upload operations.
+    
+    googleapiclient is blocking, so every call runs on a dedicated bounded
+    thread pool instead of the event loop. Each worker thread gets its own
+    service object because the underlying httplib2 transport is not
+    thread-safe.
     """
     
     def __init__(self):
         self.credentials_path = settings.gdrive_credentials_path
         self.token_path = settings.gdrive_token_path
         self.default_folder_id = settings.gdrive_default_folder_id
-        self._service = None
+        self.upload_chunk_size = max(256 * 1024, settings.gdrive_upload_chunk_mb * 1024 * 1024)
+        self._credentials: Optional[Credentials] = None
+        self._credentials_lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.gdrive_max_workers),
+            thread_name_prefix="gdrive"
+        )
         self._folders_cache = None
+        self._folder_names: Dict[str, str] = {}
+        self._metrics: Dict[str, Any] = {
+            "uploads": 0,
+            "failures": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+            "last_bytes_per_second": 0.0,
+        }
     
     def _get_credentials(self) -> Credentials:
         """
@@ -94,12 +121,29 @@ class GoogleDriveClient:
     @property
     def service(self):
         """
-        Get Drive service, initializing if needed.
+        Get the Drive service for the current thread, initializing if needed.
         """
-        if self._service is None:
-            creds = self._get_credentials()
-            self._service = build('drive', 'v3', credentials=creds)
-        return self._service
+        service = getattr(self._local, "service", None)
+        if service is None:
+            with self._credentials_lock:
+                if self._credentials is None or not self._credentials.valid:
+                    self._credentials = self._get_credentials()
+                creds = self._credentials
+            service = build('drive', 'v3', credentials=creds, cache_discovery=False)
+            self._local.service = service
+        return service
+    
+    async def _run(self, func: Callable[[], T]) -> T:
+        """Run a blocking Drive call on the Drive thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Upload counters and throughput for the health endpoint."""
+        metrics = dict(self._metrics)
+        seconds = metrics["seconds"]
+        metrics["avg_bytes_per_second"] = (metrics["bytes"] / seconds) if seconds else 0.0
+        return metrics
     
     async def list_folders(self, parent_id: Optional[str] = None) -> List[dict]:
         """
@@ -119,17 +163,21 @@ class GoogleDriveClient:
             if parent_id:
                 query += f" and '{parent_id}' in parents"
             
-            results = self.service.files().list(
-                q=query,
-                spaces='drive',
-                fields='files(id, name, parents)',
-                pageSize=100
-            ).execute()
+            results = await self._run(
+                lambda: self.service.files().list(
+                    q=query,
+                    spaces='drive',
+                    fields='files(id, name, parents)',
+                    pageSize=100
+                ).execute()
+            )
             
             folders = results.get('files', [])
             
             # Cache the results
             self._folders_cache = folders
+            for folder in folders:
+                self._folder_names[folder['id']] = folder['name']
             
             logger.info(f"Found {len(folders)} folders")
             return folders
@@ -140,10 +188,77 @@ class GoogleDriveClient:
     def invalidate_folder_cache(self):
         """Invalidate the folder cache."""
         self._folders_cache = None
+        self._folder_names.clear()
+    
+    async def get_folder_name(self, folder_id: str) -> str:
+        """
+        Resolve a folder name, using the id→name map filled by list_folders.
+        """
+        cached = self._folder_names.get(folder_id)
+        if cached:
+            return cached
+        try:
+            folder_meta = await self._run(
+                lambda: self.service.files().get(
+                    fileId=folder_id,
+                    fields='name'
+                ).execute()
+            )
+        except Exception:
+            return "Unknown"
+        name = folder_meta.get('name', 'Unknown')
+        self._folder_names[folder_id] = name
+        return name
+    
+    def _upload_blocking(
+        self,
+        file_content: Union[bytes, MediaFile],
+        filename: str,
+        folder_id: str,
+        mime_type: str
+    ) -> dict:
+        """Chunked resumable upload plus link permission (runs on the pool)."""
+        file_metadata = {
+            'name': filename,
+            'parents': [folder_id]
+        }
+        if isinstance(file_content, MediaFile):
+            stream = file_content.stream()
+        else:
+            stream = BytesIO(file_content)
+        media = MediaIoBaseUpload(
+            stream,
+            mimetype=mime_type,
+            chunksize=self.upload_chunk_size,
+            resumable=True
+        )
+        request = self.service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, name, webViewLink, webContentLink'
+        )
+        file = None
+        while file is None:
+            status, file = request.next_chunk(num_retries=3)
+            if status is not None:
+                logger.debug(f"Uploading {filename}: {int(status.progress() * 100)}%")
+        
+        # Make file accessible via link
+        try:
+            self.service.permissions().create(
+                fileId=file.get('id'),
+                body={
+                    'type': 'anyone',
+                    'role': 'reader'
+                }
+            ).execute()
+        except Exception as e:
+            logger.warning(f"Failed to set permissions: {e}")
+        return file
     
     async def upload_file(
         self,
-        file_content: bytes,
+        file_content: Union[bytes, MediaFile],
         filename: str,
         folder_id: Optional[str] = None,
         mime_type: str = 'application/pdf'
@@ -152,7 +267,8 @@ class GoogleDriveClient:
         Upload a file to Google Drive.
         
         Args:
-            file_content: Binary content of the file
+            file_content: File content, as bytes or a downloaded MediaFile
+                (read chunk by chunk from its spooled file)
             filename: Name for the uploaded file
             folder_id: Folder ID to upload to (uses default if None)
             mime_type: MIME type of the file
@@ -164,66 +280,39 @@ class GoogleDriveClient:
             GoogleDriveError: If upload fails
         """
         target_folder_id = folder_id or self.default_folder_id
+        folder_name = await self.get_folder_name(target_folder_id)
         
+        started = time.perf_counter()
         try:
-            # Get folder name for result
-            folder_name = "Unknown"
-            try:
-                folder_meta = self.service.files().get(
-                    fileId=target_folder_id,
-                    fields='name'
-                ).execute()
-                folder_name = folder_meta.get('name', 'Unknown')
-            except Exception:
-                pass
-            
-            # Prepare file metadata
-            file_metadata = {
-                'name': filename,
-                'parents': [target_folder_id]
-            }
-            
-            # Create media upload
-            media = MediaIoBaseUpload(
-                BytesIO(file_content),
-                mimetype=mime_type,
-                resumable=True
-            )
-            
-            # Upload file
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, webViewLink, webContentLink'
-            ).execute()
-            
-            file_id = file.get('id')
-            
-            # Make file accessible via link
-            try:
-                self.service.permissions().create(
-                    fileId=file_id,
-                    body={
-                        'type': 'anyone',
-                        'role': 'reader'
-                    }
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Failed to set permissions: {e}")
-            
-            logger.info(f"Uploaded {filename} to folder {folder_name}")
-            
-            return DriveUploadResult(
-                file_id=file_id,
-                filename=filename,
-                folder_id=target_folder_id,
-                folder_name=folder_name,
-                shareable_link=file.get('webViewLink', ''),
-                web_view_link=file.get('webViewLink')
+            file = await self._run(
+                lambda: self._upload_blocking(
+                    file_content, filename, target_folder_id, mime_type
+                )
             )
-            
         except HttpError as e:
+            self._metrics["failures"] += 1
             raise GoogleDriveError(f"Failed to upload file: {e}")
+        
+        elapsed = time.perf_counter() - started
+        size = len(file_content)
+        self._metrics["uploads"] += 1
+        self._metrics["bytes"] += size
+        self._metrics["seconds"] += elapsed
+        self._metrics["last_bytes_per_second"] = (size / elapsed) if elapsed else 0.0
+        
+        logger.info(
+            f"Uploaded {filename} to folder {folder_name} "
+            f"({size} bytes in {elapsed:.2f}s)"
+        )
+        
+        return DriveUploadResult(
+            file_id=file.get('id'),
+            filename=filename,
+            folder_id=target_folder_id,
+            folder_name=folder_name,
+            shareable_link=file.get('webViewLink', ''),
+            web_view_link=file.get('webViewLink')
+        )
     
     async def get_folder_by_name(self, name: str) -> Optional[dict]:
         """
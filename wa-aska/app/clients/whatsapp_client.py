@@ -4,9 +4,13 @@ Handles all interactions with WhatsApp Cloud API including
 sending messages and downloading media.
 """
 
+import hashlib
 import logging
+import os
+import tempfile
 import httpx
-from typing import Optional
+from io import BytesIO
+from typing import Optional, Union, BinaryIO
 
 from app.config import settings
 
@@ -23,10 +27,88 @@ class MediaExpiredError(WhatsAppClientError):
     pass
 
 
+class MediaFile:
+    """
+    Downloaded media, spooled to a temp file.
+    
+    Bytes stay in memory until WA_ASKA_MEDIA_SPOOL_MB, then roll over to
+    a named temp file, so a large document never sits in RAM. The SHA-256
+    and size are computed while streaming. The same handle feeds the PDF
+    extractor (by path when on disk) and the Drive upload.
+    """
+    
+    def __init__(self, max_memory_bytes: int = None, tmp_dir: str = None):
+        self._max_memory = max_memory_bytes or settings.media_spool_mb * 1024 * 1024
+        self._tmp_dir = tmp_dir or settings.media_tmp_dir or None
+        self._file: BinaryIO = BytesIO()
+        self._path: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, rolling over to disk past the memory limit."""
+        if self._path is None and self.size + len(chunk) > self._max_memory:
+            self._rollover()
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+    
+    def _rollover(self) -> None:
+        handle = tempfile.NamedTemporaryFile(
+            prefix="wa-aska-", suffix=".media", dir=self._tmp_dir, delete=False
+        )
+        handle.write(self._file.getbuffer())
+        self._file = handle
+        self._path = handle.name
+    
+    @property
+    def path(self) -> Optional[str]:
+        """Temp file path, or None while the media is still in memory."""
+        if self._path is not None:
+            self._file.flush()
+        return self._path
+    
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+    
+    def stream(self) -> BinaryIO:
+        """The underlying file object, rewound to the start."""
+        self._file.flush()
+        self._file.seek(0)
+        return self._file
+    
+    def extraction_source(self) -> Union[str, bytes]:
+        """What to hand to a worker process: a path on disk, else the bytes."""
+        return self.path or self._file.getvalue()
+    
+    def close(self) -> None:
+        """Release the buffer and delete the temp file."""
+        self._file.close()
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __enter__(self) -> "MediaFile":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
 class WhatsAppClient:
     """
     Client for WhatsApp Cloud API.
     Handles message sending and media downloading.
+    
+    One pooled httpx.AsyncClient is shared by all calls (keep-alive to
+    graph.facebook.com) and closed on application shutdown.
     """
     
     def __init__(self):
@@ -40,6 +122,26 @@ class WhatsAppClient:
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.whatsapp_max_connections,
+                    max_keepalive_connections=settings.whatsapp_max_connections
+                ),
+                timeout=30.0
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client (application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def get_media_url(self, media_id: str) -> str:
         """
@@ -57,36 +159,39 @@ class WhatsAppClient:
         """
         url = f"{self.base_url}/{media_id}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                media_url = data.get("url")
-                
-                if not media_url:
-                    raise WhatsAppClientError("No URL in media response")
-                
-                logger.info(f"Got media URL for {media_id}")
-                return media_url
-                
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    raise MediaExpiredError(f"Media {media_id} not found or expired")
-                raise WhatsAppClientError(f"Failed to get media URL: {e}")
-            except Exception as e:
-                raise WhatsAppClientError(f"Failed to get media URL: {e}")
-    
-    async def download_media(self, media_id: str) -> bytes:
+        try:
+            response = await self.client.get(url, headers=self.headers, timeout=30.0)
+            response.raise_for_status()
+            
+            data = response.json()
+            media_url = data.get("url")
+            
+            if not media_url:
+                raise WhatsAppClientError("No URL in media response")
+            
+            logger.info(f"Got media URL for {media_id}")
+            return media_url
+            
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise MediaExpiredError(f"Media {media_id} not found or expired")
+            raise WhatsAppClientError(f"Failed to get media URL: {e}")
+        except WhatsAppClientError:
+            raise
+        except Exception as e:
+            raise WhatsAppClientError(f"Failed to get media URL: {e}")
+    
+    async def download_media(self, media_id: str) -> MediaFile:
         """
-        Download media file from WhatsApp.
+        Stream a media file from WhatsApp into a MediaFile.
+        
+        The caller owns the result and must close() it.
         
         Args:
             media_id: The media ID from the message
             
         Returns:
-            The binary content of the media file
+            MediaFile holding the downloaded content
             
         Raises:
             WhatsAppClientError: If download fails
@@ -95,27 +200,34 @@ class WhatsAppClient:
         # First, get the media URL
         media_url = await self.get_media_url(media_id)
         
-        # Then download the actual file
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    media_url,
-                    headers={"Authorization": f"Bearer {self.access_token}"},
-                    timeout=60.0,
-                    follow_redirects=True
-                )
+        # Then stream the actual file
+        media = MediaFile()
+        try:
+            async with self.client.stream(
+                "GET",
+                media_url,
+                headers={"Authorization": f"Bearer {self.access_token}"},
+                timeout=60.0,
+                follow_redirects=True
+            ) as response:
                 response.raise_for_status()
-                
-                content = response.content
-                logger.info(f"Downloaded media {media_id}: {len(content)} bytes")
-                return content
-                
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code in (404, 410):
-                    raise MediaExpiredError(f"Media URL expired for {media_id}")
-                raise WhatsAppClientError(f"Failed to download media: {e}")
-            except Exception as e:
-                raise WhatsAppClientError(f"Failed to download media: {e}")
+                async for chunk in response.aiter_bytes(64 * 1024):
+                    media.write(chunk)
+            
+            logger.info(
+                f"Downloaded media {media_id}: {media.size} bytes"
+                f"{' (spooled to disk)' if media.path else ''}"
+            )
+            return media
+            
+        except httpx.HTTPStatusError as e:
+            media.close()
+            if e.response.status_code in (404, 410):
+                raise MediaExpiredError(f"Media URL expired for {media_id}")
+            raise WhatsAppClientError(f"Failed to download media: {e}")
+        except Exception as e:
+            media.close()
+            raise WhatsAppClientError(f"Failed to download media: {e}")
     
     async def send_text_message(
         self,
@@ -151,23 +263,22 @@ class WhatsAppClient:
                 "message_id": reply_to_message_id
             }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.messages_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"Sent message to {to}")
-                return result
-                
-            except Exception as e:
-                logger.error(f"Failed to send message: {e}")
-                raise WhatsAppClientError(f"Failed to send message: {e}")
+        try:
+            response = await self.client.post(
+                self.messages_url,
+                headers=self.headers,
+                json=payload,
+                timeout=30.0
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            logger.info(f"Sent message to {to}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to send message: {e}")
+            raise WhatsAppClientError(f"Failed to send message: {e}")
     
     async def send_reply(
         self,
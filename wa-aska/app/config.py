@@ -19,6 +19,9 @@ class Settings(BaseSettings):
     whatsapp_phone_number_id: str = Field(..., alias="WA_ASKA_PHONE_NUMBER_ID", description="WhatsApp phone number ID")
     whatsapp_verify_token: str = Field(..., alias="WA_ASKA_VERIFY_TOKEN", description="Webhook verification token")
     whatsapp_api_version: str = Field(default="v17.0", alias="WA_ASKA_API_VERSION", description="WhatsApp API version")
+    whatsapp_max_connections: int = Field(default=20, alias="WA_ASKA_HTTP_MAX_CONNECTIONS", description="Pooled connections to the WhatsApp API")
+    media_spool_mb: int = Field(default=2, alias="WA_ASKA_MEDIA_SPOOL_MB", description="Downloaded media kept in memory up to this size, then spooled to disk")
+    media_tmp_dir: str = Field(default="", alias="WA_ASKA_MEDIA_TMP_DIR", description="Directory for spooled media (empty = system temp)")
     
     # Google Drive
     gdrive_credentials_path: str = Field(
@@ -32,6 +35,8 @@ class Settings(BaseSettings):
         description="Path to Google OAuth token file"
     )
     gdrive_default_folder_id: str = Field(..., alias="WA_ASKA_GDRIVE_FOLDER_ID", description="Default Google Drive folder ID")
+    gdrive_max_workers: int = Field(default=4, alias="WA_ASKA_GDRIVE_WORKERS", description="Thread pool size for blocking Drive API calls")
+    gdrive_upload_chunk_mb: int = Field(default=5, alias="WA_ASKA_GDRIVE_CHUNK_MB", description="Resumable upload chunk size in MB")
     
     # Gemini AI
     gemini_api_key: str = Field(..., alias="WA_ASKA_GEMINI_API_KEY", description="Google Gemini API key")
@@ -39,6 +44,10 @@ class Settings(BaseSettings):
     # PDF Processing
     pdf_max_text_chars: int = Field(default=2000, alias="WA_ASKA_PDF_MAX_TEXT", description="Max characters to extract from PDF")
     pdf_render_dpi: int = Field(default=150, alias="WA_ASKA_PDF_DPI", description="DPI for PDF to image rendering")
+    pdf_max_render_pixels: int = Field(default=2_000_000, alias="WA_ASKA_PDF_MAX_PIXELS", description="Upper bound on rendered first-page pixels (lowers DPI for large pages)")
+    pdf_max_mb: int = Field(default=40, alias="WA_ASKA_PDF_MAX_MB", description="Skip content extraction for PDFs larger than this")
+    pdf_extract_timeout: float = Field(default=20.0, alias="WA_ASKA_PDF_TIMEOUT", description="Seconds before PDF extraction is abandoned")
+    pdf_workers: int = Field(default=2, alias="WA_ASKA_PDF_WORKERS", description="Worker processes for PDF extraction")
     
     # Server
     host: str = Field(default="0.0.0.0", alias="WA_ASKA_HOST", description="Server host")
@@ -47,6 +56,21 @@ class Settings(BaseSettings):
     
     # Message Cache
     cache_ttl_hours: int = Field(default=24, alias="WA_ASKA_CACHE_TTL", description="Message cache TTL in hours")
+    cache_max_entries: int = Field(default=5000, alias="WA_ASKA_CACHE_MAX_ENTRIES", description="Messages kept in memory; older ones spill to disk")
+    cache_db_path: str = Field(default="data/message_cache.sqlite3", alias="WA_ASKA_CACHE_DB", description="SQLite file persisting cached messages (empty = memory only)")
+    
+    # Save Job Queue
+    queue_db_path: str = Field(default="data/save_jobs.sqlite3", alias="WA_ASKA_QUEUE_DB", description="SQLite file for the persistent save job queue")
+    queue_workers: int = Field(default=4, alias="WA_ASKA_QUEUE_WORKERS", description="Save commands processed concurrently")
+    queue_max_attempts: int = Field(default=3, alias="WA_ASKA_QUEUE_MAX_ATTEMPTS", description="Attempts before a job interrupted by restarts is marked failed")
+    stage_download_concurrency: int = Field(default=3, alias="WA_ASKA_STAGE_DOWNLOAD", description="Concurrent WhatsApp media downloads")
+    stage_extract_concurrency: int = Field(default=2, alias="WA_ASKA_STAGE_EXTRACT", description="Concurrent PDF extractions")
+    stage_predict_concurrency: int = Field(default=2, alias="WA_ASKA_STAGE_PREDICT", description="Concurrent folder predictions")
+    stage_upload_concurrency: int = Field(default=2, alias="WA_ASKA_STAGE_UPLOAD", description="Concurrent Drive uploads")
+    
+    # Prediction Cache
+    prediction_cache_path: str = Field(default="data/prediction_cache.sqlite3", alias="WA_ASKA_PREDICTION_CACHE_PATH", description="SQLite file remembering confirmed folders")
+    prediction_pattern_min_confirmations: int = Field(default=2, alias="WA_ASKA_PREDICTION_MIN_CONFIRMATIONS", description="Uploads of a filename pattern to one folder before it skips Gemini")
     
     @property
     def whatsapp_api_base_url(self) -> str:
@@ -11,6 +11,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.webhook import router as webhook_router
 from app.services.message_cache import message_cache
+from app.clients.gdrive_client import gdrive_client
+from app.clients.whatsapp_client import whatsapp_client
+from app.services.pdf_extractor import pdf_extractor
+from app.services.prediction_cache import prediction_cache
+from app.services.job_queue import job_queue
 
 # Configure logging
 logging.basicConfig(
@@ -31,19 +36,24 @@ async def lifespan(app: FastAPI):
     logger.info(f"📱 WhatsApp Phone Number ID: {settings.whatsapp_phone_number_id}")
     logger.info(f"📁 Default Drive Folder: {settings.gdrive_default_folder_id}")
     
-    # Start background cache cleanup task
+    # Restore cached messages from the previous run, then start cleanup
     import asyncio
+    await asyncio.to_thread(message_cache.warm_start)
     cleanup_task = asyncio.create_task(message_cache.cleanup_expired())
+    await job_queue.start()
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down ASKA WhatsApp Bot...")
+    await job_queue.stop()
     cleanup_task.cancel()
     try:
         await cleanup_task
     except asyncio.CancelledError:
         pass
+    pdf_extractor.shutdown()
+    await whatsapp_client.aclose()
 
 
 # Create FastAPI application
@@ -82,11 +92,21 @@ async def health_check():
     """Detailed health check endpoint."""
     return {
         "status": "healthy",
-        "cache_size": len(message_cache._cache),
+        "cache_size": message_cache.size,
+        "message_cache": message_cache.stats(),
+        "drive_uploads": gdrive_client.get_metrics(),
+        "prediction_cache": prediction_cache.stats(),
         "debug_mode": settings.debug
     }
 
 
+@app.get("/status", tags=["health"])
+async def queue_status():
+    """Save job queue depth and per-stage concurrency/latency."""
+    import asyncio
+    return await asyncio.to_thread(job_queue.status)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
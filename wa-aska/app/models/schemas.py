@@ -146,7 +146,7 @@ class FolderPrediction(BaseModel):
     reasoning: str
     analysis_level: str = Field(
         default="filename_only",
-        description="'filename_only' or 'content_analyzed'"
+        description="'filename_only', 'content_analyzed', 'cached' or 'fallback'"
     )
 
 
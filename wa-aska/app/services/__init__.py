@@ -13,8 +13,10 @@ from app.services.message_parser import (
     VALID_COMMANDS
 )
 from app.services.pdf_extractor import pdf_extractor, PDFExtractor
+from app.services.prediction_cache import prediction_cache, PredictionCache
 from app.services.ai_folder_predictor import ai_predictor, AIFolderPredictor
 from app.services.file_handler import file_handler, FileHandler
+from app.services.job_queue import job_queue, SaveJobQueue, stage_limiter, StageLimiter
 
 __all__ = [
     # Message Cache
@@ -31,10 +33,18 @@ __all__ = [
     # PDF Extractor
     "pdf_extractor",
     "PDFExtractor",
+    # Prediction Cache
+    "prediction_cache",
+    "PredictionCache",
     # AI Predictor
     "ai_predictor",
     "AIFolderPredictor",
     # File Handler
     "file_handler",
     "FileHandler",
+    # Save Job Queue
+    "job_queue",
+    "SaveJobQueue",
+    "stage_limiter",
+    "StageLimiter",
 ]
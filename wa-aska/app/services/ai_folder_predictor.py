@@ -7,16 +7,22 @@ Implements 2-level analysis: filename first, then content if needed.
 import logging
 import asyncio
 import re
-from typing import Optional, List
+from typing import Optional, List, Union
 
 from app.config import settings
 from app.models.schemas import FolderPrediction, PDFContent
 from app.clients.gemini_client import gemini_client, RateLimitError
 from app.clients.gdrive_client import gdrive_client
+from app.clients.whatsapp_client import MediaFile
 from app.services.pdf_extractor import pdf_extractor
+from app.services.prediction_cache import prediction_cache
+from app.services.job_queue import stage_limiter
 
 logger = logging.getLogger(__name__)
 
+# Minimum confidence to accept a filename-only prediction and to learn from an upload
+CONFIDENCE_THRESHOLD = 0.6
+
 # Patterns that indicate generic/non-informative filenames
 GENERIC_PATTERNS = [
     r"^document",
@@ -39,6 +45,7 @@ class AIFolderPredictor:
     """
     Predicts target folder using AI analysis.
     
+    Level 0: Folder learned from earlier uploads (no AI call)
     Level 1: Analyze filename only (fast)
     Level 2: Analyze PDF content (when filename is generic)
     """
@@ -108,6 +115,47 @@ class AIFolderPredictor:
             analysis_level="fallback"
         )
     
+    async def _cached_prediction(
+        self,
+        filename: str,
+        pdf_bytes: Optional[Union[bytes, MediaFile]]
+    ) -> Optional[FolderPrediction]:
+        """
+        Look up a folder learned from earlier confirmed uploads.
+        
+        Content hashes always apply; filename patterns only for
+        informative filenames. Hits pointing at folders that no longer
+        exist are dropped. SQLite and hashing run off the event loop.
+        """
+        cached = await asyncio.to_thread(
+            prediction_cache.lookup,
+            filename,
+            pdf_bytes,
+            use_pattern=not self.is_filename_generic(filename)
+        )
+        if not cached:
+            return None
+        
+        if self._folders_list:
+            valid_ids = {f['id'] for f in self._folders_list}
+            valid_ids.add(settings.gdrive_default_folder_id)
+            if cached['folder_id'] not in valid_ids:
+                await asyncio.to_thread(prediction_cache.forget_folder, cached['folder_id'])
+                return None
+        
+        if cached['source'] == "content":
+            reasoning = "Dokumen yang sama pernah disimpan ke folder ini"
+        else:
+            reasoning = "Dokumen sejenis selalu disimpan ke folder ini"
+        
+        return FolderPrediction(
+            folder_id=cached['folder_id'],
+            folder_name=cached['folder_name'],
+            confidence=cached['confidence'],
+            reasoning=reasoning,
+            analysis_level="cached"
+        )
+    
     def _parse_prediction(self, result: dict, analysis_level: str) -> FolderPrediction:
         """Parse AI result into FolderPrediction."""
         if not result:
@@ -142,17 +190,18 @@ class AIFolderPredictor:
     async def predict_folder(
         self,
         filename: str,
-        pdf_bytes: Optional[bytes] = None
+        pdf_bytes: Optional[Union[bytes, MediaFile]] = None
     ) -> FolderPrediction:
         """
         Predict the best folder for a file using 2-level analysis.
         
-        Level 1: Analyze filename (always runs first)
+        Level 0: Reuse a folder learned from earlier uploads (no Gemini call)
+        Level 1: Analyze filename
         Level 2: Analyze PDF content (if filename is generic and content available)
         
         Args:
             filename: Name of the file
-            pdf_bytes: Optional PDF content for deeper analysis
+            pdf_bytes: Optional PDF content (bytes or MediaFile) for deeper analysis
             
         Returns:
             FolderPrediction with folder details and confidence
@@ -160,6 +209,12 @@ class AIFolderPredictor:
         try:
             folder_list = await self._get_folder_list_formatted()
             
+            # ==================== LEVEL 0: Learned Folders ====================
+            cached = await self._cached_prediction(filename, pdf_bytes)
+            if cached:
+                logger.info(f"Cached prediction for '{filename}': {cached.folder_name}")
+                return cached
+            
             # ==================== LEVEL 1: Filename Analysis ====================
             is_generic = self.is_filename_generic(filename)
             
@@ -172,7 +227,7 @@ class AIFolderPredictor:
                 prediction = self._parse_prediction(result, "filename_only")
                 
                 # If confidence is high enough, use this prediction
-                if prediction.confidence >= 0.6:
+                if prediction.confidence >= CONFIDENCE_THRESHOLD:
                     logger.info(
                         f"Level 1 prediction: {prediction.folder_name} "
                         f"(confidence: {prediction.confidence})"
@@ -184,7 +239,8 @@ class AIFolderPredictor:
                 logger.info(f"Using Level 2 analysis for '{filename}'")
                 
                 # Extract PDF content
-                pdf_content = pdf_extractor.extract_content(pdf_bytes)
+                async with stage_limiter.stage("extract"):
+                    pdf_content = await pdf_extractor.extract_content_async(pdf_bytes)
                 
                 if pdf_content.has_text and len(pdf_content.text.strip()) >= 100:
                     # Use text analysis
@@ -233,7 +289,7 @@ class AIFolderPredictor:
     async def predict_with_retry(
         self,
         filename: str,
-        pdf_bytes: Optional[bytes] = None,
+        pdf_bytes: Optional[Union[bytes, MediaFile]] = None,
         max_retries: int = 3
     ) -> FolderPrediction:
         """
@@ -262,6 +318,39 @@ class AIFolderPredictor:
         
         return self._get_default_prediction("Unexpected error")
     
+    async def remember_upload(
+        self,
+        filename: str,
+        pdf_bytes: Optional[Union[bytes, MediaFile]],
+        prediction: FolderPrediction
+    ) -> None:
+        """
+        Learn the folder a file was confirmed uploaded to.
+        
+        Only fresh Gemini predictions at or above CONFIDENCE_THRESHOLD are
+        learned: fallbacks only mean Gemini was unavailable, low-confidence
+        guesses would be replayed as if certain, and cached hits would just
+        reinforce themselves.
+        
+        Args:
+            filename: Name of the file
+            pdf_bytes: File content (for the content hash)
+            prediction: Prediction used for the upload
+        """
+        if prediction.analysis_level in ("fallback", "cached"):
+            return
+        if prediction.confidence < CONFIDENCE_THRESHOLD:
+            return
+        await asyncio.to_thread(
+            prediction_cache.remember,
+            filename,
+            pdf_bytes,
+            prediction.folder_id,
+            prediction.folder_name,
+            prediction.confidence,
+            use_pattern=not self.is_filename_generic(filename)
+        )
+    
     def invalidate_cache(self):
         """Invalidate folder cache."""
         self._folders_formatted = None
@@ -16,11 +16,13 @@ from app.models.schemas import (
 from app.clients.whatsapp_client import (
     whatsapp_client,
     MediaExpiredError,
+    MediaFile,
     WhatsAppClientError
 )
 from app.clients.gdrive_client import gdrive_client, GoogleDriveError
 from app.services.message_cache import message_cache
 from app.services.ai_folder_predictor import ai_predictor
+from app.services.job_queue import stage_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -95,8 +97,9 @@ class FileHandler:
         
         try:
             logger.info(f"Downloading media {media_id}")
-            file_content = await whatsapp_client.download_media(media_id)
-            logger.info(f"Downloaded {len(file_content)} bytes")
+            async with stage_limiter.stage("download"):
+                file_content = await whatsapp_client.download_media(media_id)
+            logger.info(f"Downloaded {file_content.size} bytes")
             
         except MediaExpiredError:
             error_msg = "❌ Media sudah expired. Silakan kirim ulang file-nya dan coba lagi."
@@ -113,13 +116,27 @@ class FileHandler:
                 error_message=f"Download failed: {e}"
             )
         
+        # The spooled download feeds both prediction and upload, then is deleted
+        try:
+            return await self._predict_and_upload(command, filename, file_content)
+        finally:
+            file_content.close()
+    
+    async def _predict_and_upload(
+        self,
+        command: CommandContext,
+        filename: str,
+        file_content: MediaFile
+    ) -> ProcessingResult:
+        """Predict the folder, upload and confirm (steps 4-6)."""
         # 4. Use AI to predict target folder
         try:
             logger.info(f"Predicting folder for '{filename}'")
-            prediction = await ai_predictor.predict_with_retry(
-                filename=filename,
-                pdf_bytes=file_content
-            )
+            async with stage_limiter.stage("predict"):
+                prediction = await ai_predictor.predict_with_retry(
+                    filename=filename,
+                    pdf_bytes=file_content
+                )
             logger.info(
                 f"Predicted folder: {prediction.folder_name} "
                 f"(confidence: {prediction.confidence})"
@@ -140,12 +157,14 @@ class FileHandler:
         # 5. Upload to Google Drive
         try:
             logger.info(f"Uploading to folder {prediction.folder_id}")
-            upload_result = await gdrive_client.upload_file(
-                file_content=file_content,
-                filename=filename,
-                folder_id=prediction.folder_id
-            )
+            async with stage_limiter.stage("upload"):
+                upload_result = await gdrive_client.upload_file(
+                    file_content=file_content,
+                    filename=filename,
+                    folder_id=prediction.folder_id
+                )
             logger.info(f"Uploaded successfully: {upload_result.file_id}")
+            await ai_predictor.remember_upload(filename, file_content, prediction)
             
         except GoogleDriveError as e:
             error_msg = "❌ Gagal mengupload ke Google Drive. Silakan coba lagi."
@@ -206,6 +225,8 @@ class FileHandler:
                 analysis_note = "📖 Dianalisis dari isi dokumen"
             elif prediction.analysis_level == "filename_only":
                 analysis_note = "📝 Dianalisis dari nama file"
+            elif prediction.analysis_level == "cached":
+                analysis_note = "🧠 Dari riwayat penyimpanan sebelumnya"
             else:
                 analysis_note = "⚙️ Folder default"
             
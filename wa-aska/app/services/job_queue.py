@@ -0,0 +1,296 @@
+"""
+ASKA WhatsApp Bot - Save Job Queue
+Persistent, de-duplicated queue for save commands with per-stage concurrency caps.
+"""
+
+import logging
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List
+
+from app.config import settings
+from app.models.schemas import CommandContext
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("download", "extract", "predict", "upload")
+
+# Finished jobs are kept this long so WhatsApp redeliveries stay de-duplicated
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+class StageLimiter:
+    """
+    Concurrency caps and latency tracking for the save pipeline stages.
+    
+    Each stage (download, extract, predict, upload) gets its own
+    semaphore, so a burst of saves cannot open unbounded downloads or
+    Gemini calls at once.
+    """
+    
+    def __init__(self, limits: Dict[str, int] = None):
+        self._limits = limits or {
+            "download": settings.stage_download_concurrency,
+            "extract": settings.stage_extract_concurrency,
+            "predict": settings.stage_predict_concurrency,
+            "upload": settings.stage_upload_concurrency,
+        }
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {name: 0 for name in self._limits}
+        self._latencies: Dict[str, deque] = {name: deque(maxlen=200) for name in self._limits}
+    
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """
+        Run a block inside a stage's concurrency cap and record its latency.
+        
+        Args:
+            name: One of STAGES
+        """
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self._limits.get(name, 1)))
+            self._semaphores[name] = semaphore
+        
+        async with semaphore:
+            self._in_flight[name] = self._in_flight.get(name, 0) + 1
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._in_flight[name] -= 1
+                self._latencies.setdefault(name, deque(maxlen=200)).append(
+                    time.perf_counter() - started
+                )
+    
+    def stats(self) -> Dict[str, Any]:
+        """In-flight count, cap and recent latency per stage."""
+        result = {}
+        for name, limit in self._limits.items():
+            samples = sorted(self._latencies.get(name, ()))
+            result[name] = {
+                "limit": limit,
+                "in_flight": self._in_flight.get(name, 0),
+                "samples": len(samples),
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 1) if samples else None,
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1) if samples else None,
+            }
+        return result
+
+
+class SaveJobQueue:
+    """
+    SQLite-backed job queue for save commands.
+    
+    Jobs are keyed by the WhatsApp message id of the command, so a
+    webhook redelivered by Meta is recognised and dropped. Jobs that
+    were running when the process died are picked up again on start.
+    """
+    
+    def __init__(self, db_path: str = None, workers: int = None, max_attempts: int = None):
+        self._db_path = db_path or settings.queue_db_path
+        self._workers = max(1, workers or settings.queue_workers)
+        self._max_attempts = max(1, max_attempts or settings.queue_max_attempts)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._pending: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stats: Dict[str, int] = {"enqueued": 0, "duplicates": 0, "succeeded": 0, "failed": 0}
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self._db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self._db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS save_jobs (
+                    message_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_save_jobs_status ON save_jobs (status, created_at)")
+            db.commit()
+            self._db = db
+        return self._db
+    
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._db_lock:
+            db = self._connect()
+            cursor = db.execute(sql, params)
+            db.commit()
+            return cursor
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._db_lock:
+            return self._connect().execute(sql, params).fetchall()
+    
+    def _set_status(self, message_id: str, status: str, error: str = None) -> None:
+        self._execute(
+            "UPDATE save_jobs SET status = ?, error = ?, updated_at = ? WHERE message_id = ?",
+            (status, error, time.time(), message_id)
+        )
+    
+    async def enqueue(self, command: CommandContext) -> bool:
+        """
+        Persist a save command and schedule it.
+        
+        Args:
+            command: Parsed command context
+        
+        Returns:
+            False if this message id was already queued or processed
+        """
+        now = time.time()
+        cursor = await asyncio.to_thread(
+            self._execute,
+            """
+            INSERT OR IGNORE INTO save_jobs (message_id, payload, created_at, updated_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (command.message_id, command.model_dump_json(), now, now)
+        )
+        if cursor.rowcount == 0:
+            self._stats["duplicates"] += 1
+            logger.info(f"Duplicate webhook for {command.message_id}, ignoring")
+            return False
+        
+        self._stats["enqueued"] += 1
+        if self._pending is not None:
+            await self._pending.put(command.message_id)
+        return True
+    
+    async def start(self) -> None:
+        """
+        Recover unfinished jobs and start the worker pool.
+        Call once on startup.
+        """
+        self._pending = asyncio.Queue()
+        
+        def _recover() -> List[str]:
+            cutoff = time.time() - JOB_RETENTION_SECONDS
+            self._execute("DELETE FROM save_jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (cutoff,))
+            self._execute(
+                "UPDATE save_jobs SET status = 'failed', error = 'Too many attempts' "
+                "WHERE status = 'running' AND attempts >= ?",
+                (self._max_attempts,)
+            )
+            self._execute("UPDATE save_jobs SET status = 'queued' WHERE status = 'running'")
+            rows = self._query(
+                "SELECT message_id FROM save_jobs WHERE status = 'queued' ORDER BY created_at"
+            )
+            return [row[0] for row in rows]
+        
+        recovered = await asyncio.to_thread(_recover)
+        for message_id in recovered:
+            self._pending.put_nowait(message_id)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unfinished save jobs")
+        
+        self._tasks = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self._workers)
+        ]
+    
+    async def stop(self) -> None:
+        """Cancel workers; running jobs are retried on next start."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+    
+    async def _worker(self, index: int) -> None:
+        while True:
+            message_id = await self._pending.get()
+            try:
+                await self._process(message_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Save worker {index} failed on {message_id}: {e}")
+            finally:
+                self._pending.task_done()
+    
+    async def _process(self, message_id: str) -> None:
+        """Claim one queued job and run it through the file handler."""
+        from app.services.file_handler import file_handler
+        
+        def _claim() -> Optional[str]:
+            cursor = self._execute(
+                """
+                UPDATE save_jobs SET status = 'running', attempts = attempts + 1, updated_at = ?
+                WHERE message_id = ? AND status = 'queued'
+                """,
+                (time.time(), message_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            rows = self._query("SELECT payload FROM save_jobs WHERE message_id = ?", (message_id,))
+            return rows[0][0] if rows else None
+        
+        payload = await asyncio.to_thread(_claim)
+        if payload is None:
+            return
+        
+        command = CommandContext.model_validate_json(payload)
+        logger.info(f"Processing save command: {command.message_id}")
+        try:
+            result = await file_handler.handle_save_command(command)
+        except Exception as e:
+            logger.error(f"Error processing command {command.message_id}: {e}")
+            self._stats["failed"] += 1
+            await asyncio.to_thread(self._set_status, message_id, "failed", str(e)[:500])
+            return
+        
+        if result.success:
+            logger.info(
+                f"Successfully processed command {command.message_id}: "
+                f"uploaded to {result.prediction.folder_name}"
+            )
+            self._stats["succeeded"] += 1
+            await asyncio.to_thread(self._set_status, message_id, "done")
+        else:
+            logger.warning(
+                f"Failed to process command {command.message_id}: "
+                f"{result.error_message}"
+            )
+            self._stats["failed"] += 1
+            await asyncio.to_thread(self._set_status, message_id, "failed", result.error_message)
+    
+    def status(self) -> Dict[str, Any]:
+        """Queue depth by job status, worker count and per-stage latency."""
+        try:
+            rows = self._query("SELECT status, COUNT(*) FROM save_jobs GROUP BY status")
+            jobs = {status: count for status, count in rows}
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read job queue status: {e}")
+            jobs = {}
+        return {
+            "workers": self._workers,
+            "pending": self._pending.qsize() if self._pending is not None else 0,
+            "jobs": jobs,
+            "stages": stage_limiter.stats(),
+            **self._stats,
+        }
+
+
+# Global instances
+stage_limiter = StageLimiter()
+job_queue = SaveJobQueue()
@@ -1,13 +1,18 @@
 """
 ASKA WhatsApp Bot - Message Cache
-In-memory cache for storing incoming messages with TTL.
+Bounded cache for storing incoming messages with TTL, optionally backed by SQLite.
 Required because WhatsApp API doesn't provide endpoint to fetch message by ID.
 """
 
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
 
 from app.config import settings
 from app.models.schemas import CachedMessage, MessageType, DocumentMessage
@@ -17,19 +22,169 @@ logger = logging.getLogger(__name__)
 
 class MessageCache:
     """
-    In-memory cache for WhatsApp messages.
+    Bounded cache for WhatsApp messages.
     
     Messages are stored with a TTL (default 24 hours) matching
     WhatsApp's service window. This is necessary because
     WhatsApp Cloud API doesn't provide an endpoint to retrieve
     messages by their ID.
-    """
     
-    def __init__(self, ttl_hours: int = None):
-        self._cache: Dict[str, CachedMessage] = {}
-        self._timestamps: Dict[str, datetime] = {}
-        self._ttl = timedelta(hours=ttl_hours or settings.cache_ttl_hours)
+    Entries live in an OrderedDict kept in store-time order. With a
+    single TTL the oldest entry always expires first, so expiry and
+    eviction only ever pop from the front - O(1) per entry, no scans.
+    
+    When `db_path` is set every message is also written to SQLite.
+    Entries evicted by the memory cap spill to disk and are still found
+    by `get`, and a restart reloads the newest entries so "save" replies
+    keep working across deploys.
+    """
+
+    def __init__(
+        self,
+        ttl_hours: int = None,
+        max_entries: int = None,
+        db_path: str = None
+    ):
+        self._cache: "OrderedDict[str, CachedMessage]" = OrderedDict()
+        self._timestamps: Dict[str, float] = {}
+        self._ttl = (ttl_hours or settings.cache_ttl_hours) * 3600
+        self._max_entries = max(1, max_entries or settings.cache_max_entries)
+        self._db_path = settings.cache_db_path if db_path is None else db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
         self._lock = asyncio.Lock()
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evicted": 0,
+            "expired": 0,
+        }
+    
+    # ==================== Persistence ====================
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite store on first use (None when persistence is off)."""
+        if not self._db_path:
+            return None
+        if self._db is None:
+            directory = os.path.dirname(self._db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self._db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    message_id TEXT PRIMARY KEY,
+                    stored_at REAL NOT NULL,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_messages_stored_at ON messages (stored_at)")
+            db.commit()
+            self._db = db
+        return self._db
+    
+    def _persist(self, message_id: str, message_data: CachedMessage, stored_at: float) -> None:
+        """Write one message to SQLite."""
+        with self._db_lock:
+            try:
+                db = self._connect()
+                if db is None:
+                    return
+                db.execute(
+                    "INSERT OR REPLACE INTO messages (message_id, stored_at, payload) VALUES (?, ?, ?)",
+                    (message_id, stored_at, message_data.model_dump_json())
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist message {message_id}: {e}")
+    
+    def _load_from_disk(self, message_id: str) -> Optional[CachedMessage]:
+        """Read a spilled or pre-restart message from SQLite."""
+        with self._db_lock:
+            try:
+                db = self._connect()
+                if db is None:
+                    return None
+                row = db.execute(
+                    "SELECT payload FROM messages WHERE message_id = ? AND stored_at >= ?",
+                    (message_id, time.time() - self._ttl)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to read message {message_id} from disk: {e}")
+                return None
+        if not row:
+            return None
+        return CachedMessage.model_validate_json(row[0])
+    
+    def warm_start(self) -> int:
+        """
+        Reload the newest unexpired messages from SQLite into memory.
+        Call once on startup.
+        
+        Returns:
+            Number of messages loaded
+        """
+        with self._db_lock:
+            try:
+                db = self._connect()
+                if db is None:
+                    return 0
+                rows = db.execute(
+                    """
+                    SELECT message_id, stored_at, payload FROM messages
+                    WHERE stored_at >= ?
+                    ORDER BY stored_at DESC
+                    LIMIT ?
+                    """,
+                    (time.time() - self._ttl, self._max_entries)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to load message cache from disk: {e}")
+                return 0
+        
+        for message_id, stored_at, payload in reversed(rows):
+            try:
+                self._cache[message_id] = CachedMessage.model_validate_json(payload)
+            except ValueError:
+                continue
+            self._timestamps[message_id] = stored_at
+            self._cache.move_to_end(message_id)
+        
+        logger.info(f"Message cache warm start: {len(rows)} messages restored")
+        return len(rows)
+    
+    # ==================== Memory ====================
+    
+    def _put(self, message_id: str, message_data: CachedMessage) -> None:
+        """Insert into memory, then trim expired and over-cap entries."""
+        stored_at = time.time()
+        self._cache[message_id] = message_data
+        self._cache.move_to_end(message_id)
+        self._timestamps[message_id] = stored_at
+        self._expire(stored_at)
+        while len(self._cache) > self._max_entries:
+            oldest_id, _ = self._cache.popitem(last=False)
+            self._timestamps.pop(oldest_id, None)
+            self._stats["evicted"] += 1
+        self._persist(message_id, message_data, stored_at)
+    
+    def _expire(self, now: float) -> int:
+        """Pop expired entries from the front of the store-time order."""
+        cutoff = now - self._ttl
+        expired = 0
+        while self._cache:
+            oldest_id = next(iter(self._cache))
+            if self._timestamps.get(oldest_id, 0) > cutoff:
+                break
+            self._remove(oldest_id)
+            expired += 1
+        self._stats["expired"] += expired
+        return expired
     
     async def store(self, message_id: str, message_data: CachedMessage) -> None:
         """
@@ -40,48 +195,70 @@ class MessageCache:
             message_data: The message data to store
         """
         async with self._lock:
-            self._cache[message_id] = message_data
-            self._timestamps[message_id] = datetime.now()
+            self._put(message_id, message_data)
             logger.debug(f"Cached message {message_id}")
     
     def store_sync(self, message_id: str, message_data: CachedMessage) -> None:
         """
         Synchronous version of store for use in non-async contexts.
         """
-        self._cache[message_id] = message_data
-        self._timestamps[message_id] = datetime.now()
+        self._put(message_id, message_data)
         logger.debug(f"Cached message {message_id} (sync)")
     
     def get(self, message_id: str) -> Optional[CachedMessage]:
         """
         Retrieve a message from cache if not expired.
+        Falls back to SQLite for messages spilled by the memory cap.
         
         Args:
             message_id: The message ID to retrieve
-            
+        
         Returns:
             CachedMessage if found and not expired, None otherwise
         """
-        if message_id not in self._cache:
-            logger.debug(f"Message {message_id} not in cache")
-            return None
+        if message_id in self._cache:
+            # Check expiry
+            stored_at = self._timestamps.get(message_id)
+            if stored_at and time.time() - stored_at > self._ttl:
+                # Expired, remove from cache
+                logger.debug(f"Message {message_id} expired, removing from cache")
+                self._remove(message_id)
+                self._stats["misses"] += 1
+                return None
+            
+            self._stats["memory_hits"] += 1
+            logger.debug(f"Retrieved message {message_id} from cache")
+            return self._cache.get(message_id)
         
-        # Check expiry
-        stored_at = self._timestamps.get(message_id)
-        if stored_at and datetime.now() - stored_at > self._ttl:
-            # Expired, remove from cache
-            logger.debug(f"Message {message_id} expired, removing from cache")
-            self._remove(message_id)
+        message = self._load_from_disk(message_id)
+        if message is None:
+            self._stats["misses"] += 1
+            logger.debug(f"Message {message_id} not in cache")
             return None
         
-        logger.debug(f"Retrieved message {message_id} from cache")
-        return self._cache.get(message_id)
+        self._stats["disk_hits"] += 1
+        logger.debug(f"Retrieved message {message_id} from disk")
+        return message
     
     def _remove(self, message_id: str) -> None:
-        """Remove a message from cache."""
+        """Remove a message from memory."""
         self._cache.pop(message_id, None)
         self._timestamps.pop(message_id, None)
     
+    def _purge_disk(self, cutoff: float) -> int:
+        """Delete expired rows from SQLite."""
+        with self._db_lock:
+            try:
+                db = self._connect()
+                if db is None:
+                    return 0
+                cursor = db.execute("DELETE FROM messages WHERE stored_at < ?", (cutoff,))
+                db.commit()
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to purge message cache on disk: {e}")
+                return 0
+    
     async def cleanup_expired(self) -> None:
         """
         Background task to periodically clean up expired messages.
@@ -91,21 +268,19 @@ class MessageCache:
         
         while True:
             try:
-                await asyncio.sleep(3600)  # Run every hour
+                await asyncio.sleep(600)  # Run every 10 minutes
                 
                 async with self._lock:
-                    now = datetime.now()
-                    expired_ids = [
-                        msg_id for msg_id, ts in self._timestamps.items()
-                        if now - ts > self._ttl
-                    ]
-                    
-                    for msg_id in expired_ids:
-                        self._remove(msg_id)
-                    
-                    if expired_ids:
-                        logger.info(f"Cleaned up {len(expired_ids)} expired messages")
-                        
+                    now = time.time()
+                    expired = self._expire(now)
+                purged = await asyncio.to_thread(self._purge_disk, now - self._ttl)
+                
+                if expired or purged:
+                    logger.info(
+                        f"Cleaned up {expired} expired messages "
+                        f"({purged} removed from disk)"
+                    )
+            
             except asyncio.CancelledError:
                 logger.info("Cache cleanup task cancelled")
                 break
@@ -114,13 +289,30 @@ class MessageCache:
     
     @property
     def size(self) -> int:
-        """Get current cache size."""
+        """Get current in-memory cache size."""
         return len(self._cache)
     
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, hit/miss counters and persistence mode."""
+        return {
+            "size": len(self._cache),
+            "max_entries": self._max_entries,
+            "persistent": bool(self._db_path),
+            **self._stats,
+        }
+    
     def clear(self) -> None:
-        """Clear all cached messages."""
+        """Clear all cached messages (memory and disk)."""
         self._cache.clear()
         self._timestamps.clear()
+        with self._db_lock:
+            try:
+                db = self._connect()
+                if db is not None:
+                    db.execute("DELETE FROM messages")
+                    db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to clear message cache on disk: {e}")
         logger.info("Message cache cleared")
     
     def store_from_webhook(self, message: dict) -> None:
@@ -1,19 +1,109 @@
 """
 ASKA WhatsApp Bot - PDF Extractor
 Extracts text and images from PDF files for AI analysis.
+
+Extraction runs in a small process pool so a large scanned PDF cannot block
+the FastAPI event loop; text is read first and the first page is only
+rendered (at an adaptive DPI) when the text layer is not good enough.
 """
 
+import asyncio
 import logging
 import base64
-from io import BytesIO
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Set, Union
 
 import fitz  # PyMuPDF
 
 from app.config import settings
 from app.models.schemas import PDFContent
+from app.clients.whatsapp_client import MediaFile
 
 logger = logging.getLogger(__name__)
 
+# Minimum text length for the predictor to use text analysis (no render needed)
+TEXT_SUFFICIENT_CHARS = 100
+# Minimum text length to consider the PDF text-based at all
+HAS_TEXT_MIN_CHARS = 50
+
+
+def _empty_content() -> dict:
+    return {
+        "text": "",
+        "first_page_image": None,
+        "first_page_base64": None,
+        "page_count": 0,
+        "has_text": False,
+    }
+
+
+def _adaptive_zoom(page_rect, max_dpi: int, max_pixels: int) -> float:
+    """
+    Zoom factor for rendering: the configured DPI, lowered so the rendered
+    page never exceeds max_pixels (large-format scans stay cheap).
+    """
+    zoom = max_dpi / 72
+    area = max(1.0, page_rect.width * page_rect.height)
+    if area * zoom * zoom > max_pixels:
+        zoom = (max_pixels / area) ** 0.5
+    return max(zoom, 0.5)
+
+
+def extract_pdf_content(
+    pdf_source: Union[bytes, str],
+    max_text_chars: int,
+    render_dpi: int,
+    max_render_pixels: int,
+) -> dict:
+    """
+    Extract first-page text and, only if needed, a rendered PNG.
+    Top-level function so it can run inside a worker process; returns
+    plain data that pickles cheaply. `pdf_source` is the PDF bytes or a
+    path, so spooled downloads are opened from disk instead of pickled.
+    """
+    if isinstance(pdf_source, str):
+        doc = fitz.open(pdf_source, filetype="pdf")
+    else:
+        doc = fitz.open(stream=pdf_source, filetype="pdf")
+    try:
+        page_count = len(doc)
+        if page_count == 0:
+            logger.warning("PDF has no pages")
+            return _empty_content()
+        
+        first_page = doc[0]
+        
+        # 1. Extract text (cheap)
+        text = first_page.get_text("text").strip()
+        if len(text) > max_text_chars:
+            text = text[:max_text_chars]
+        
+        # Check if meaningful text exists
+        # (some scanned PDFs have just whitespace or OCR artifacts)
+        has_text = len(text) >= HAS_TEXT_MIN_CHARS
+        
+        result = {
+            "text": text,
+            "first_page_image": None,
+            "first_page_base64": None,
+            "page_count": page_count,
+            "has_text": has_text,
+        }
+        if len(text) >= TEXT_SUFFICIENT_CHARS:
+            return result
+        
+        # 2. Render page to image only for scanned / text-poor PDFs
+        zoom = _adaptive_zoom(first_page.rect, render_dpi, max_render_pixels)
+        pix = first_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        img_bytes = pix.tobytes("png")
+        result["first_page_image"] = img_bytes
+        result["first_page_base64"] = base64.b64encode(img_bytes).decode('utf-8')
+        return result
+    finally:
+        doc.close()
+
 
 class PDFExtractor:
     """
@@ -31,10 +121,73 @@ class PDFExtractor:
     ):
         self.max_text_chars = max_text_chars or settings.pdf_max_text_chars
         self.render_dpi = render_dpi or settings.pdf_render_dpi
+        self.max_render_pixels = settings.pdf_max_render_pixels
+        self.max_bytes = settings.pdf_max_mb * 1024 * 1024
+        self.timeout = settings.pdf_extract_timeout
+        self.workers = max(1, settings.pdf_workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._retired_pools: Set[ProcessPoolExecutor] = set()
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def _retire_pool(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Swap in a fresh pool after a timeout; a stuck worker cannot be cancelled.
+
+        The old pool is not killed right away: other users' extractions running
+        or queued on it still finish. Every request submitted to it gives up
+        within `timeout` of the swap, so its processes (including the hung one)
+        are terminated once that window has passed.
+        """
+        if self._pool is not pool:
+            # Already swapped by a concurrent timeout on the same pool
+            return
+        self._pool = None
+        self._retired_pools.add(pool)
+        pool.shutdown(wait=False)
+        try:
+            asyncio.get_running_loop().call_later(self.timeout + 1, self._kill_pool, pool)
+        except RuntimeError:
+            self._kill_pool(pool)
+    
+    def _drop_broken_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Forget a pool whose worker died so the next request starts a new one."""
+        if self._pool is pool:
+            self._pool = None
+        self._kill_pool(pool)
+    
+    def _kill_pool(self, pool: ProcessPoolExecutor) -> None:
+        self._retired_pools.discard(pool)
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def shutdown(self) -> None:
+        """Stop worker processes (application shutdown)."""
+        for pool in list(self._retired_pools):
+            self._kill_pool(pool)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _to_content(self, data: dict) -> PDFContent:
+        logger.info(
+            f"Extracted PDF: {data['page_count']} pages, "
+            f"{len(data['text'])} chars text, "
+            f"has_text={data['has_text']}, "
+            f"rendered={data['first_page_image'] is not None}"
+        )
+        return PDFContent(**data)
     
     def extract_content(self, pdf_bytes: bytes) -> PDFContent:
         """
-        Extract text and image from the first page of a PDF.
+        Extract text and image from the first page of a PDF (in-process).
         
         Args:
             pdf_bytes: Binary content of the PDF file
@@ -43,74 +196,99 @@ class PDFExtractor:
             PDFContent with extracted text and/or image
         """
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            try:
-                page_count = len(doc)
-                
-                if page_count == 0:
-                    logger.warning("PDF has no pages")
-                    return PDFContent(
-                        text="",
-                        first_page_image=None,
-                        first_page_base64=None,
-                        page_count=0,
-                        has_text=False
-                    )
-                
-                # Get first page
-                first_page = doc[0]
-                
-                # 1. Extract text
-                text = first_page.get_text("text")
-                text = text.strip()
-                
-                # Truncate if too long
-                if len(text) > self.max_text_chars:
-                    text = text[:self.max_text_chars]
-                
-                # Check if meaningful text exists
-                # (some scanned PDFs have just whitespace or OCR artifacts)
-                has_text = len(text.strip()) >= 50
-                
-                # 2. Render page to image
-                # Use matrix to set DPI (default is 72 DPI)
-                zoom = self.render_dpi / 72
-                mat = fitz.Matrix(zoom, zoom)
-                pix = first_page.get_pixmap(matrix=mat)
-                
-                # Convert to PNG bytes
-                img_bytes = pix.tobytes("png")
-                
-                # Convert to base64 for Gemini API
-                img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-                
-                logger.info(
-                    f"Extracted PDF: {page_count} pages, "
-                    f"{len(text)} chars text, "
-                    f"has_text={has_text}"
+            return self._to_content(
+                extract_pdf_content(
+                    pdf_bytes,
+                    self.max_text_chars,
+                    self.render_dpi,
+                    self.max_render_pixels,
                 )
-                
-                return PDFContent(
-                    text=text,
-                    first_page_image=img_bytes,
-                    first_page_base64=img_base64,
-                    page_count=page_count,
-                    has_text=has_text
-                )
-                
-            finally:
-                doc.close()
-                
+            )
         except Exception as e:
             logger.error(f"Error extracting PDF content: {e}")
-            return PDFContent(
-                text="",
-                first_page_image=None,
-                first_page_base64=None,
-                page_count=0,
-                has_text=False
+            return PDFContent(**_empty_content())
+    
+    async def _run_in(self, loop, pool: ProcessPoolExecutor, source) -> dict:
+        return await asyncio.wait_for(
+            loop.run_in_executor(
+                pool,
+                extract_pdf_content,
+                source,
+                self.max_text_chars,
+                self.render_dpi,
+                self.max_render_pixels,
+            ),
+            timeout=self.timeout,
+        )
+    
+    async def _retry_isolated(self, loop, source) -> Optional[dict]:
+        """
+        Retry after a pool crash in a single-use worker, so if this PDF is the
+        one crashing MuPDF it only takes itself down on the retry.
+        """
+        retry_pool = ProcessPoolExecutor(max_workers=1)
+        try:
+            return await self._run_in(loop, retry_pool, source)
+        except asyncio.TimeoutError:
+            logger.error(f"PDF extraction retry timed out after {self.timeout}s")
+        except BrokenProcessPool:
+            logger.error("PDF extraction crashed its worker again on retry; skipping extraction")
+        except Exception as e:
+            logger.error(f"Error extracting PDF content on retry: {e}")
+        finally:
+            self._kill_pool(retry_pool)
+        return None
+    
+    async def extract_content_async(self, pdf_bytes: Union[bytes, MediaFile]) -> PDFContent:
+        """
+        Extract PDF content in the worker process pool.
+        
+        PDFs larger than WA_ASKA_PDF_MAX_MB are skipped and extraction is
+        abandoned after WA_ASKA_PDF_TIMEOUT seconds; both cases return empty
+        content so the predictor falls back to the filename.
+        
+        Args:
+            pdf_bytes: PDF content, as bytes or a downloaded MediaFile
+            
+        Returns:
+            PDFContent with extracted text and/or image
+        """
+        if len(pdf_bytes) > self.max_bytes:
+            logger.warning(
+                f"PDF too large for extraction ({len(pdf_bytes)} bytes > {self.max_bytes})"
+            )
+            return PDFContent(**_empty_content())
+        
+        if isinstance(pdf_bytes, MediaFile):
+            source = pdf_bytes.extraction_source()
+        else:
+            source = pdf_bytes
+        
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        pool = self._get_pool()
+        try:
+            data = await self._run_in(loop, pool, source)
+        except asyncio.TimeoutError:
+            logger.error(
+                f"PDF extraction timed out after {self.timeout}s; "
+                "retiring worker pool, other extractions keep running"
             )
+            self._retire_pool(pool)
+            return PDFContent(**_empty_content())
+        except BrokenProcessPool:
+            # A worker died (e.g. MuPDF crashed), possibly on another user's PDF
+            self._drop_broken_pool(pool)
+            logger.warning("PDF worker pool broke during extraction; retrying once in an isolated worker")
+            data = await self._retry_isolated(loop, source)
+            if data is None:
+                return PDFContent(**_empty_content())
+        except Exception as e:
+            logger.error(f"Error extracting PDF content: {e}")
+            return PDFContent(**_empty_content())
+        
+        logger.debug(f"PDF extraction took {time.perf_counter() - started:.2f}s")
+        return self._to_content(data)
     
     def should_use_image_analysis(self, pdf_content: PDFContent) -> bool:
         """
@@ -129,7 +307,7 @@ class PDFExtractor:
         if not pdf_content.has_text:
             return True
         
-        if len(pdf_content.text.strip()) < 100:
+        if len(pdf_content.text.strip()) < TEXT_SUFFICIENT_CHARS:
             return True
         
         return False
@@ -0,0 +1,265 @@
+"""
+ASKA WhatsApp Bot - Prediction Cache
+Persistent memory of which Drive folder a document finally went to.
+Lets repeat documents skip the Gemini call entirely.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, Union
+
+from app.config import settings
+from app.clients.whatsapp_client import MediaFile
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(pdf_bytes: Union[bytes, MediaFile]) -> str:
+    """SHA-256 of the raw document bytes (precomputed for a MediaFile)."""
+    if isinstance(pdf_bytes, MediaFile):
+        return pdf_bytes.sha256
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def filename_pattern(filename: str) -> str:
+    """
+    Reduce a filename to its document-type pattern.
+
+    Digits (dates, numbers, NIP/NISN) become '#', separators become spaces,
+    so "Surat_Tugas_2024-12-01 No.15.pdf" and "surat tugas 2025-01-09 no 3.pdf"
+    share the pattern "surat tugas # no #".
+    """
+    name = filename.lower()
+    name = re.sub(r"\.(pdf|docx?|xlsx?)$", "", name)
+    name = re.sub(r"\d+", "#", name)
+    name = re.sub(r"[_\-\.\s]+", " ", name)
+    name = re.sub(r"(# ?)+#", "#", name)
+    return name.strip()
+
+
+class PredictionCache:
+    """
+    SQLite-backed cache mapping document content hashes and filename
+    patterns to the folder a file was confirmed uploaded to.
+
+    - Content hash hits are exact re-sends of the same document.
+    - Pattern hits need `min_confirmations` uploads of that pattern to the
+      same folder before they are trusted.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        min_confirmations: int = None
+    ):
+        self.path = path or settings.prediction_cache_path
+        self.min_confirmations = max(
+            1, min_confirmations or settings.prediction_pattern_min_confirmations
+        )
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats: Dict[str, int] = {
+            "lookups": 0,
+            "content_hits": 0,
+            "pattern_hits": 0,
+            "gemini_calls_saved": 0,
+            "learned": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS content_folders (
+                    content_hash TEXT PRIMARY KEY,
+                    folder_id TEXT NOT NULL,
+                    folder_name TEXT NOT NULL,
+                    confidence REAL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pattern_folders (
+                    pattern TEXT PRIMARY KEY,
+                    folder_id TEXT NOT NULL,
+                    folder_name TEXT NOT NULL,
+                    confirmations INTEGER NOT NULL DEFAULT 1,
+                    confidence REAL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # Caches created before confidences were stored: those rows stay
+            # unused (confidence NULL) until a confident upload relearns them.
+            for table in ("content_folders", "pattern_folders"):
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if "confidence" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN confidence REAL")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(
+        self,
+        filename: str,
+        pdf_bytes: Optional[Union[bytes, MediaFile]] = None,
+        use_pattern: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a remembered folder for this document.
+
+        Returns:
+            Dict with folder_id, folder_name, the confidence of the predictions
+            it was learned from and source ('content'/'pattern'), or None on a miss
+        """
+        with self._lock:
+            self._stats["lookups"] += 1
+            try:
+                conn = self._connect()
+                if pdf_bytes:
+                    digest = content_hash(pdf_bytes)
+                    row = conn.execute(
+                        """
+                        SELECT folder_id, folder_name, confidence FROM content_folders
+                        WHERE content_hash = ? AND confidence IS NOT NULL
+                        """,
+                        (digest,)
+                    ).fetchone()
+                    if row:
+                        conn.execute(
+                            "UPDATE content_folders SET hits = hits + 1 WHERE content_hash = ?",
+                            (digest,)
+                        )
+                        conn.commit()
+                        self._stats["content_hits"] += 1
+                        self._stats["gemini_calls_saved"] += 1
+                        return {
+                            "folder_id": row[0],
+                            "folder_name": row[1],
+                            "confidence": row[2],
+                            "source": "content",
+                        }
+
+                pattern = filename_pattern(filename)
+                if use_pattern and pattern:
+                    row = conn.execute(
+                        """
+                        SELECT folder_id, folder_name, confidence FROM pattern_folders
+                        WHERE pattern = ? AND confirmations >= ? AND confidence IS NOT NULL
+                        """,
+                        (pattern, self.min_confirmations)
+                    ).fetchone()
+                    if row:
+                        conn.execute(
+                            "UPDATE pattern_folders SET hits = hits + 1 WHERE pattern = ?",
+                            (pattern,)
+                        )
+                        conn.commit()
+                        self._stats["pattern_hits"] += 1
+                        self._stats["gemini_calls_saved"] += 1
+                        return {
+                            "folder_id": row[0],
+                            "folder_name": row[1],
+                            "confidence": row[2],
+                            "source": "pattern",
+                        }
+            except sqlite3.Error as e:
+                logger.warning(f"Prediction cache lookup failed: {e}")
+        return None
+
+    def remember(
+        self,
+        filename: str,
+        pdf_bytes: Optional[Union[bytes, MediaFile]],
+        folder_id: str,
+        folder_name: str,
+        confidence: float,
+        use_pattern: bool = True
+    ) -> None:
+        """
+        Learn from a confirmed upload.
+
+        A pattern that moves to a different folder restarts its confirmation
+        count, so one misfiled document cannot lock in a wrong mapping.
+        A pattern keeps the lowest confidence among its confirmations.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                if pdf_bytes:
+                    conn.execute(
+                        """
+                        INSERT INTO content_folders (content_hash, folder_id, folder_name, confidence, updated_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(content_hash) DO UPDATE SET
+                            folder_id = excluded.folder_id,
+                            folder_name = excluded.folder_name,
+                            confidence = excluded.confidence,
+                            updated_at = excluded.updated_at
+                        """,
+                        (content_hash(pdf_bytes), folder_id, folder_name, confidence, now)
+                    )
+                pattern = filename_pattern(filename)
+                if use_pattern and pattern:
+                    conn.execute(
+                        """
+                        INSERT INTO pattern_folders (pattern, folder_id, folder_name, confidence, updated_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(pattern) DO UPDATE SET
+                            confirmations = CASE
+                                WHEN pattern_folders.folder_id = excluded.folder_id
+                                    THEN pattern_folders.confirmations + 1
+                                ELSE 1
+                            END,
+                            confidence = CASE
+                                WHEN pattern_folders.folder_id = excluded.folder_id
+                                    THEN MIN(COALESCE(pattern_folders.confidence, excluded.confidence), excluded.confidence)
+                                ELSE excluded.confidence
+                            END,
+                            folder_id = excluded.folder_id,
+                            folder_name = excluded.folder_name,
+                            updated_at = excluded.updated_at
+                        """,
+                        (pattern, folder_id, folder_name, confidence, now)
+                    )
+                conn.commit()
+                self._stats["learned"] += 1
+            except sqlite3.Error as e:
+                logger.warning(f"Prediction cache update failed: {e}")
+
+    def forget_folder(self, folder_id: str) -> None:
+        """Drop every mapping to a folder that no longer exists."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM content_folders WHERE folder_id = ?", (folder_id,))
+                conn.execute("DELETE FROM pattern_folders WHERE folder_id = ?", (folder_id,))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Prediction cache cleanup failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and Gemini calls saved since startup."""
+        stats: Dict[str, Any] = dict(self._stats)
+        hits = stats["content_hits"] + stats["pattern_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 3) if stats["lookups"] else 0.0
+        return stats
+
+
+# Global cache instance
+prediction_cache = PredictionCache()
@@ -4,12 +4,12 @@ Handles incoming webhook requests from WhatsApp Cloud API.
 """
 
 import logging
-from fastapi import APIRouter, Request, Response, BackgroundTasks, Query, HTTPException
+from fastapi import APIRouter, Request, Response, Query, HTTPException
 
 from app.config import settings
 from app.services.message_parser import extract_messages, parse_command
 from app.services.message_cache import message_cache
-from app.services.file_handler import file_handler
+from app.services.job_queue import job_queue
 
 logger = logging.getLogger(__name__)
 
@@ -50,19 +50,16 @@ async def verify_webhook(
 
 
 @router.post("")
-async def receive_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks
-):
+async def receive_webhook(request: Request):
     """
     Receive webhook events from WhatsApp Cloud API.
     
     This endpoint receives all incoming messages and status updates.
-    Processing is done in background tasks to ensure quick response.
+    Save commands are persisted to the job queue (keyed by message id,
+    so redelivered webhooks are ignored) to ensure quick response.
     
     Args:
         request: The incoming request
-        background_tasks: FastAPI background tasks
         
     Returns:
         Acknowledgment response
@@ -92,12 +89,9 @@ async def receive_webhook(
             # Check for save command
             command = parse_command(message)
             if command:
-                logger.info(f"Detected save command, processing in background")
-                # Process command in background to return quickly
-                background_tasks.add_task(
-                    process_save_command,
-                    command
-                )
+                logger.info(f"Detected save command, queueing {command.message_id}")
+                # Queue command to return quickly; duplicates are dropped
+                await job_queue.enqueue(command)
         
         return {"status": "ok"}
         
@@ -106,28 +100,3 @@ async def receive_webhook(
         # Always return 200 to prevent retries from WhatsApp
         return {"status": "ok", "error": str(e)}
 
-
-async def process_save_command(command):
-    """
-    Background task to process a save command.
-    
-    Args:
-        command: The CommandContext to process
-    """
-    try:
-        logger.info(f"Processing save command: {command.message_id}")
-        result = await file_handler.handle_save_command(command)
-        
-        if result.success:
-            logger.info(
-                f"Successfully processed command {command.message_id}: "
-                f"uploaded to {result.prediction.folder_name}"
-            )
-        else:
-            logger.warning(
-                f"Failed to process command {command.message_id}: "
-                f"{result.error_message}"
-            )
-            
-    except Exception as e:
-        logger.error(f"Error processing command {command.message_id}: {e}")
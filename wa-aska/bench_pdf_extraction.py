@@ -0,0 +1,84 @@
+"""
+ASKA WhatsApp Bot - PDF extraction benchmark
+
+Runs extract_pdf_content over a folder of sample PDFs, each file in a fresh
+worker process, and reports extraction latency and peak RSS per file.
+Compare the text-first/adaptive path with the old always-render behaviour:
+
+    python bench_pdf_extraction.py samples/
+    python bench_pdf_extraction.py samples/ --always-render
+"""
+
+import argparse
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from app.config import settings
+from app.services import pdf_extractor as extractor_module
+
+
+def _measure(path: str, always_render: bool) -> tuple:
+    if always_render:
+        # Old behaviour: always render the first page at the configured DPI
+        extractor_module.TEXT_SUFFICIENT_CHARS = sys.maxsize
+        max_pixels = sys.maxsize
+    else:
+        max_pixels = settings.pdf_max_render_pixels
+    pdf_bytes = Path(path).read_bytes()
+    started = time.perf_counter()
+    data = extractor_module.extract_pdf_content(
+        pdf_bytes,
+        settings.pdf_max_text_chars,
+        settings.pdf_render_dpi,
+        max_pixels,
+    )
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, peak_kb, len(pdf_bytes), data["first_page_image"] is not None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction")
+    parser.add_argument("corpus", type=Path, help="Folder containing sample PDFs")
+    parser.add_argument("--always-render", action="store_true", help="Emulate the old always-render path")
+    args = parser.parse_args()
+
+    files = sorted(args.corpus.glob("**/*.pdf"))
+    if not files:
+        raise SystemExit(f"No PDF files found in {args.corpus}")
+
+    latencies = []
+    peaks = []
+    rendered = 0
+    ctx = get_context("spawn")
+    for path in files:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            elapsed, peak_kb, size, did_render = pool.submit(
+                _measure, str(path), args.always_render
+            ).result()
+        latencies.append(elapsed)
+        peaks.append(peak_kb)
+        rendered += int(did_render)
+        print(
+            f"{path.name:<40} {size / 1024 / 1024:7.2f} MB "
+            f"{elapsed * 1000:8.1f} ms  peak RSS {peak_kb / 1024:7.1f} MB"
+            f"{'  (rendered)' if did_render else ''}"
+        )
+
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print()
+    print(f"Files        : {len(files)} ({rendered} rendered)")
+    print(f"Latency p50  : {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95  : {p95 * 1000:.1f} ms")
+    print(f"Latency max  : {max(latencies) * 1000:.1f} ms")
+    print(f"Peak RSS max : {max(peaks) / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
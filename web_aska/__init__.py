@@ -34,6 +34,7 @@ from db import (
     get_tka_result,
     get_tka_analysis_job,
     mark_tka_analysis_sent,
+    notify_chat_history_change,
 )
 from dashboard.TKA.queries import fetch_tka_attempts
 from dashboard.queries import fetch_landingpage_graduation_by_nisn
@@ -641,6 +642,7 @@ def create_app() -> Flask:
                 """,
                 (updated_intro, first_bot.get("id"), user_id),
             )
+            notify_chat_history_change(cur, user_id)
         db_conn.commit()
         return get_chat_history(user_id, limit=25, offset=0, topic=GRADUATION_CHAT_TOPIC)
 
@@ -655,7 +657,7 @@ def create_app() -> Flask:
         quota_status = get_chat_quota_status(user_id)
         _sync_session_quota(quota_status)
         status_notice, _ = _prepare_status_notice(user_id)
-        initial_chats = get_chat_history(user_id, limit=10, offset=0)
+        initial_chats = get_chat_history(user_id, limit=10, offset=0, with_feedback=True)
 
         status_payload = status_notice.__dict__ if status_notice else None
         return render_template(
@@ -943,7 +945,7 @@ def create_app() -> Flask:
         user_id = session['user'].get('id')
         offset = request.args.get('offset', 0, type=int)
         
-        history = get_chat_history(user_id, limit=10, offset=offset)
+        history = get_chat_history(user_id, limit=10, offset=offset, with_feedback=True)
         
         # Convert datetime objects to string representation
         for item in history:
@@ -1049,6 +1051,7 @@ def create_app() -> Flask:
                             """,
                             (response_text, chat_log_id, user_id),
                         )
+                        notify_chat_history_change(cur, user_id)
                     db_conn.commit()
 
         session["graduation_nisn"] = nisn
@@ -11,7 +11,6 @@ from db import (
     save_feedback,
     delete_feedback,
     get_feedback_status,
-    get_chat_history,
 )
 
 feedback_bp = Blueprint('feedback', __name__, url_prefix='/api/feedback')
@@ -34,46 +33,6 @@ def _get_username() -> Optional[str]:
     return user.get('full_name') or user.get('email') if user else None
 
 
-def _is_user_message_author(chat_log_id: int, user_id: int) -> bool:
-    """
-    Cek apakah user adalah penulis pesan tersebut.
-    Untuk mencegah self-feedback.
-    """
-    # Ambil chat log untuk cek author
-    history = get_chat_history(user_id, limit=1000, offset=0)
-    
-    for msg in history:
-        # Cari message dengan id yang sesuai
-        # Note: get_chat_history tidak return id, jadi kita perlu query langsung
-        pass
-    
-    # Untuk sementara, kita asumsikan user tidak bisa feedback pesan sendiri
-    # jika role-nya adalah 'user'. Kita perlu query chat_logs untuk cek ini.
-    from db import conn
-    from psycopg2.extras import RealDictCursor
-    
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(
-            """
-            SELECT user_id, role
-            FROM chat_logs
-            WHERE id = %s
-            """,
-            (chat_log_id,)
-        )
-        row = cur.fetchone()
-    
-    if not row:
-        return False
-    
-    # Jika pesan adalah dari ASKA (role='aska'), user boleh feedback
-    if row.get('role') == 'aska':
-        return False
-    
-    # Jika pesan dari user dan user_id sama, berarti self-feedback
-    return row.get('user_id') == user_id
-
-
 @feedback_bp.route('', methods=['POST'])
 def submit_feedback():
     """
@@ -134,19 +93,7 @@ def submit_feedback():
             "error": "feedback_type must be 'like' or 'dislike'"
         }), 400
     
-    # 3. Validasi authorization - prevent self-feedback
-    try:
-        if _is_user_message_author(chat_log_id, user_id):
-            return jsonify({
-                "success": False,
-                "error": "Cannot provide feedback on your own message"
-            }), 403
-    except Exception as e:
-        # Jika terjadi error saat cek authorization, log dan lanjutkan
-        # (lebih baik allow daripada block semua)
-        print(f"Error checking message author: {e}")
-    
-    # 4. Simpan feedback
+    # 3. Simpan feedback; kepemilikan pesan dicek di statement yang sama
     username = _get_username()
     
     try:
@@ -173,6 +120,12 @@ def submit_feedback():
             }
         }), 200
         
+    except PermissionError:
+        return jsonify({
+            "success": False,
+            "error": "Cannot provide feedback on your own message"
+        }), 403
+        
     except ValueError as e:
         # chat_log_id tidak ada
         error_msg = str(e)
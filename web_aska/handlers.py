@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 # from openai import OpenAI  # not used in web handler
 
 from ai_core import build_qa_chain
-from db import save_chat, get_chat_history
+from db import save_chat, get_recent_chat_history
 from responses import ASKA_NO_DATA_RESPONSE, ASKA_TECHNICAL_ISSUE_RESPONSE
 from utils import (
     normalize_input,
@@ -303,10 +303,9 @@ async def process_web_request(
 
         print(f"[{now_str()}] ASKA sedang berpikir...")
 
-        history_from_db = get_chat_history(
+        history_from_db = get_recent_chat_history(
             user_id,
             limit=5,
-            offset=0,
             topic=normalized_topic,
         )
         chat_history = format_history_for_chain(history_from_db)